@@ -3,7 +3,12 @@ import sys
 import warnings
 import os
 from datetime import datetime
+from functools import partial
 
+from crew_common.batch import batch_main
+from crew_common.llm_cache import install_llm_cache, llm_cache_mode
+from crew_common.startup import profile_startup, startup_profile_requested
+from crew_common.telemetry import install_telemetry
 from coder.crew import Coder
 
 warnings.filterwarnings("ignore", category=SyntaxWarning, module="pysbd")
@@ -14,10 +19,27 @@ os.makedirs('output', exist_ok=True)
 assignment = 'Write a python program to calculate the first 10,000 terms \
     of this series, multiplying the total by 4: 1 - 1/3 + 1/5 - 1/7 + ...'
 
+def setup(llm_cache):
+    """
+    Prepare this process to run the crew: serve LLM calls through the cache and record telemetry.
+    """
+    install_llm_cache(llm_cache)
+    # Timings and tokens per task, agent and tool go to output/telemetry/, with a summary after each kickoff
+    install_telemetry(crew_name="coder")
+
+
 def run():
     """
     Run the crew.
     """
+    # --startup-profile shows where the time to start the crew goes, without running it
+    if startup_profile_requested():
+        print(profile_startup("coder.main", "coder.main.Coder().crew()"))
+        return
+
+    # --llm-cache record|replay|auto reuses completions stored on disk
+    setup(llm_cache_mode())
+
     inputs = {
         'assignment': assignment,
     }
@@ -25,3 +47,16 @@ def run():
     result = Coder().crew().kickoff(inputs=inputs)
     print(result.raw)
 
+
+def kickoff(inputs):
+    """
+    Run the crew once for one set of inputs.
+    """
+    return Coder().crew().kickoff(inputs=inputs)
+
+
+def run_batch():
+    """
+    Run the crew once per line of a JSONL or CSV file of inputs, e.g. one assignment per line.
+    """
+    batch_main(kickoff, defaults={'assignment': assignment}, initializer=partial(setup, llm_cache_mode()))
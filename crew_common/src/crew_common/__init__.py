@@ -0,0 +1,5 @@
+"""Batch runs, LLM call record/replay, telemetry and startup helpers shared by the crews.
+
+Importing the package imports nothing else, so a crew's package can call
+startup.prepare_environment() before crewai is loaded.
+"""
@@ -0,0 +1,177 @@
+import argparse
+import csv
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, Executor, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+
+def item_id(inputs: Dict[str, Any]) -> str:
+    """Return the id of a batch item: its id field, else a hash of its inputs"""
+    if inputs.get("id") not in (None, ""):
+        return str(inputs["id"])
+    return hashlib.sha256(json.dumps(inputs, sort_keys=True, default=str).encode()).hexdigest()[:16]
+
+
+def read_items(path: str) -> Iterator[Dict[str, Any]]:
+    """Read batch items from a JSONL file (one object per line) or a CSV file with a header row"""
+    with open(path, newline="") as f:
+        if path.lower().endswith(".csv"):
+            for row in csv.DictReader(f):
+                yield {key: value for key, value in row.items() if key}
+        else:
+            for number, line in enumerate(f, 1):
+                if line.strip():
+                    item = json.loads(line)
+                    if not isinstance(item, dict):
+                        raise ValueError(f"{path}:{number}: expected a JSON object")
+                    yield item
+
+
+def completed_ids(output: str) -> Set[str]:
+    """Return the ids of the items an earlier run of the batch completed successfully"""
+    done = set()
+    if os.path.exists(output):
+        with open(output) as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # a line cut short when the earlier run was killed
+                if record.get("status") == "ok":
+                    done.add(record["id"])
+    return done
+
+
+def _ends_line(path: str) -> bool:
+    with open(path, "rb") as f:
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) == b"\n"
+
+
+def _execute(kickoff: Callable[[Dict[str, Any]], Any], inputs: Dict[str, Any]) -> Tuple[str, Any, float]:
+    # Runs in the worker, so only plain data goes back across a process boundary
+    start = time.perf_counter()
+    try:
+        output = kickoff(inputs)
+    except Exception as e:
+        return "error", f"{type(e).__name__}: {e}", time.perf_counter() - start
+    result = getattr(output, "raw", output)  # a CrewOutput's final answer
+    try:
+        json.dumps(result)
+    except TypeError:
+        result = str(result)
+    return "ok", result, time.perf_counter() - start
+
+
+def _progress(done: int, failed: int, total: int, elapsed: float) -> str:
+    rate = done / elapsed if elapsed else 0.0
+    eta = (total - done) / rate if rate else float("nan")
+    return (f"[{done}/{total}] {failed} failed, {rate * 60:.1f} items/min, "
+            f"elapsed {elapsed / 60:.1f} min, ETA {eta / 60:.1f} min")
+
+
+def run_batch(kickoff: Callable[[Dict[str, Any]], Any], items: List[Dict[str, Any]], output: str,
+              workers: int = 4, processes: bool = False, initializer: Optional[Callable[[], Any]] = None,
+              defaults: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Kick off a crew once per item, at most workers at a time, appending each result to a JSONL file.
+
+    The output doubles as the checkpoint: items it already records as ok are
+    skipped, so an interrupted batch resumes where it stopped, and failed
+    items are tried again.
+
+    Args:
+        kickoff: Runs the crew for one input dict; must be a module-level function when processes is set
+        items: Batch items; an id field names the item and is not passed to the crew
+        output: JSONL file the results are appended to
+        workers: Number of items run at the same time
+        processes: Use worker processes instead of threads, for crews whose state is not thread safe
+        initializer: Called once in every worker process, or once up front with threads
+        defaults: Inputs every item starts from
+
+    Returns:
+        Counts of items run, failed and skipped, the elapsed seconds and the throughput
+    """
+    done_before = completed_ids(output)
+    pending = []
+    for item in items:
+        identifier = item_id(item)
+        if identifier not in done_before:
+            inputs = {**(defaults or {}), **{key: value for key, value in item.items() if key != "id"}}
+            pending.append((identifier, inputs))
+    skipped = len(items) - len(pending)
+    print(f"{len(items)} items, {skipped} already done, {len(pending)} to run with {workers} "
+          f"{'processes' if processes else 'threads'}", file=sys.stderr)
+
+    if processes:
+        executor: Executor = ProcessPoolExecutor(workers, initializer=initializer)
+    else:
+        if initializer:
+            initializer()
+        executor = ThreadPoolExecutor(workers, thread_name_prefix="batch")
+
+    done = failed = 0
+    start = time.perf_counter()
+    if os.path.dirname(output):
+        os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "a") as out:
+        # A run killed mid-write leaves its last line unfinished; start after it rather than on it
+        if out.tell() and not _ends_line(output):
+            out.write("\n")
+        futures = {executor.submit(_execute, kickoff, inputs): (identifier, inputs) for identifier, inputs in pending}
+        try:
+            while futures:
+                finished, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    identifier, inputs = futures.pop(future)
+                    try:
+                        status, result, seconds = future.result()
+                    except Exception as e:  # the worker process died
+                        status, result, seconds = "error", f"{type(e).__name__}: {e}", 0.0
+                    record = {"id": identifier, "status": status, "inputs": inputs,
+                              "result" if status == "ok" else "error": result, "seconds": round(seconds, 3),
+                              "finished_at": datetime.now(timezone.utc).isoformat()}
+                    # One line per item, written whole, so a kill never leaves a completed item unrecorded
+                    out.write(json.dumps(record, default=str) + "\n")
+                    out.flush()
+                    done += 1
+                    failed += status != "ok"
+                    print(_progress(done, failed, len(pending), time.perf_counter() - start), file=sys.stderr)
+        except KeyboardInterrupt:
+            print(f"Interrupted; {done} items recorded in {output}, rerun to resume", file=sys.stderr)
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+    executor.shutdown()
+
+    elapsed = time.perf_counter() - start
+    return {"run": done, "failed": failed, "skipped": skipped, "elapsed_s": round(elapsed, 1),
+            "items_per_min": round(done / elapsed * 60, 2) if elapsed else None}
+
+
+def batch_main(kickoff: Callable[[Dict[str, Any]], Any], defaults: Optional[Dict[str, Any]] = None,
+               initializer: Optional[Callable[[], Any]] = None, processes: bool = False,
+               argv: Optional[List[str]] = None) -> Dict[str, Any]:
+    """Command line entry point for run_batch.
+
+        <crew>-batch INPUT.jsonl|INPUT.csv [--output results.jsonl] [--workers 4] [--processes|--threads]
+
+    Arguments it does not know, such as --llm-cache, are left to the crew.
+    """
+    parser = argparse.ArgumentParser(description="Run the crew once per input item")
+    parser.add_argument("input", help="JSONL file of input objects, or CSV file with a header row")
+    parser.add_argument("--output", help="JSONL results and checkpoint, output/<input name>.results.jsonl by default")
+    parser.add_argument("--workers", type=int, default=int(os.environ.get("BATCH_WORKERS", "4")))
+    parser.add_argument("--processes", dest="processes", action="store_true", default=processes)
+    parser.add_argument("--threads", dest="processes", action="store_false")
+    args, _ = parser.parse_known_args(sys.argv[1:] if argv is None else argv)
+
+    output = args.output or os.path.join("output", f"{os.path.splitext(os.path.basename(args.input))[0]}"
+                                                   f".results.jsonl")
+    summary = run_batch(kickoff, list(read_items(args.input)), output, workers=args.workers,
+                        processes=args.processes, initializer=initializer, defaults=defaults)
+    print(f"Batch finished: {summary}, results in {output}")
+    return summary
@@ -0,0 +1,141 @@
+import argparse
+import hashlib
+import json
+import os
+import sys
+import threading
+from typing import Any, Dict, List, Optional
+
+# How LLM calls are served:
+#   off    - always call the model, store nothing
+#   record - always call the model, storing each completion
+#   replay - only serve stored completions; a call that was not recorded fails
+#   auto   - serve stored completions, calling and recording on a miss
+MODES = ("off", "record", "replay", "auto")
+
+DEFAULT_CACHE_DIR = "./llm_cache/"
+
+
+class ReplayMissError(RuntimeError):
+    """Raised in replay mode for an LLM call that has no recorded completion."""
+
+
+class LLMCache:
+    """Records LLM completions on disk and replays them for identical calls.
+
+    Each completion is stored as a JSON file named by the SHA-256 of the
+    model, messages and tools of the call, so a cache directory can be
+    committed and replayed in CI or on a machine with no network.
+    """
+
+    def __init__(self, directory: str = DEFAULT_CACHE_DIR, mode: str = "auto") -> None:
+        if mode not in MODES:
+            raise ValueError(f"Unknown LLM cache mode: {mode}")
+        self.directory = directory
+        self.mode = mode
+        self.hits = 0
+        self.misses = 0
+        self.recorded = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(params: Dict[str, Any]) -> str:
+        """Return the hash identifying a completion call"""
+        identity = {"model": params.get("model"), "messages": params.get("messages"), "tools": params.get("tools")}
+        return hashlib.sha256(json.dumps(identity, sort_keys=True, default=str).encode()).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def load(self, key: str) -> Optional[dict]:
+        """Return the stored response for a key, or None"""
+        try:
+            with open(self._path(key)) as f:
+                return json.load(f)["response"]
+        except FileNotFoundError:
+            return None
+
+    def store(self, key: str, params: Dict[str, Any], response: dict) -> None:
+        """Store a response, with the model and messages that produced it for reference"""
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        record = {"model": params.get("model"), "messages": params.get("messages"),
+                  "tools": params.get("tools"), "response": response}
+        # Write then rename, so a concurrent reader never sees a partial file
+        temporary = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temporary, "w") as f:
+            json.dump(record, f, indent=2, default=str)
+        os.replace(temporary, path)
+        with self._lock:
+            self.recorded += 1
+
+    def completion(self, original, **params: Any) -> Any:
+        """Serve a litellm.completion call according to the mode"""
+        if self.mode == "off" or params.get("stream"):
+            if self.mode == "replay":
+                raise ReplayMissError("Streaming LLM calls cannot be replayed")
+            return original(**params)
+
+        import litellm
+
+        key = self.key(params)
+        if self.mode in ("replay", "auto"):
+            stored = self.load(key)
+            if stored is not None:
+                with self._lock:
+                    self.hits += 1
+                return litellm.ModelResponse(**stored)
+            if self.mode == "replay":
+                raise ReplayMissError(f"No recorded completion for {params.get('model')} call {key} "
+                                      f"in {self.directory}; record it first with --llm-cache record")
+        with self._lock:
+            self.misses += 1
+        response = original(**params)
+        self.store(key, params, response.model_dump())
+        return response
+
+    def stats(self) -> Dict[str, int]:
+        """Return hit, miss and recorded counts"""
+        return {"hits": self.hits, "misses": self.misses, "recorded": self.recorded}
+
+
+_installed: Optional[LLMCache] = None
+
+
+def install_llm_cache(mode: str, directory: Optional[str] = None) -> Optional[LLMCache]:
+    """Route every litellm.completion call, and so every crewAI LLM call, through an LLMCache.
+
+    Args:
+        mode: One of MODES; "off" leaves litellm untouched
+        directory: Where completions are stored, LLM_CACHE_DIR or ./llm_cache/ by default
+
+    Returns:
+        The cache, or None when the mode is "off"
+    """
+    global _installed
+    if mode not in MODES:
+        raise ValueError(f"Unknown LLM cache mode: {mode}")
+    if mode == "off":
+        return None
+    import litellm
+
+    directory = directory or os.environ.get("LLM_CACHE_DIR", DEFAULT_CACHE_DIR)
+    if _installed is None:
+        original = litellm.completion
+        _installed = LLMCache(directory, mode)
+        litellm.completion = lambda **params: _installed.completion(original, **params)
+    else:
+        _installed.directory, _installed.mode = directory, mode
+    return _installed
+
+
+def llm_cache_mode(argv: Optional[List[str]] = None) -> str:
+    """Return the mode given by a --llm-cache flag, else LLM_CACHE_MODE, else off.
+
+    Unrelated command line arguments are ignored, so entry points that take
+    their own arguments can call this too.
+    """
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument("--llm-cache", choices=MODES, default=os.environ.get("LLM_CACHE_MODE", "off"))
+    args, _ = parser.parse_known_args(sys.argv[1:] if argv is None else argv)
+    return args.llm_cache
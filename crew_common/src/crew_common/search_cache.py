@@ -0,0 +1,214 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Type
+
+from crewai.tools import BaseTool
+from pydantic import BaseModel, Field, PrivateAttr
+
+
+# Shared by every crew on this machine unless SEARCH_CACHE_PATH says otherwise
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "crewai-agents", "search_cache.db")
+
+
+def normalize_query(query: str) -> str:
+    """Lower-case a query and collapse its whitespace, so trivially different queries share an entry"""
+    return " ".join(query.lower().split())
+
+
+class SearchCache:
+    """A persistent, size-bounded LRU cache of search results in SQLite.
+
+    Entries expire after ttl seconds. When more than max_entries are stored,
+    the least recently used are evicted. Concurrent lookups of the same key
+    in this process wait for a single request instead of each making one.
+    """
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, ttl: float = 6 * 3600, max_entries: int = 10000) -> None:
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.collapsed = 0
+        self.evictions = 0
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL NOT NULL, accessed REAL NOT NULL)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed)")
+        self._db_lock = threading.Lock()
+        # key -> event set when the request in flight for that key finishes
+        self._in_flight: Dict[str, threading.Event] = {}
+        self._flight_lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value for a key, or None if it is missing or expired"""
+        now = time.time()
+        with self._db_lock:
+            row = self._conn.execute(
+                "SELECT value FROM results WHERE key = ? AND created >= ?", (key, now - self.ttl)).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE results SET accessed = ? WHERE key = ?", (now, key))
+        return json.loads(row[0])
+
+    def put(self, key: str, value: Any) -> None:
+        """Store a JSON-serializable value, evicting the least recently used entries beyond max_entries"""
+        now = time.time()
+        with self._db_lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO results (key, value, created, accessed) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now, now))
+            excess = self._conn.execute("SELECT COUNT(*) FROM results").fetchone()[0] - self.max_entries
+            if excess > 0:
+                self._conn.execute(
+                    "DELETE FROM results WHERE key IN (SELECT key FROM results ORDER BY accessed LIMIT ?)",
+                    (excess,))
+                self.evictions += excess
+
+    def get_or_compute(self, key: str, compute: Callable[[], Any]) -> Any:
+        """Return the cached value for a key, computing and storing it on a miss.
+
+        If another thread is already computing the same key, wait for it and
+        use its result instead of computing it again.
+        """
+        while True:
+            value = self.get(key)
+            # The counters are shared by the threads of a batch, so they are updated under the lock
+            with self._flight_lock:
+                if value is not None:
+                    self.hits += 1
+                    return value
+                event = self._in_flight.get(key)
+                leader = event is None
+                if leader:
+                    event = self._in_flight[key] = threading.Event()
+                    self.misses += 1
+                    break
+                self.collapsed += 1
+            event.wait()
+            # Look again: the leader stored its result, or failed and we try ourselves
+
+        try:
+            value = compute()
+            self.put(key, value)
+            return value
+        finally:
+            with self._flight_lock:
+                del self._in_flight[key]
+            event.set()
+
+    def clear(self) -> None:
+        """Remove every entry"""
+        with self._db_lock:
+            self._conn.execute("DELETE FROM results")
+
+    def stats(self) -> Dict[str, int]:
+        """Return hit, miss, collapsed request and eviction counts, and the number of entries"""
+        with self._db_lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+        return {"hits": self.hits, "misses": self.misses, "collapsed": self.collapsed,
+                "evictions": self.evictions, "entries": entries}
+
+
+_default_cache: Optional[SearchCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def default_search_cache() -> SearchCache:
+    """Return the cache shared by every CachedSerperDevTool in this process.
+
+    Its path, TTL in seconds and size come from the SEARCH_CACHE_PATH,
+    SEARCH_CACHE_TTL and SEARCH_CACHE_MAX_ENTRIES environment variables.
+    """
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = SearchCache(
+                os.environ.get("SEARCH_CACHE_PATH", DEFAULT_CACHE_PATH),
+                ttl=float(os.environ.get("SEARCH_CACHE_TTL", 6 * 3600)),
+                max_entries=int(os.environ.get("SEARCH_CACHE_MAX_ENTRIES", 10000)),
+            )
+        return _default_cache
+
+
+class SerperSearchSchema(BaseModel):
+    """Input for CachedSerperDevTool, the same as SerperDevTool's."""
+
+    search_query: str = Field(..., description="Mandatory search query you want to use to search the internet")
+
+
+_caching_tool_class: Optional[type] = None
+_caching_tool_class_lock = threading.Lock()
+
+
+def _caching_serper_dev_tool() -> type:
+    """Return a subclass of crewai_tools.SerperDevTool whose Serper API calls go through a SearchCache.
+
+    Defined at the first search: importing crewai_tools imports every tool it ships, and with
+    them embedchain, mem0, qdrant and more, which takes seconds.
+    """
+    global _caching_tool_class
+    with _caching_tool_class_lock:
+        if _caching_tool_class is None:
+            from crewai_tools import SerperDevTool
+
+            class CachingSerperDevTool(SerperDevTool):
+                _cache: Optional[SearchCache] = PrivateAttr(default=None)
+
+                def __init__(self, cache: Optional[SearchCache] = None, **kwargs: Any) -> None:
+                    super().__init__(**kwargs)
+                    self._cache = cache
+
+                def _make_api_request(self, search_query: str, search_type: str) -> dict:
+                    key = json.dumps([self.base_url, search_type.lower(), normalize_query(search_query),
+                                      self.n_results, self.country, self.location, self.locale])
+                    cache = self._cache if self._cache is not None else default_search_cache()
+                    return cache.get_or_compute(key, lambda: super(CachingSerperDevTool, self)._make_api_request(
+                        search_query, search_type))
+
+            _caching_tool_class = CachingSerperDevTool
+        return _caching_tool_class
+
+
+class CachedSerperDevTool(BaseTool):
+    """Searches with crewai_tools' SerperDevTool, serving repeated searches from a SearchCache.
+
+    Keyword arguments are SerperDevTool's options. The SerperDevTool is
+    created, and crewai_tools imported, at the first search. Only the call
+    to the Serper API is cached, keyed on the normalized query and every
+    parameter that changes the response.
+    """
+
+    name: str = "Search the internet with Serper"
+    description: str = (
+        "A tool that can be used to search the internet with a search_query. "
+        "Supports different search types: 'search' (default), 'news'"
+    )
+    args_schema: Type[BaseModel] = SerperSearchSchema
+
+    _cache: Optional[SearchCache] = PrivateAttr(default=None)
+    _options: Dict[str, Any] = PrivateAttr(default_factory=dict)
+    _search_tool: Any = PrivateAttr(default=None)
+
+    def __init__(self, cache: Optional[SearchCache] = None, **kwargs: Any) -> None:
+        super().__init__()
+        self._cache = cache
+        self._options = kwargs
+
+    @property
+    def search_tool(self) -> Any:
+        """The crewai_tools.SerperDevTool making the searches"""
+        if self._search_tool is None:
+            self._search_tool = _caching_serper_dev_tool()(cache=self._cache, **self._options)
+        return self._search_tool
+
+    def _run(self, **kwargs: Any) -> Any:
+        return self.search_tool._run(**kwargs)
@@ -0,0 +1,177 @@
+import argparse
+import json
+import marshal
+import os
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+
+# Opt-in: these change how crewAI, chromadb and litellm behave, so they are set only when
+# CREW_FAST_STARTUP is set, and never over a value the environment already has
+FAST_STARTUP_VARIABLE = "CREW_FAST_STARTUP"
+STARTUP_ENVIRONMENT = {
+    # crewAI's anonymous usage telemetry exports spans over HTTPS from a background thread, and a
+    # short-lived process waits for the export at exit, retrying for seconds when offline.
+    # telemetry.py records the same runs locally. Set it to false to send them again.
+    "CREWAI_DISABLE_TELEMETRY": "true",
+    # The same for chromadb's usage telemetry, which crewAI's memory and knowledge storage start
+    "ANONYMIZED_TELEMETRY": "False",
+    # litellm downloads its model price list when it is imported, waiting up to 5 s for it.
+    # Use the copy it ships with; set it to an empty string to download it again.
+    "LITELLM_LOCAL_MODEL_COST_MAP": "True",
+}
+
+
+def prepare_environment() -> None:
+    """Apply STARTUP_ENVIRONMENT if CREW_FAST_STARTUP is set to anything but 0, false or no.
+
+    Must run before crewai is imported, which reads it at import time. It runs too early to see
+    a .env file, so set CREW_FAST_STARTUP in the shell.
+    """
+    if os.environ.get(FAST_STARTUP_VARIABLE, "").strip().lower() in ("", "0", "false", "no"):
+        return
+    for name, value in STARTUP_ENVIRONMENT.items():
+        os.environ.setdefault(name, value)
+
+
+# Parsed configs by path, as marshal bytes so every load returns a fresh copy for crewAI to modify
+_parsed: Dict[Tuple[str, int, int], bytes] = {}
+
+
+def _cache_path(config_path: str) -> str:
+    # Next to the YAML file like Python's bytecode cache, and per interpreter, as the marshal format varies
+    directory, name = os.path.split(config_path)
+    return os.path.join(directory, "__pycache__", f"{name}.{sys.implementation.cache_tag}.marshal")
+
+
+def load_yaml(config_path: Any) -> Any:
+    """Load a YAML config, from a cache of its parsed contents when the file has not changed since.
+
+    The cache is kept in memory and in a marshal file under __pycache__ next
+    to the config, keyed on the file's modification time and size. A cache
+    that cannot be written, e.g. in a read-only install, is skipped. YAML
+    holding values marshal cannot, such as dates, is parsed on every load.
+    """
+    config_path = str(config_path)
+    stat = os.stat(config_path)
+    key = (os.path.abspath(config_path), stat.st_mtime_ns, stat.st_size)
+    if key in _parsed:
+        return marshal.loads(_parsed[key])
+
+    cache_path = _cache_path(config_path)
+    try:
+        with open(cache_path, "rb") as f:
+            mtime_ns, size, data = marshal.load(f)
+        if (mtime_ns, size) == key[1:]:
+            _parsed[key] = marshal.dumps(data)
+            return data
+    except (OSError, EOFError, ValueError, TypeError):
+        pass
+
+    import yaml
+
+    with open(config_path, "r", encoding="utf-8") as f:
+        data = yaml.safe_load(f)
+    try:
+        _parsed[key] = marshal.dumps(data)
+    except ValueError:
+        return data
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        # Written under a temporary name and renamed, so a concurrent run never reads half a file
+        temporary = f"{cache_path}.{os.getpid()}"
+        with open(temporary, "wb") as f:
+            marshal.dump((stat.st_mtime_ns, stat.st_size, data), f)
+        os.replace(temporary, cache_path)
+    except OSError:
+        pass
+    return data
+
+
+def cached_config(cls):
+    """Class decorator, applied on top of @CrewBase, that loads agents.yaml and tasks.yaml through load_yaml"""
+    cls.load_yaml = staticmethod(load_yaml)
+    return cls
+
+
+def startup_profile_requested(argv: Optional[List[str]] = None) -> bool:
+    """Return whether a --startup-profile flag was given, ignoring unrelated arguments"""
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument("--startup-profile", action="store_true")
+    args, _ = parser.parse_known_args(sys.argv[1:] if argv is None else argv)
+    return args.startup_profile
+
+
+_PROFILE_SCRIPT = """
+import json, time
+start = time.perf_counter()
+import {module}
+imported = time.perf_counter()
+{build}
+built = time.perf_counter()
+print(json.dumps({{"import": imported - start, "build": built - imported}}))
+"""
+
+
+def parse_importtime(output: str) -> List[Tuple[str, int, int, int]]:
+    """Parse the output of python -X importtime into (module, depth, self us, cumulative us), in import order"""
+    imports = []
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        head, cumulative, name = line.split("|", 2)
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        imports.append((name.strip(), depth, int(head.split(":")[1]), int(cumulative)))
+    return imports
+
+
+def profile_startup(module: str, build: str, threshold: float = 0.02, top: int = 12) -> str:
+    """Start the crew in a fresh interpreter under -X importtime and describe where the time went.
+
+    Args:
+        module: Module to import, e.g. the package's main
+        build: Statement run after the import, typically building the crew
+        threshold: Imports taking less than this share of the total are left out of the tree
+        top: Number of top-level packages listed
+
+    Returns:
+        Phase timings, import time per top-level package and the tree of the slowest imports
+    """
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c",
+                             _PROFILE_SCRIPT.format(module=module, build=build)],
+                            capture_output=True, text=True)
+    total = time.perf_counter() - start
+    if result.returncode != 0:
+        return f"Startup profile failed:\n{result.stderr[-2000:]}"
+    phases = json.loads(result.stdout.strip().splitlines()[-1])
+    imports = parse_importtime(result.stderr)
+
+    lines = [f"Startup of {module} in a fresh interpreter",
+             f"  {'imports':<28} {phases['import']:>7.2f}s",
+             f"  {'config and crew build':<28} {phases['build']:>7.2f}s",
+             f"  {'interpreter start and exit':<28} {total - phases['import'] - phases['build']:>7.2f}s",
+             f"  {'total':<28} {total:>7.2f}s",
+             ""]
+
+    packages: Dict[str, int] = defaultdict(int)
+    for name, _, self_us, _ in imports:
+        packages[name.split(".")[0]] += self_us
+    import_us = sum(packages.values()) or 1
+    lines.append("Import time by top-level package (self time):")
+    for name, self_us in sorted(packages.items(), key=lambda item: -item[1])[:top]:
+        lines.append(f"  {name:<28} {self_us / 1e6:>7.2f}s {100 * self_us / import_us:>5.1f}%")
+    lines.append("")
+
+    # Same layout as -X importtime, without the imports below the threshold
+    lines.append(f"Imports over {threshold:.0%} of the import time (cumulative | self):")
+    for name, depth, self_us, cumulative in imports:
+        if cumulative >= threshold * import_us:
+            lines.append(f"  {cumulative / 1e6:>6.2f}s | {self_us / 1e6:>6.2f}s | {'  ' * depth}{name}")
+    lines.append("")
+    lines.append("Environment: " + ", ".join(f"{name}={os.environ.get(name, '')!r}"
+                                             for name in [FAST_STARTUP_VARIABLE, *STARTUP_ENVIRONMENT]))
+    return "\n".join(lines)
@@ -0,0 +1,413 @@
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from crewai.utilities.events import (
+    AgentExecutionCompletedEvent,
+    AgentExecutionErrorEvent,
+    AgentExecutionStartedEvent,
+    CrewKickoffCompletedEvent,
+    CrewKickoffFailedEvent,
+    CrewKickoffStartedEvent,
+    LLMCallCompletedEvent,
+    LLMCallFailedEvent,
+    LLMCallStartedEvent,
+    TaskCompletedEvent,
+    TaskFailedEvent,
+    TaskStartedEvent,
+    ToolSelectionErrorEvent,
+    ToolUsageErrorEvent,
+    ToolUsageFinishedEvent,
+    ToolUsageStartedEvent,
+    ToolValidateInputErrorEvent,
+)
+from crewai.utilities.events.base_event_listener import BaseEventListener
+
+DEFAULT_TELEMETRY_DIR = "./output/telemetry/"
+
+# Label for crews left with crewAI's default name, when no other is given
+DEFAULT_CREW_NAME = "crew"
+
+# Metric name -> (type, help) for the Prometheus file
+METRICS = {
+    "crewai_kickoffs_total": ("counter", "Crew kickoffs by outcome"),
+    "crewai_kickoff_seconds_total": ("counter", "Wall time spent in crew kickoffs"),
+    "crewai_task_runs_total": ("counter", "Task executions by outcome"),
+    "crewai_task_seconds_total": ("counter", "Wall time spent executing tasks"),
+    "crewai_agent_seconds_total": ("counter", "Wall time agents spent executing tasks, delegated work included"),
+    "crewai_llm_calls_total": ("counter", "LLM calls by outcome"),
+    "crewai_llm_seconds_total": ("counter", "Time spent waiting for LLM calls"),
+    "crewai_llm_tokens_total": ("counter", "LLM tokens by type"),
+    "crewai_tool_calls_total": ("counter", "Tool calls by outcome"),
+    "crewai_tool_seconds_total": ("counter", "Time spent in tool calls"),
+    "crewai_retries_total": ("counter", "Failed LLM calls, tool errors and guardrail retries, which crewAI retries"),
+}
+
+# (kind, name) totals shown per kickoff
+_COLUMNS = ("calls", "wall_s", "llm_s", "tool_s", "prompt_tokens", "completion_tokens", "retries")
+
+
+def _seconds(started: Any, finished: Any) -> float:
+    if isinstance(started, datetime) and isinstance(finished, datetime):
+        return max((finished - started).total_seconds(), 0.0)
+    return max(float(finished) - float(started), 0.0)
+
+
+def _tokens(agent: Any) -> Tuple[int, int]:
+    # crewAI counts each agent's usage in a TokenProcess fed by litellm's response
+    process = getattr(agent, "_token_process", None)
+    return (process.prompt_tokens, process.completion_tokens) if process else (0, 0)
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", " ").replace('"', '\\"')
+
+
+class _Span:
+    """Timings and counts of one task or agent execution, as they accumulate"""
+
+    def __init__(self, kind: str, run: Optional["_Run"], task: str, agent: str, agent_obj: Any = None) -> None:
+        self.kind = kind
+        self.run = run
+        self.task = task
+        self.agent = agent
+        self.agent_obj = agent_obj
+        self.start = time.perf_counter()
+        self.llm_s = self.tool_s = 0.0
+        self.llm_calls = self.tool_calls = 0
+        self.prompt_tokens = self.completion_tokens = 0
+        self.retries = 0
+
+    def record(self, **extra: Any) -> Dict[str, Any]:
+        return {"kind": self.kind, "task": self.task, "agent": self.agent,
+                "wall_s": round(time.perf_counter() - self.start, 4), "llm_s": round(self.llm_s, 4),
+                "llm_calls": self.llm_calls, "tool_s": round(self.tool_s, 4), "tool_calls": self.tool_calls,
+                "prompt_tokens": self.prompt_tokens, "completion_tokens": self.completion_tokens,
+                "retries": self.retries, **extra}
+
+
+class _Run:
+    """One crew kickoff and the records made during it"""
+
+    def __init__(self, crew: str, number: int) -> None:
+        self.crew = crew
+        self.number = number
+        self.start = time.perf_counter()
+        self.records: List[Dict[str, Any]] = []
+
+
+class TelemetryListener(BaseEventListener):
+    """Records the wall, LLM and tool time, tokens and retries of every task, agent and tool call.
+
+    Each finished LLM call, tool call, agent execution, task and kickoff is
+    appended to trace.jsonl. When a kickoff ends, the totals since the
+    process started are written to metrics.prom in Prometheus text format
+    (for node_exporter's textfile collector) and a summary of that kickoff
+    is printed.
+
+    crewAI emits events in the thread doing the work, so the task and agent
+    a call belongs to are the ones open in the same thread. Tokens are not
+    carried by the LLM events; a call's tokens are the growth of its agent's
+    token counter between the call's start and completion.
+    """
+
+    def __init__(self, directory: str = DEFAULT_TELEMETRY_DIR, summary: bool = True,
+                 crew_name: str = DEFAULT_CREW_NAME) -> None:
+        self.directory = directory
+        self.summary = summary
+        self.crew_name = crew_name
+        os.makedirs(directory, exist_ok=True)
+        self.trace_path = os.path.join(directory, "trace.jsonl")
+        self.metrics_path = os.path.join(directory, "metrics.prom")
+        self.metrics: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], float] = defaultdict(float)
+        self._runs: Dict[int, _Run] = {}
+        self._run_numbers = 0
+        self._tasks: Dict[int, _Span] = {}
+        self._local = threading.local()
+        self._lock = threading.RLock()
+        super().__init__()
+
+    # Thread-local state: the task running in this thread, the agent executions open in it
+    # (a manager's delegation nests one inside another) and the LLM call in flight
+
+    def _stack(self) -> List[_Span]:
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+        return self._local.stack
+
+    def _open_spans(self) -> List[_Span]:
+        spans = self._stack()[-1:]
+        task = getattr(self._local, "task", None)
+        return spans + [task] if task is not None else spans
+
+    def _find_run(self, crew: Any) -> Optional[_Run]:
+        with self._lock:
+            if crew is not None and id(crew) in self._runs:
+                return self._runs[id(crew)]
+            # An agent outside any crew's list, e.g. a one-off converter: only unambiguous with one kickoff open
+            return next(iter(self._runs.values())) if len(self._runs) == 1 else None
+
+    def _add(self, name: str, value: float, **labels: Any) -> None:
+        self.metrics[(name, tuple(sorted((key, str(label)) for key, label in labels.items())))] += value
+
+    def _emit(self, run: Optional[_Run], record: Dict[str, Any]) -> None:
+        record = {"time": datetime.now().isoformat(), "crew": run.crew if run else None,
+                  "run": run.number if run else None, "pid": os.getpid(), **record}
+        with self._lock:
+            if run is not None:
+                run.records.append(record)
+            with open(self.trace_path, "a") as f:
+                f.write(json.dumps(record, default=str) + "\n")
+
+    def setup_listeners(self, crewai_event_bus):
+        @crewai_event_bus.on(CrewKickoffStartedEvent)
+        def on_kickoff_started(source, event):
+            with self._lock:
+                self._run_numbers += 1
+                name = event.crew_name if event.crew_name not in (None, "crew") else self.crew_name
+                self._runs[id(source)] = _Run(name, self._run_numbers)
+
+        @crewai_event_bus.on(CrewKickoffCompletedEvent)
+        def on_kickoff_completed(source, event):
+            self._finish_run(source, "ok")
+
+        @crewai_event_bus.on(CrewKickoffFailedEvent)
+        def on_kickoff_failed(source, event):
+            self._finish_run(source, "error", event.error)
+
+        @crewai_event_bus.on(TaskStartedEvent)
+        def on_task_started(source, event):
+            task = event.task or source
+            agent = getattr(task, "agent", None)
+            span = _Span("task", self._find_run(getattr(agent, "crew", None)), task.name or "task",
+                         (agent.role if agent else "").strip())
+            with self._lock:
+                self._tasks[id(task)] = span
+            self._local.task = span
+
+        @crewai_event_bus.on(TaskCompletedEvent)
+        def on_task_completed(source, event):
+            self._finish_task(event.task or source, "ok")
+
+        @crewai_event_bus.on(TaskFailedEvent)
+        def on_task_failed(source, event):
+            self._finish_task(event.task or source, "error", event.error)
+
+        @crewai_event_bus.on(AgentExecutionStartedEvent)
+        def on_agent_started(source, event):
+            task = getattr(self._local, "task", None)
+            self._stack().append(_Span("agent", self._find_run(getattr(event.agent, "crew", None)),
+                                       task.task if task else getattr(event.task, "name", None) or "",
+                                       event.agent.role.strip(), event.agent))
+
+        @crewai_event_bus.on(AgentExecutionCompletedEvent)
+        def on_agent_completed(source, event):
+            self._finish_agent("ok")
+
+        @crewai_event_bus.on(AgentExecutionErrorEvent)
+        def on_agent_error(source, event):
+            self._finish_agent("error", event.error)
+
+        @crewai_event_bus.on(LLMCallStartedEvent)
+        def on_llm_started(source, event):
+            spans = self._stack()
+            self._local.llm = (time.perf_counter(), _tokens(spans[-1].agent_obj) if spans else (0, 0))
+
+        @crewai_event_bus.on(LLMCallCompletedEvent)
+        def on_llm_completed(source, event):
+            self._finish_llm(event, "ok")
+
+        @crewai_event_bus.on(LLMCallFailedEvent)
+        def on_llm_failed(source, event):
+            self._finish_llm(event, "error", event.error)
+
+        @crewai_event_bus.on(ToolUsageFinishedEvent)
+        def on_tool_finished(source, event):
+            self._finish_tool(event, "ok", _seconds(event.started_at, event.finished_at), event.from_cache)
+
+        @crewai_event_bus.on(ToolUsageStartedEvent)
+        def on_tool_started(source, event):
+            self._local.tool = time.perf_counter()
+
+        @crewai_event_bus.on(ToolUsageErrorEvent)
+        @crewai_event_bus.on(ToolValidateInputErrorEvent)
+        @crewai_event_bus.on(ToolSelectionErrorEvent)
+        def on_tool_error(source, event):
+            started = getattr(self._local, "tool", None)
+            self._local.tool = None
+            seconds = time.perf_counter() - started if started is not None else 0.0
+            self._finish_tool(event, "error", seconds, False, str(event.error))
+
+    def _finish_llm(self, event, status: str, error: Optional[str] = None) -> None:
+        started, tokens_before = getattr(self._local, "llm", None) or (time.perf_counter(), (0, 0))
+        self._local.llm = None
+        seconds = time.perf_counter() - started
+        spans = self._stack()
+        agent = spans[-1] if spans else None
+        prompt, completion = (0, 0)
+        if agent is not None:
+            prompt, completion = (after - before for after, before in zip(_tokens(agent.agent_obj), tokens_before))
+        role = agent.agent if agent else (event.agent_role or "").strip()
+        run = agent.run if agent else self._find_run(None)
+        for span in self._open_spans():
+            span.llm_s += seconds
+            span.llm_calls += 1
+            span.prompt_tokens += prompt
+            span.completion_tokens += completion
+            span.retries += status != "ok"
+        crew = run.crew if run else ""
+        with self._lock:
+            self._add("crewai_llm_calls_total", 1, crew=crew, agent=role, status=status)
+            self._add("crewai_llm_seconds_total", seconds, crew=crew, agent=role)
+            self._add("crewai_llm_tokens_total", prompt, crew=crew, agent=role, type="prompt")
+            self._add("crewai_llm_tokens_total", completion, crew=crew, agent=role, type="completion")
+            if status != "ok":
+                self._add("crewai_retries_total", 1, crew=crew, kind="llm")
+        self._emit(run, {"kind": "llm", "task": event.task_name or (agent.task if agent else None), "agent": role,
+                         "seconds": round(seconds, 4), "prompt_tokens": prompt, "completion_tokens": completion,
+                         "status": status, "error": error})
+
+    def _finish_tool(self, event, status: str, seconds: float, from_cache: bool, error: Optional[str] = None) -> None:
+        spans = self._stack()
+        agent = spans[-1] if spans else None
+        run = agent.run if agent else self._find_run(getattr(event.agent, "crew", None))
+        for span in self._open_spans():
+            span.tool_s += seconds
+            span.tool_calls += 1
+            span.retries += status != "ok"
+        crew = run.crew if run else ""
+        with self._lock:
+            self._add("crewai_tool_calls_total", 1, crew=crew, tool=event.tool_name,
+                      status="cached" if from_cache else status)
+            self._add("crewai_tool_seconds_total", seconds, crew=crew, tool=event.tool_name)
+            if status != "ok":
+                self._add("crewai_retries_total", 1, crew=crew, kind="tool")
+        self._emit(run, {"kind": "tool", "tool": event.tool_name, "task": agent.task if agent else None,
+                         "agent": (event.agent_role or "").strip(), "seconds": round(seconds, 4),
+                         "from_cache": from_cache, "attempts": event.run_attempts, "status": status,
+                         "error": error})
+
+    def _finish_agent(self, status: str, error: Optional[str] = None) -> None:
+        spans = self._stack()
+        if not spans:
+            return
+        span = spans.pop()
+        record = span.record(status=status, error=error)
+        with self._lock:
+            self._add("crewai_agent_seconds_total", record["wall_s"], crew=span.run.crew if span.run else "",
+                      agent=span.agent)
+        self._emit(span.run, record)
+
+    def _finish_task(self, task: Any, status: str, error: Optional[str] = None) -> None:
+        with self._lock:
+            span = self._tasks.pop(id(task), None)
+        if span is None:
+            return
+        if getattr(self._local, "task", None) is span:
+            self._local.task = None
+        # Guardrail retries re-run the agent inside the same task execution
+        guardrail_retries = getattr(task, "retry_count", 0) or 0
+        span.retries += guardrail_retries
+        record = span.record(status=status, error=error)
+        crew = span.run.crew if span.run else ""
+        with self._lock:
+            self._add("crewai_task_runs_total", 1, crew=crew, task=span.task, agent=span.agent, status=status)
+            self._add("crewai_task_seconds_total", record["wall_s"], crew=crew, task=span.task, agent=span.agent)
+            if guardrail_retries:
+                self._add("crewai_retries_total", guardrail_retries, crew=crew, kind="guardrail")
+        self._emit(span.run, record)
+
+    def _finish_run(self, crew: Any, status: str, error: Optional[str] = None) -> None:
+        with self._lock:
+            run = self._runs.pop(id(crew), None)
+        if run is None:
+            return
+        seconds = time.perf_counter() - run.start
+        with self._lock:
+            self._add("crewai_kickoffs_total", 1, crew=run.crew, status=status)
+            self._add("crewai_kickoff_seconds_total", seconds, crew=run.crew)
+        self._emit(run, {"kind": "crew", "wall_s": round(seconds, 4), "status": status, "error": error})
+        self.write_metrics()
+        if self.summary:
+            print(summary_table(run.records))
+
+    def write_metrics(self) -> None:
+        """Write every metric to metrics.prom, replacing it in one step so a scrape never sees half a file"""
+        lines = []
+        with self._lock:
+            metrics = sorted(self.metrics.items())
+        for name, (kind, description) in METRICS.items():
+            samples = [(labels, value) for (metric, labels), value in metrics if metric == name]
+            if not samples:
+                continue
+            lines.append(f"# HELP {name} {description}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                rendered = ",".join(f'{key}="{_escape(label)}"' for key, label in labels)
+                lines.append(f"{name}{{{rendered}}} {value:g}")
+        temporary = f"{self.metrics_path}.{os.getpid()}.tmp"
+        with open(temporary, "w") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(temporary, self.metrics_path)
+
+
+def summary_table(records: List[Dict[str, Any]]) -> str:
+    """Format the records of one kickoff as totals per task, agent and tool"""
+    crew = next((record for record in records if record["kind"] == "crew"), None)
+    rows: Dict[Tuple[str, str], Dict[str, float]] = defaultdict(lambda: dict.fromkeys(_COLUMNS, 0))
+    for record in records:
+        if record["kind"] in ("task", "agent"):
+            row = rows[(record["kind"], record["task"] if record["kind"] == "task" else record["agent"])]
+            row["calls"] += 1
+            for column in _COLUMNS[1:]:
+                row[column] += record[column]
+        elif record["kind"] == "tool":
+            row = rows[("tool", record["tool"])]
+            row["calls"] += 1
+            row["wall_s"] += record["seconds"]
+            row["tool_s"] += record["seconds"]
+            row["retries"] += record["status"] != "ok"
+
+    llm = [record for record in records if record["kind"] == "llm"]
+    header = (f"Telemetry for {crew['crew'] if crew else 'crew'} run {crew['run'] if crew else '?'}: "
+              f"{crew['wall_s'] if crew else 0:.2f}s wall, {len(llm)} LLM calls taking "
+              f"{sum(record['seconds'] for record in llm):.2f}s, "
+              f"{sum(record['prompt_tokens'] for record in llm):,} prompt + "
+              f"{sum(record['completion_tokens'] for record in llm):,} completion tokens")
+    lines = [header, f"{'kind':<6} {'name':<36} {'calls':>5} {'wall_s':>8} {'llm_s':>8} {'tool_s':>8} "
+                     f"{'prompt_tok':>10} {'compl_tok':>10} {'retries':>7}"]
+    for kind in ("task", "agent", "tool"):
+        for (row_kind, name), row in sorted(rows.items(), key=lambda item: -item[1]["wall_s"]):
+            if row_kind == kind:
+                lines.append(f"{kind:<6} {str(name)[:36]:<36} {row['calls']:>5} {row['wall_s']:>8.2f} "
+                             f"{row['llm_s']:>8.2f} {row['tool_s']:>8.2f} {int(row['prompt_tokens']):>10,} "
+                             f"{int(row['completion_tokens']):>10,} {int(row['retries']):>7}")
+    return "\n".join(lines)
+
+
+_installed: Optional[TelemetryListener] = None
+
+
+def install_telemetry(directory: Optional[str] = None, summary: bool = True,
+                      crew_name: str = DEFAULT_CREW_NAME) -> Optional[TelemetryListener]:
+    """Start recording telemetry for every crew kickoff in this process.
+
+    Args:
+        directory: Where trace.jsonl and metrics.prom are written, TELEMETRY_DIR or ./output/telemetry/ by default
+        summary: Print a summary table after every kickoff
+        crew_name: Label for crews left with crewAI's default name, typically the project's package
+
+    Returns:
+        The listener, or None when TELEMETRY is set to off
+    """
+    global _installed
+    if os.environ.get("TELEMETRY", "on").lower() in ("off", "0", "false"):
+        return None
+    if _installed is None:
+        _installed = TelemetryListener(directory or os.environ.get("TELEMETRY_DIR", DEFAULT_TELEMETRY_DIR), summary,
+                                       crew_name)
+    return _installed
@@ -0,0 +1,87 @@
+import json
+import os
+import tempfile
+import unittest
+
+
+def kickoff_in_worker(inputs):
+    """Module level, so a worker process can run it."""
+    return f"{inputs['sector']} in {os.getpid()}"
+
+
+class TestBatch(unittest.TestCase):
+    """Tests for the checkpointing batch runner."""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.output = os.path.join(self.directory.name, "out", "results.jsonl")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def records(self):
+        with open(self.output) as f:
+            return [json.loads(line) for line in f]
+
+    def test_resumes_from_the_checkpoint(self):
+        """Test that a rerun skips items recorded as ok and retries failed ones."""
+        from crew_common.batch import completed_ids, item_id, run_batch
+        items = [{"id": "a", "sector": "Technology"}, {"sector": "Energy"}, {"id": "c", "sector": "Fail"}]
+        seen = []
+
+        def kickoff(inputs):
+            seen.append(inputs)
+            if inputs["sector"] == "Fail":
+                raise RuntimeError("crew failed")
+            return inputs["sector"].upper()
+
+        summary = run_batch(kickoff, items, self.output, workers=2, defaults={"current_date": "2026-01-01"})
+        self.assertEqual((summary["run"], summary["failed"], summary["skipped"]), (3, 1, 0))
+        self.assertIn({"current_date": "2026-01-01", "sector": "Technology"}, seen)
+        records = {record["id"]: record for record in self.records()}
+        self.assertEqual(set(records), {"a", item_id({"sector": "Energy"}), "c"})
+        self.assertEqual(records["a"]["result"], "TECHNOLOGY")
+        self.assertEqual((records["c"]["status"], records["c"]["error"]), ("error", "RuntimeError: crew failed"))
+
+        # A run killed while writing leaves a partial last line
+        with open(self.output, "a") as f:
+            f.write('{"id": "c", "status": "o')
+        self.assertEqual(completed_ids(self.output), {"a", item_id({"sector": "Energy"})})
+
+        seen.clear()
+        items[2]["sector"] = "Utilities"
+        summary = run_batch(kickoff, items, self.output, workers=2)
+        self.assertEqual((summary["run"], summary["failed"], summary["skipped"]), (1, 0, 2))
+        self.assertEqual(seen, [{"sector": "Utilities"}])
+        self.assertEqual(completed_ids(self.output), {"a", item_id({"sector": "Energy"}), "c"})
+        self.assertEqual(run_batch(kickoff, items, self.output)["run"], 0)
+
+    def test_items_and_command_line(self):
+        """Test reading JSONL and CSV items and running them from the command line in worker processes."""
+        from crew_common.batch import batch_main, item_id, read_items
+        self.assertEqual(item_id({"id": 7, "sector": "x"}), "7")
+        self.assertEqual(item_id({"b": 1, "a": 2}), item_id({"a": 2, "b": 1}))
+        self.assertNotEqual(item_id({"a": 1}), item_id({"a": 2}))
+
+        jsonl = os.path.join(self.directory.name, "items.jsonl")
+        with open(jsonl, "w") as f:
+            f.write('{"sector": "Energy"}\n\n[1, 2]\n')
+        with self.assertRaises(ValueError):
+            list(read_items(jsonl))
+
+        csv_path = os.path.join(self.directory.name, "items.csv")
+        with open(csv_path, "w") as f:
+            f.write("id,sector\nh1,Healthcare\nf1,Finance\n")
+        self.assertEqual(list(read_items(csv_path)), [{"id": "h1", "sector": "Healthcare"},
+                                                     {"id": "f1", "sector": "Finance"}])
+
+        summary = batch_main(kickoff_in_worker, processes=True,
+                             argv=[csv_path, "--output", self.output, "--workers", "2", "--llm-cache", "replay"])
+        self.assertEqual((summary["run"], summary["failed"]), (2, 0))
+        results = {record["id"]: record["result"] for record in self.records()}
+        self.assertTrue(results["h1"].startswith("Healthcare in "))
+        self.assertNotEqual(results["h1"].split()[-1], str(os.getpid()))
+
+
+if __name__ == '__main__':
+    unittest.main()
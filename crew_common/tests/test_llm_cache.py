@@ -0,0 +1,104 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+
+MESSAGES = [{"role": "system", "content": "You pick stocks."}, {"role": "user", "content": "Pick one."}]
+
+
+class TestLLMCache(unittest.TestCase):
+    """Tests for recording and replaying LLM completions."""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.calls = []
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def model(self, **params):
+        """Stands in for litellm.completion, answering with the number of calls so far."""
+        import litellm
+        self.calls.append(params)
+        return litellm.ModelResponse(model=params["model"], choices=[
+            {"message": {"role": "assistant", "content": f"answer {len(self.calls)}"}}])
+
+    def cache(self, mode):
+        from crew_common.llm_cache import LLMCache
+        return LLMCache(self.directory.name, mode)
+
+    def test_key(self):
+        """Test that calls are keyed on model, messages and tools only."""
+        from crew_common.llm_cache import LLMCache
+        key = LLMCache.key({"model": "gpt-4o-mini", "messages": MESSAGES})
+        self.assertEqual(key, LLMCache.key({"messages": MESSAGES, "model": "gpt-4o-mini", "temperature": 0.2}))
+        self.assertNotEqual(key, LLMCache.key({"model": "gpt-4o", "messages": MESSAGES}))
+        self.assertNotEqual(key, LLMCache.key({"model": "gpt-4o-mini", "messages": MESSAGES[:1]}))
+        self.assertNotEqual(key, LLMCache.key({"model": "gpt-4o-mini", "messages": MESSAGES,
+                                               "tools": [{"type": "function", "function": {"name": "search"}}]}))
+
+    def test_record_then_replay(self):
+        """Test that a recorded completion is replayed without calling the model, and a new call fails."""
+        from crew_common.llm_cache import LLMCache, ReplayMissError
+        recorder = self.cache("record")
+        recorded = recorder.completion(self.model, model="gpt-4o-mini", messages=MESSAGES)
+        recorder.completion(self.model, model="gpt-4o-mini", messages=MESSAGES)
+        self.assertEqual(len(self.calls), 2)
+        self.assertEqual(recorder.stats(), {"hits": 0, "misses": 2, "recorded": 2})
+        key = LLMCache.key({"model": "gpt-4o-mini", "messages": MESSAGES})
+        self.assertTrue(os.path.exists(os.path.join(self.directory.name, key[:2], f"{key}.json")))
+
+        replayer = self.cache("replay")
+        replayed = replayer.completion(self.model, model="gpt-4o-mini", messages=MESSAGES, temperature=0.7)
+        self.assertEqual(len(self.calls), 2)
+        self.assertEqual(replayed.choices[0].message.content, "answer 2")
+        self.assertEqual(recorded.choices[0].message.content, "answer 1")
+        with self.assertRaises(ReplayMissError):
+            replayer.completion(self.model, model="gpt-4o-mini", messages=MESSAGES[:1])
+        with self.assertRaises(ReplayMissError):
+            replayer.completion(self.model, model="gpt-4o-mini", messages=MESSAGES, stream=True)
+        self.assertEqual(replayer.stats(), {"hits": 1, "misses": 0, "recorded": 0})
+
+    def test_auto_and_off(self):
+        """Test that auto records misses and serves hits, and off always calls the model."""
+        auto = self.cache("auto")
+        first = auto.completion(self.model, model="gpt-4o-mini", messages=MESSAGES)
+        second = auto.completion(self.model, model="gpt-4o-mini", messages=MESSAGES)
+        self.assertEqual(len(self.calls), 1)
+        self.assertEqual(second.choices[0].message.content, first.choices[0].message.content)
+        self.assertEqual(auto.stats(), {"hits": 1, "misses": 1, "recorded": 1})
+
+        off = self.cache("off")
+        off.completion(self.model, model="gpt-4o-mini", messages=MESSAGES)
+        self.assertEqual(len(self.calls), 2)
+        self.assertEqual(off.stats(), {"hits": 0, "misses": 0, "recorded": 0})
+        with self.assertRaises(ValueError):
+            self.cache("sometimes")
+
+    def test_install_and_mode(self):
+        """Test that install_llm_cache routes litellm.completion through the cache."""
+        import litellm
+        from crew_common import llm_cache
+        self.addCleanup(setattr, litellm, "completion", litellm.completion)
+        self.addCleanup(setattr, llm_cache, "_installed", llm_cache._installed)
+        llm_cache._installed = None
+        litellm.completion = self.model
+
+        self.assertIsNone(llm_cache.install_llm_cache("off"))
+        self.assertEqual(litellm.completion, self.model)
+        cache = llm_cache.install_llm_cache("auto", self.directory.name)
+        litellm.completion(model="gpt-4o-mini", messages=MESSAGES)
+        litellm.completion(model="gpt-4o-mini", messages=MESSAGES)
+        self.assertEqual((len(self.calls), cache.stats()["hits"]), (1, 1))
+        self.assertIs(llm_cache.install_llm_cache("replay", self.directory.name), cache)
+        self.assertEqual(cache.mode, "replay")
+
+        self.assertEqual(llm_cache.llm_cache_mode(["input.jsonl", "--llm-cache", "record", "--workers", "2"]),
+                         "record")
+        with mock.patch.dict(os.environ, {"LLM_CACHE_MODE": "replay"}):
+            self.assertEqual(llm_cache.llm_cache_mode([]), "replay")
+
+
+if __name__ == '__main__':
+    unittest.main()
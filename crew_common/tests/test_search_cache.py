@@ -0,0 +1,165 @@
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+
+class TestSearchCache(unittest.TestCase):
+    """Tests for the persistent search result cache."""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "search_cache.db")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def cache(self, **kwargs):
+        from crew_common.search_cache import SearchCache
+        cache = SearchCache(self.path, **kwargs)
+        self.addCleanup(cache._conn.close)
+        return cache
+
+    def test_entries_expire_after_ttl(self):
+        """Test that entries are served until they are ttl seconds old, from any instance."""
+        cache = self.cache(ttl=60)
+        cache.put("query", {"organic": [1, 2]})
+        self.assertEqual(cache.get("query"), {"organic": [1, 2]})
+        self.assertEqual(self.cache(ttl=60).get("query"), {"organic": [1, 2]})
+        with mock.patch("time.time", return_value=time.time() + 61):
+            self.assertIsNone(cache.get("query"))
+            self.assertEqual(self.cache(ttl=120).get("query"), {"organic": [1, 2]})
+
+    def test_least_recently_used_are_evicted(self):
+        """Test that entries beyond max_entries are evicted in order of last use."""
+        cache = self.cache(max_entries=3)
+        now = time.time()
+        for offset, key in enumerate(["a", "b", "c"]):
+            with mock.patch("time.time", return_value=now + offset):
+                cache.put(key, key)
+        with mock.patch("time.time", return_value=now + 3):
+            self.assertEqual(cache.get("a"), "a")
+        with mock.patch("time.time", return_value=now + 4):
+            cache.put("d", "d")
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual([cache.get(key) for key in ["a", "c", "d"]], ["a", "c", "d"])
+        self.assertEqual(cache.stats()["evictions"], 1)
+        self.assertEqual(cache.stats()["entries"], 3)
+
+    def test_concurrent_misses_compute_once(self):
+        """Test that threads missing the same key wait for a single computation."""
+        cache = self.cache()
+        calls = []
+        waiters = 7
+
+        def compute():
+            calls.append(1)
+            # Stay in flight until every other thread is waiting on this computation
+            deadline = time.monotonic() + 10
+            while cache.collapsed < waiters and time.monotonic() < deadline:
+                time.sleep(0.01)
+            return "result"
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(cache.get_or_compute("key", compute)))
+                   for _ in range(waiters + 1)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, ["result"] * (waiters + 1))
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(cache.stats(), {"hits": waiters, "misses": 1, "collapsed": waiters,
+                                         "evictions": 0, "entries": 1})
+
+    def test_errors_are_not_cached(self):
+        """Test that a failed computation stores nothing and a waiting thread computes again."""
+        cache = self.cache()
+        started = threading.Event()
+        release = threading.Event()
+
+        def fail():
+            started.set()
+            release.wait(10)
+            raise RuntimeError("search failed")
+
+        errors = []
+
+        def leader():
+            try:
+                cache.get_or_compute("key", fail)
+            except RuntimeError as e:
+                errors.append(e)
+
+        thread = threading.Thread(target=leader)
+        thread.start()
+        started.wait(10)
+        results = []
+        waiter = threading.Thread(target=lambda: results.append(cache.get_or_compute("key", lambda: "retried")))
+        waiter.start()
+        deadline = time.monotonic() + 10
+        while cache.collapsed < 1 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        release.set()
+        thread.join()
+        waiter.join()
+        self.assertEqual(len(errors), 1)
+        self.assertEqual(results, ["retried"])
+        self.assertEqual(cache.stats()["misses"], 2)
+
+        release.set()
+        with self.assertRaises(RuntimeError):
+            cache.get_or_compute("other", fail)
+        self.assertIsNone(cache.get("other"))
+        self.assertEqual(cache.get_or_compute("other", lambda: "ok"), "ok")
+
+    def test_counters_with_many_threads(self):
+        """Test that every lookup from concurrent threads is counted once, as a hit or a miss."""
+        cache = self.cache()
+        threads, lookups = 8, 200
+
+        def search():
+            for index in range(lookups):
+                cache.get_or_compute(f"query {index % 20}", lambda: "result")
+
+        workers = [threading.Thread(target=search) for _ in range(threads)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        stats = cache.stats()
+        self.assertEqual(stats["hits"] + stats["misses"], threads * lookups)
+        self.assertEqual(stats["misses"], 20)
+
+    def test_tool_shares_entries_across_query_spellings(self):
+        """Test that CachedSerperDevTool calls Serper once for queries differing in case and spacing."""
+        from crewai_tools import SerperDevTool
+        from crew_common.search_cache import CachedSerperDevTool
+        tool = CachedSerperDevTool(cache=self.cache(), n_results=5)
+        with mock.patch.object(SerperDevTool, "_make_api_request", return_value={"organic": []}) as request:
+            tool.run(search_query="Trending  AI companies")
+            tool.run(search_query="trending ai companies ")
+            tool.run(search_query="trending ai companies", search_type="news")
+        self.assertEqual(request.call_count, 2)
+        self.assertIsInstance(tool.search_tool, SerperDevTool)
+        self.assertEqual(tool.search_tool.n_results, 5)
+
+    def test_crewai_tools_imported_at_first_search(self):
+        """Test that creating a CachedSerperDevTool does not import crewai_tools."""
+        code = ("import sys\n"
+                "from crew_common.search_cache import CachedSerperDevTool\n"
+                "CachedSerperDevTool()\n"
+                "print('crewai_tools' in sys.modules)\n")
+        import crew_common
+        source = os.path.dirname(os.path.dirname(crew_common.__file__))
+        environment = dict(os.environ, PYTHONPATH=os.pathsep.join([source, os.environ.get("PYTHONPATH", "")]))
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                                env=environment)
+        self.assertEqual(result.stdout.split()[-1], "False")
+
+if __name__ == '__main__':
+    unittest.main()
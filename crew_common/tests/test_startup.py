@@ -0,0 +1,74 @@
+import datetime
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+
+class TestPrepareEnvironment(unittest.TestCase):
+    """Tests for the opt-in startup environment."""
+
+    def test_unchanged_unless_opted_in(self):
+        """Test that the defaults apply only with CREW_FAST_STARTUP, and never over a set value."""
+        from crew_common.startup import STARTUP_ENVIRONMENT, prepare_environment
+        environment = {name: value for name, value in os.environ.items() if name not in STARTUP_ENVIRONMENT}
+        for setting in [None, "0", "false"]:
+            if setting is not None:
+                environment["CREW_FAST_STARTUP"] = setting
+            with mock.patch.dict(os.environ, environment, clear=True):
+                prepare_environment()
+                self.assertFalse(set(STARTUP_ENVIRONMENT) & set(os.environ))
+
+        environment.update(CREW_FAST_STARTUP="1", CREWAI_DISABLE_TELEMETRY="false")
+        with mock.patch.dict(os.environ, environment, clear=True):
+            prepare_environment()
+            self.assertEqual(os.environ["CREWAI_DISABLE_TELEMETRY"], "false")
+            self.assertEqual(os.environ["LITELLM_LOCAL_MODEL_COST_MAP"], "True")
+
+
+class TestLoadYaml(unittest.TestCase):
+    """Tests for the cached YAML config loader."""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.config = os.path.join(self.directory.name, "agents.yaml")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, text):
+        with open(self.config, "w") as f:
+            f.write(text)
+
+    def test_cached_until_the_file_changes(self):
+        """Test that a config is cached in memory and under __pycache__, as a fresh copy per load."""
+        from crew_common import startup
+        from crew_common.startup import _cache_path, load_yaml
+        self.write("analyst:\n  role: Analyst\n  tools: [search]\n")
+        first = load_yaml(self.config)
+        self.assertEqual(first, {"analyst": {"role": "Analyst", "tools": ["search"]}})
+        self.assertTrue(os.path.exists(_cache_path(self.config)))
+        self.assertTrue(os.path.dirname(_cache_path(self.config)).endswith("__pycache__"))
+
+        first["analyst"]["tools"].append("scrape")
+        self.assertEqual(load_yaml(self.config)["analyst"]["tools"], ["search"])
+
+        # A new process has only the file cache
+        self.addCleanup(setattr, startup, "_parsed", startup._parsed)
+        startup._parsed = {}
+        self.assertEqual(load_yaml(self.config)["analyst"]["role"], "Analyst")
+
+        self.write("analyst:\n  role: Portfolio manager\n")
+        self.assertEqual(load_yaml(self.config), {"analyst": {"role": "Portfolio manager"}})
+
+    def test_values_marshal_cannot_hold(self):
+        """Test that YAML with a date loads every time, without a cache."""
+        from crew_common.startup import _cache_path, load_yaml
+        self.write("research:\n  as_of: 2026-01-02\n")
+        for _ in range(2):
+            self.assertEqual(load_yaml(self.config), {"research": {"as_of": datetime.date(2026, 1, 2)}})
+        self.assertFalse(os.path.exists(_cache_path(self.config)))
+
+
+if __name__ == '__main__':
+    unittest.main()
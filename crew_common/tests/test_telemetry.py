@@ -0,0 +1,115 @@
+import json
+import os
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+
+
+class TestTelemetry(unittest.TestCase):
+    """Tests for aggregating crewAI events into traces and metrics."""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def run_crew(self, listener_kwargs):
+        """Emit the events of a kickoff with one task, two LLM calls and three tool calls, and return the listener."""
+        from crewai import Agent, Task
+        from crewai.tasks.task_output import TaskOutput
+        from crewai.utilities.events import (
+            AgentExecutionCompletedEvent, AgentExecutionStartedEvent, CrewKickoffCompletedEvent,
+            CrewKickoffStartedEvent, LLMCallCompletedEvent, LLMCallFailedEvent, LLMCallStartedEvent,
+            TaskCompletedEvent, TaskStartedEvent, ToolUsageErrorEvent, ToolUsageFinishedEvent, crewai_event_bus)
+        from crewai.utilities.events.llm_events import LLMCallType
+        from crew_common.telemetry import TelemetryListener
+
+        agent = Agent(role="Analyst ", goal="Pick a stock", backstory="Careful", llm="gpt-4o-mini")
+        task = Task(name="research", description="Research", expected_output="A pick", agent=agent)
+        crew = object()
+        started = datetime.now()
+        with crewai_event_bus.scoped_handlers():
+            listener = TelemetryListener(self.directory.name, summary=False, **listener_kwargs)
+            crewai_event_bus.emit(crew, CrewKickoffStartedEvent(crew_name="crew", inputs={}))
+            crewai_event_bus.emit(task, TaskStartedEvent(context="", task=task))
+            crewai_event_bus.emit(agent, AgentExecutionStartedEvent(agent=agent, task=task, tools=[],
+                                                                    task_prompt="Research"))
+            crewai_event_bus.emit(agent, LLMCallStartedEvent(messages="Pick"))
+            # crewAI counts tokens on the agent while the call completes
+            agent._token_process.sum_prompt_tokens(120)
+            agent._token_process.sum_completion_tokens(30)
+            crewai_event_bus.emit(agent, LLMCallCompletedEvent(response="NVDA", call_type=LLMCallType.LLM_CALL))
+            crewai_event_bus.emit(agent, LLMCallStartedEvent(messages="Pick"))
+            crewai_event_bus.emit(agent, LLMCallFailedEvent(error="rate limited"))
+            for from_cache in (False, True):
+                crewai_event_bus.emit(agent, ToolUsageFinishedEvent(
+                    tool_name="search", tool_args={}, agent_role="Analyst", started_at=started,
+                    finished_at=started + timedelta(seconds=0.5), from_cache=from_cache, output="results"))
+            crewai_event_bus.emit(agent, ToolUsageErrorEvent(tool_name="scrape", tool_args={}, agent_role="Analyst",
+                                                             error="timeout"))
+            crewai_event_bus.emit(agent, AgentExecutionCompletedEvent(agent=agent, task=task, output="NVDA"))
+            crewai_event_bus.emit(task, TaskCompletedEvent(output=TaskOutput(description="Research", raw="NVDA",
+                                                                             agent="Analyst"), task=task))
+            crewai_event_bus.emit(crew, CrewKickoffCompletedEvent(crew_name="crew", output="NVDA"))
+        return listener
+
+    def metric(self, listener, name, **labels):
+        key = (name, tuple(sorted((label, str(value)) for label, value in labels.items())))
+        return listener.metrics.get(key, 0.0)
+
+    def test_events_are_aggregated_per_task_agent_and_tool(self):
+        """Test the metrics and trace records built from one kickoff's events."""
+        listener = self.run_crew({"crew_name": "stock_picker"})
+        crew = {"crew": "stock_picker"}
+        self.assertEqual(self.metric(listener, "crewai_kickoffs_total", status="ok", **crew), 1)
+        self.assertEqual(self.metric(listener, "crewai_task_runs_total", task="research", agent="Analyst",
+                                     status="ok", **crew), 1)
+        self.assertEqual(self.metric(listener, "crewai_llm_calls_total", agent="Analyst", status="ok", **crew), 1)
+        self.assertEqual(self.metric(listener, "crewai_llm_calls_total", agent="Analyst", status="error", **crew), 1)
+        self.assertEqual(self.metric(listener, "crewai_llm_tokens_total", agent="Analyst", type="prompt", **crew), 120)
+        self.assertEqual(self.metric(listener, "crewai_llm_tokens_total", agent="Analyst", type="completion",
+                                     **crew), 30)
+        for status in ("ok", "cached", "error"):
+            self.assertEqual(self.metric(listener, "crewai_tool_calls_total", tool="search" if status != "error"
+                                         else "scrape", status=status, **crew), 1)
+        self.assertAlmostEqual(self.metric(listener, "crewai_tool_seconds_total", tool="search", **crew), 1.0)
+        self.assertEqual(self.metric(listener, "crewai_retries_total", kind="llm", **crew), 1)
+        self.assertEqual(self.metric(listener, "crewai_retries_total", kind="tool", **crew), 1)
+
+        with open(listener.trace_path) as f:
+            records = [json.loads(line) for line in f]
+        self.assertEqual([record["kind"] for record in records],
+                         ["llm", "llm", "tool", "tool", "tool", "agent", "task", "crew"])
+        task = records[-2]
+        self.assertEqual((task["task"], task["agent"], task["llm_calls"], task["tool_calls"]),
+                         ("research", "Analyst", 2, 3))
+        self.assertEqual((task["prompt_tokens"], task["completion_tokens"], task["retries"]), (120, 30, 2))
+        self.assertAlmostEqual(task["tool_s"], 1.0)
+        self.assertEqual(records[-3]["llm_calls"], 2)
+        self.assertEqual({record["crew"] for record in records}, {"stock_picker"})
+
+        with open(listener.metrics_path) as f:
+            prom = f.read()
+        self.assertIn("# TYPE crewai_llm_tokens_total counter", prom)
+        self.assertIn('crewai_llm_tokens_total{agent="Analyst",crew="stock_picker",type="prompt"} 120', prom)
+
+    def test_summary_table(self):
+        """Test the per-kickoff summary and the default crew label."""
+        from crew_common.telemetry import summary_table
+        listener = self.run_crew({})
+        with open(listener.trace_path) as f:
+            records = [json.loads(line) for line in f]
+        self.assertEqual(records[-1]["crew"], "crew")
+        table = summary_table(records).splitlines()
+        self.assertTrue(table[0].startswith("Telemetry for crew run 1:"))
+        self.assertIn("2 LLM calls", table[0])
+        self.assertIn("120 prompt + 30 completion tokens", table[0])
+        rows = {tuple(line.split()[:2]): line.split()[2:] for line in table[2:]}
+        self.assertEqual(rows[("task", "research")][0], "1")
+        self.assertEqual(rows[("tool", "search")][0], "2")
+        self.assertEqual(rows[("tool", "scrape")][-1], "1")
+
+
+if __name__ == '__main__':
+    unittest.main()
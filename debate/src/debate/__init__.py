@@ -0,0 +1,4 @@
+from crew_common.startup import prepare_environment
+
+# Before any module of the package imports crewai
+prepare_environment()
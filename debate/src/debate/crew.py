@@ -3,7 +3,27 @@ from crewai.project import CrewBase, agent, crew, task
 from crewai.agents.agent_builder.base_agent import BaseAgent
 from typing import List
 
+from crew_common.startup import cached_config
 
+
+class ConcurrentTask(Task):
+    """A task that may run with async_execution without hanging the crew when it fails.
+
+    crewAI runs an async task on a thread that only sets its future's result,
+    so an exception leaves the crew waiting on the future forever. Here the
+    exception is set on the future instead, and the kickoff raises it.
+    """
+
+    def _execute_task_async(self, agent, context, tools, future) -> None:
+        try:
+            result = self._execute_core(agent, context, tools)
+        except BaseException as e:
+            future.set_exception(e)
+            return
+        future.set_result(result)
+
+
+@cached_config
 @CrewBase
 class Debate():
     """Debate crew"""
@@ -15,17 +35,22 @@ class Debate():
     def person(self) -> Agent:
         return Agent(config=self.agents_config['person'], verbose=True)
 
+    @agent
+    def opponent(self) -> Agent:
+        # Same debater as person, but its own instance: an agent cannot run two tasks at once
+        return Agent(config=self.agents_config['person'], verbose=True)
+
     @agent
     def judge(self) -> Agent:
         return Agent(config=self.agents_config['judge'], verbose=True)
 
     @task
     def propose(self) -> Task:
-        return Task(config=self.tasks_config['propose'])
+        return ConcurrentTask(config=self.tasks_config['propose'])
 
     @task
     def oppose(self) -> Task:
-        return Task(config=self.tasks_config['oppose'])
+        return ConcurrentTask(config=self.tasks_config['oppose'])
         
     @task
     def decision(self) -> Task:
@@ -1,24 +1,69 @@
 #!/usr/bin/env python
 import sys
+import time
 import warnings
 
 from datetime import datetime
+from functools import partial
 
+from crew_common.batch import batch_main
+from crew_common.llm_cache import install_llm_cache, llm_cache_mode
+from crew_common.startup import profile_startup, startup_profile_requested
+from crew_common.telemetry import install_telemetry
 from debate.crew import Debate
+from debate.timing import timing_report
 
 warnings.filterwarnings("ignore", category=SyntaxWarning, module="pysbd")
 
+objective = 'Should be more restrictions on AI LLMs to protect the public?'
+
+
+def setup(llm_cache):
+    """
+    Prepare this process to run the crew: serve LLM calls through the cache and record telemetry.
+    """
+    install_llm_cache(llm_cache)
+    # Timings and tokens per task, agent and tool go to output/telemetry/, with a summary after each kickoff
+    install_telemetry(crew_name="debate")
+
 
 def run():
     """
     Run the crew.
     """
+    # --startup-profile shows where the time to start the crew goes, without running it
+    if startup_profile_requested():
+        print(profile_startup("debate.main", "debate.main.Debate().crew()"))
+        return
+
+    # --llm-cache record|replay|auto reuses completions stored on disk
+    setup(llm_cache_mode())
+
     inputs = {
-        'objective': 'Should be more restrictions on AI LLMs to protect the public?'
+        'objective': objective
     }
     
     try:
-        result = Debate().crew().kickoff(inputs=inputs)
+        # propose and oppose run at the same time, and the decision waits for both
+        crew = Debate().crew()
+        start = time.perf_counter()
+        result = crew.kickoff(inputs=inputs)
+        wall_time = time.perf_counter() - start
         print(result.raw)
+        print(f"\n{timing_report(crew.tasks, wall_time)}")
     except Exception as e:
         raise Exception(f"An error occurred while running the crew: {e}")
+
+
+def kickoff(inputs):
+    """
+    Run the crew once for one set of inputs.
+    """
+    return Debate().crew().kickoff(inputs=inputs)
+
+
+def run_batch():
+    """
+    Run the crew once per line of a JSONL or CSV file of inputs, e.g. one objective per line.
+    """
+    batch_main(kickoff, defaults={'objective': objective}, initializer=partial(setup, llm_cache_mode()))
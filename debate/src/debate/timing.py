@@ -0,0 +1,69 @@
+from typing import List, Optional
+
+from crewai import Task
+
+
+def _dependencies(task: Task, tasks: List[Task]) -> List[Task]:
+    # Tasks named in context; otherwise, in a sequential crew, a task starts after the last
+    # synchronous task before it, and a synchronous one also waits for the async tasks since
+    if isinstance(task.context, list):
+        return task.context
+    earlier = tasks[:tasks.index(task)]
+    syncs = [i for i, other in enumerate(earlier) if not other.async_execution]
+    if task.async_execution:
+        return [earlier[syncs[-1]]] if syncs else []
+    return earlier[syncs[-1]:] if syncs else earlier
+
+
+def critical_path(tasks: List[Task]) -> List[Task]:
+    """Return the chain of tasks that determined when the last one finished.
+
+    Starting from the task that finished last, each step goes back to the
+    dependency that finished last, since that is the one it waited for.
+    Tasks that did not run are ignored.
+    """
+    ran = [task for task in tasks if task.start_time and task.end_time]
+    if not ran:
+        return []
+    path = [max(ran, key=lambda task: task.end_time)]
+    while True:
+        dependencies = [task for task in _dependencies(path[-1], tasks) if task in ran]
+        if not dependencies:
+            return path[::-1]
+        path.append(max(dependencies, key=lambda task: task.end_time))
+
+
+def timing_report(tasks: List[Task], wall_time: Optional[float] = None) -> str:
+    """Describe when each task ran, the critical path and the time saved by running tasks concurrently.
+
+    Args:
+        tasks: The crew's tasks, after kickoff
+        wall_time: Seconds the kickoff took, by default from the first start to the last end
+
+    Returns:
+        A table of task timings followed by a summary
+    """
+    ran = [task for task in tasks if task.start_time and task.end_time]
+    if not ran:
+        return "No task timings recorded"
+    origin = min(task.start_time for task in ran)
+    path = critical_path(tasks)
+
+    lines = [f"{'task':<16} {'agent':<28} {'start_s':>8} {'end_s':>8} {'duration_s':>10}  mode"]
+    for task in ran:
+        role = (task.agent.role if task.agent else "").strip()[:28]
+        mode = "async" if task.async_execution else "sync"
+        marker = " *" if task in path else ""
+        lines.append(f"{task.name or '':<16} {role:<28} {(task.start_time - origin).total_seconds():>8.2f} "
+                     f"{(task.end_time - origin).total_seconds():>8.2f} {task.execution_duration:>10.2f}  "
+                     f"{mode}{marker}")
+
+    sequential = sum(task.execution_duration for task in ran)
+    if wall_time is None:
+        wall_time = (max(task.end_time for task in ran) - origin).total_seconds()
+    lines.append("")
+    lines.append(f"Critical path (*): {' -> '.join(task.name or '?' for task in path)} = "
+                 f"{sum(task.execution_duration for task in path):.2f}s")
+    lines.append(f"Wall time: {wall_time:.2f}s, one task at a time: {sequential:.2f}s, "
+                 f"saved: {sequential - wall_time:.2f}s ({sequential / wall_time if wall_time else 1.0:.2f}x)")
+    return "\n".join(lines)
@@ -0,0 +1,539 @@
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from accounts import TRANSACTION_KINDS, Transaction, get_share_prices
+
+DEPOSIT, WITHDRAW, BUY, SELL = range(len(TRANSACTION_KINDS))
+
+# Rounds with fewer orders than this are applied one order at a time instead of vectorized
+MIN_ROUND_SIZE = 32
+
+# Symbol of a trade in a symbol without a price, which is rejected when applied
+UNKNOWN_SYMBOL = -2
+
+# One order per row; symbol is -1 for deposits and withdrawals, amount is unused for trades
+ORDER_DTYPE = np.dtype([
+    ('row', np.int64),
+    ('kind', np.int8),
+    ('symbol', np.int32),
+    ('quantity', np.int64),
+    ('amount', np.float64),
+])
+
+# One accepted transaction per row; price holds the amount for deposits and withdrawals
+JOURNAL_DTYPE = np.dtype([
+    ('row', np.int64),
+    ('kind', np.int8),
+    ('symbol', np.int32),
+    ('quantity', np.int64),
+    ('price', np.float64),
+])
+
+
+class AccountBook:
+    """Balances and positions for many accounts, stored as struct-of-arrays.
+
+    Each account occupies one row: its cash balance and initial deposit live in
+    float arrays. Positions are stored sparsely, one dict per symbol mapping
+    rows to the shares they hold, so memory grows with the positions held
+    rather than with accounts x symbols. Every accepted transaction is kept in
+    a journal, with each entry linked to the previous one of its account.
+    Orders are applied a whole batch at a time with the same rules as Account:
+    withdrawals and purchases cannot overdraw the balance, sales cannot exceed
+    the shares held, and unknown symbols (priced at 0.0) are rejected.
+    """
+
+    def __init__(self, capacity: int = 1024) -> None:
+        """Initialize an empty book.
+
+        Args:
+            capacity: Number of accounts to allocate space for up front
+        """
+        capacity = max(capacity, 1)
+        self.size = 0
+        self.ids: List[str] = []
+        self._rows: Dict[str, int] = {}
+        self.balances = np.zeros(capacity, dtype=np.float64)
+        self.initial_deposits = np.zeros(capacity, dtype=np.float64)
+        self.symbols: List[str] = []
+        self._symbol_index: Dict[str, int] = {}
+        self.positions: List[Dict[int, int]] = []
+        self._journal = np.zeros(capacity, dtype=JOURNAL_DTYPE)
+        self._journal_size = 0
+        # Journal index of each entry's previous entry for the same account, and of each account's last entry
+        self._previous = np.full(capacity, -1, dtype=np.int64)
+        self._last = np.full(capacity, -1, dtype=np.int64)
+
+    def _grow_rows(self, needed: int) -> None:
+        capacity = len(self.balances)
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        for name in ("balances", "initial_deposits"):
+            grown = np.zeros(capacity, dtype=np.float64)
+            grown[:self.size] = getattr(self, name)[:self.size]
+            setattr(self, name, grown)
+        last = np.full(capacity, -1, dtype=np.int64)
+        last[:self.size] = self._last[:self.size]
+        self._last = last
+
+    def intern(self, symbol: str) -> int:
+        """Return the index of a symbol, adding it if needed.
+
+        Args:
+            symbol: Stock symbol
+
+        Returns:
+            Index of the symbol in symbols and positions
+        """
+        column = self._symbol_index.get(symbol)
+        if column is None:
+            column = len(self.symbols)
+            self.symbols.append(symbol)
+            self.positions.append({})
+            self._symbol_index[symbol] = column
+        return column
+
+    def open_accounts(self, account_ids: Sequence[str], initial_deposits: Sequence[float]) -> np.ndarray:
+        """Open many accounts at once, recording each initial deposit.
+
+        Args:
+            account_ids: Unique identifiers for the new accounts
+            initial_deposits: Initial amount deposited into each account
+
+        Returns:
+            Rows assigned to the new accounts
+        """
+        deposits = np.asarray(initial_deposits, dtype=np.float64)
+        if len(account_ids) != len(deposits):
+            raise ValueError("Expected one initial deposit per account")
+        start = self.size
+        rows = np.arange(start, start + len(account_ids), dtype=np.int64)
+        for offset, account_id in enumerate(account_ids):
+            if account_id in self._rows:
+                for opened in account_ids[:offset]:
+                    del self._rows[opened]
+                raise ValueError(f"Account {account_id} already exists")
+            self._rows[account_id] = start + offset
+        self.ids.extend(account_ids)
+        self._grow_rows(start + len(rows))
+        self.balances[rows] = deposits
+        self.initial_deposits[rows] = deposits
+        self.size = start + len(rows)
+        self._record(rows, np.full(len(rows), DEPOSIT, dtype=np.int8), np.full(len(rows), -1, dtype=np.int32),
+                     np.zeros(len(rows), dtype=np.int64), deposits)
+        return rows
+
+    def open_account(self, account_id: str, initial_deposit: float) -> "AccountView":
+        """Open a single account and return a view over it.
+
+        Args:
+            account_id: Unique identifier for the account
+            initial_deposit: Initial amount of money deposited
+
+        Returns:
+            Account-compatible view of the new account
+        """
+        row = self.open_accounts([account_id], [initial_deposit])[0]
+        return AccountView(self, int(row))
+
+    def row_of(self, account_id: str) -> int:
+        """Return the row of an account, raising KeyError if it does not exist."""
+        return self._rows[account_id]
+
+    def account(self, account_id: str) -> "AccountView":
+        """Return a view over an existing account."""
+        return AccountView(self, self._rows[account_id])
+
+    def orders(self, account_ids: Iterable[str], kinds: Iterable[str],
+               symbols: Optional[Iterable[Optional[str]]] = None,
+               quantities: Optional[Iterable[int]] = None,
+               amounts: Optional[Iterable[float]] = None) -> np.ndarray:
+        """Build an order batch from account ids, kind names and symbols.
+
+        Orders are validated before any symbol is added to the book, and a
+        symbol is added only if it has a price; trades in a symbol without one
+        are marked UNKNOWN_SYMBOL and rejected by apply_orders.
+
+        Args:
+            account_ids: Account of each order
+            kinds: DEPOSIT, WITHDRAW, BUY or SELL for each order
+            symbols: Stock symbol of each order, None for cash movements
+            quantities: Number of shares for each trade
+            amounts: Amount of each deposit or withdrawal
+
+        Returns:
+            Structured array of ORDER_DTYPE, ready for apply_orders
+        """
+        account_ids = list(account_ids)
+        count = len(account_ids)
+        kinds = list(kinds)
+        symbols = [None] * count if symbols is None else list(symbols)
+        if len(kinds) != count or len(symbols) != count:
+            raise ValueError("Expected one kind and symbol per order")
+        batch = np.zeros(count, dtype=ORDER_DTYPE)
+        batch['row'] = [self._rows[account_id] for account_id in account_ids]
+        batch['kind'] = [TRANSACTION_KINDS.index(kind) for kind in kinds]
+        if quantities is not None:
+            batch['quantity'] = list(quantities)
+        if amounts is not None:
+            batch['amount'] = list(amounts)
+        cash = (batch['kind'] <= WITHDRAW).tolist()
+        if any(symbol is None for symbol, is_cash in zip(symbols, cash) if not is_cash):
+            raise ValueError("Trade order without a symbol")
+        _check_amounts(batch)
+
+        new = {symbol for symbol, is_cash in zip(symbols, cash) if not is_cash and symbol not in self._symbol_index}
+        if new:
+            quotes = get_share_prices(new)
+            for symbol in sorted(new):
+                if quotes[symbol] != 0.0:
+                    self.intern(symbol)
+        index = self._symbol_index
+        batch['symbol'] = [-1 if is_cash else index.get(symbol, UNKNOWN_SYMBOL)
+                           for symbol, is_cash in zip(symbols, cash)]
+        return batch
+
+    def apply_orders(self, batch: np.ndarray) -> np.ndarray:
+        """Validate and apply a batch of orders.
+
+        Orders for the same account take effect in batch order; orders for
+        different accounts are independent. Invalid amounts or quantities raise
+        ValueError before anything is applied, as they would on an Account.
+
+        Args:
+            batch: Structured array of ORDER_DTYPE
+
+        Returns:
+            Boolean array marking which orders were accepted
+        """
+        count = len(batch)
+        accepted = np.zeros(count, dtype=bool)
+        if count == 0:
+            return accepted
+
+        rows = batch['row']
+        kinds = batch['kind']
+        symbols = batch['symbol']
+        quantities = batch['quantity']
+        amounts = batch['amount']
+
+        if rows.min() < 0 or rows.max() >= self.size:
+            raise IndexError("Order for an unknown account row")
+        if kinds.min() < DEPOSIT or kinds.max() > SELL:
+            raise ValueError("Unknown order kind")
+        _check_amounts(batch)
+        cash = kinds <= WITHDRAW
+        unknown = ~cash & (symbols == UNKNOWN_SYMBOL)
+        if (~cash & ~unknown & ((symbols < 0) | (symbols >= len(self.symbols)))).any():
+            raise ValueError("Trade order for an unknown symbol")
+
+        # One bulk price lookup for every symbol traded in the batch; the
+        # extra last entry prices UNKNOWN_SYMBOL at 0.0
+        traded = np.unique(symbols[~cash & ~unknown])
+        price_table = np.zeros(len(self.symbols) + 1, dtype=np.float64)
+        if len(traded):
+            quotes = get_share_prices([self.symbols[column] for column in traded])
+            price_table[traded] = [quotes[self.symbols[column]] for column in traded]
+        prices = np.where(cash, amounts, price_table[np.where(cash | unknown, -1, symbols)])
+
+        # Split the batch into rounds holding at most one order per account,
+        # so each round can be applied without conflicting updates
+        order = np.argsort(rows, kind='stable')
+        sorted_rows = rows[order]
+        first = np.ones(count, dtype=bool)
+        first[1:] = sorted_rows[1:] != sorted_rows[:-1]
+        positions = np.arange(count)
+        rank = np.empty(count, dtype=np.int64)
+        rank[order] = positions - np.maximum.accumulate(np.where(first, positions, 0))
+
+        # Orders grouped by round with one sort; rounds only shrink, as round r
+        # holds the accounts with more than r orders
+        by_round = np.argsort(rank, kind='stable')
+        bounds = np.concatenate(([0], np.cumsum(np.bincount(rank))))
+        round_number = 0
+        while round_number + 1 < len(bounds) and bounds[round_number + 1] - bounds[round_number] >= MIN_ROUND_SIZE:
+            index = by_round[bounds[round_number]:bounds[round_number + 1]]
+            accepted[index] = self._apply_round(rows[index], kinds[index], symbols[index],
+                                                quantities[index], prices[index])
+            round_number += 1
+
+        # The rest belongs to a few accounts with many orders each, where a round
+        # per order would cost more than applying them one at a time
+        rest = by_round[bounds[round_number]:]
+        if len(rest):
+            rest = rest[np.lexsort((rest, rows[rest]))]
+            accepted[rest] = self._apply_sequential(rows[rest], kinds[rest], symbols[rest],
+                                                    quantities[rest], prices[rest])
+        return accepted
+
+    def _apply_round(self, rows: np.ndarray, kinds: np.ndarray, symbols: np.ndarray,
+                     quantities: np.ndarray, prices: np.ndarray) -> np.ndarray:
+        deposit = kinds == DEPOSIT
+        withdraw = kinds == WITHDRAW
+        buy = kinds == BUY
+        sell = kinds == SELL
+        trade = buy | sell
+        positions = self.positions
+
+        balances = self.balances[rows]
+        held = np.zeros(len(rows), dtype=np.int64)
+        priced_sell = sell & (prices != 0.0)
+        held[priced_sell] = [positions[symbol].get(row, 0) for row, symbol in
+                             zip(rows[priced_sell].tolist(), symbols[priced_sell].tolist())]
+        totals = prices * quantities
+
+        ok = (deposit
+              | (withdraw & (prices <= balances))
+              | (buy & (prices != 0.0) & (totals <= balances))
+              | (sell & (prices != 0.0) & (held >= quantities)))
+
+        updated = np.where(deposit, balances + prices,
+                  np.where(withdraw, balances - prices,
+                  np.where(buy, balances - totals, balances + totals)))
+        self.balances[rows[ok]] = updated[ok]
+
+        traded = ok & trade
+        for row, symbol, quantity in zip(rows[traded].tolist(), symbols[traded].tolist(),
+                                         np.where(buy, quantities, -quantities)[traded].tolist()):
+            _add_position(positions[symbol], row, quantity)
+
+        self._record(rows[ok], kinds[ok], np.where(trade, symbols, -1)[ok],
+                     np.where(trade, quantities, 0)[ok], prices[ok])
+        return ok
+
+    def _apply_sequential(self, rows: np.ndarray, kinds: np.ndarray, symbols: np.ndarray,
+                          quantities: np.ndarray, prices: np.ndarray) -> np.ndarray:
+        # Same rules as _apply_round, one order at a time, for orders sorted by account then batch order
+        ok = np.zeros(len(rows), dtype=bool)
+        balances = self.balances
+        positions = self.positions
+        for i, (row, kind, symbol, quantity, price) in enumerate(zip(
+                rows.tolist(), kinds.tolist(), symbols.tolist(), quantities.tolist(), prices.tolist())):
+            if kind == DEPOSIT:
+                balances[row] += price
+            elif kind == WITHDRAW:
+                if price > balances[row]:
+                    continue
+                balances[row] -= price
+            elif price == 0.0:
+                continue
+            elif kind == BUY:
+                if price * quantity > balances[row]:
+                    continue
+                balances[row] -= price * quantity
+                _add_position(positions[symbol], row, quantity)
+            else:
+                if positions[symbol].get(row, 0) < quantity:
+                    continue
+                balances[row] += price * quantity
+                _add_position(positions[symbol], row, -quantity)
+            ok[i] = True
+
+        trade = kinds >= BUY
+        self._record(rows[ok], kinds[ok], np.where(trade, symbols, -1)[ok],
+                     np.where(trade, quantities, 0)[ok], prices[ok])
+        return ok
+
+    def _record(self, rows: np.ndarray, kinds: np.ndarray, symbols: np.ndarray,
+                quantities: np.ndarray, prices: np.ndarray) -> None:
+        # Append accepted transactions to the journal, linking each to its account's previous entry
+        count = len(rows)
+        start = self._journal_size
+        end = start + count
+        if end > len(self._journal):
+            capacity = len(self._journal)
+            while capacity < end:
+                capacity *= 2
+            journal = np.zeros(capacity, dtype=JOURNAL_DTYPE)
+            journal[:start] = self._journal[:start]
+            self._journal = journal
+            previous = np.full(capacity, -1, dtype=np.int64)
+            previous[:start] = self._previous[:start]
+            self._previous = previous
+
+        entries = self._journal[start:end]
+        entries['row'] = rows
+        entries['kind'] = kinds
+        entries['symbol'] = symbols
+        entries['quantity'] = quantities
+        entries['price'] = prices
+
+        # Within the new entries, each links to the one before it for the same
+        # account, and the first of each account to the account's last entry
+        indexes = np.arange(start, end, dtype=np.int64)
+        order = np.argsort(rows, kind='stable')
+        sorted_rows = rows[order]
+        first = np.ones(count, dtype=bool)
+        first[1:] = sorted_rows[1:] != sorted_rows[:-1]
+        previous = self._previous[start:end]
+        previous[order[1:]] = indexes[order[:-1]]
+        previous[order[first]] = self._last[sorted_rows[first]]
+        last = np.ones(count, dtype=bool)
+        last[:-1] = first[1:]
+        self._last[sorted_rows[last]] = indexes[order[last]]
+        self._journal_size = end
+
+    def journal(self) -> np.ndarray:
+        """Return every accepted transaction, in the order applied, as one array."""
+        return self._journal[:self._journal_size]
+
+    def account_journal(self, row: int) -> np.ndarray:
+        """Return the accepted transactions of one account, in the order applied.
+
+        Follows the account's links through the journal, so the cost grows
+        with the account's own transactions rather than the whole journal.
+
+        Args:
+            row: Row of the account
+
+        Returns:
+            Structured array of JOURNAL_DTYPE
+        """
+        previous = self._previous
+        entries = []
+        index = self._last.item(row)
+        while index >= 0:
+            entries.append(index)
+            index = previous.item(index)
+        entries.reverse()
+        return self._journal[entries]
+
+    def portfolio_values(self, prices: Optional[Dict[str, float]] = None) -> np.ndarray:
+        """Value the holdings of every account with one bulk price lookup.
+
+        Args:
+            prices: Share prices to use; current prices are looked up when omitted
+
+        Returns:
+            Array with the portfolio value of each account row
+        """
+        held = [(symbol, holders) for symbol, holders in zip(self.symbols, self.positions) if holders]
+        if prices is None:
+            prices = get_share_prices([symbol for symbol, _ in held])
+        values = np.zeros(self.size, dtype=np.float64)
+        for symbol, holders in held:
+            rows = np.fromiter(holders.keys(), dtype=np.int64, count=len(holders))
+            shares = np.fromiter(holders.values(), dtype=np.int64, count=len(holders))
+            values[rows] += shares * prices[symbol]
+        return values
+
+
+def _check_amounts(batch: np.ndarray) -> None:
+    # Invalid amounts or quantities raise ValueError, as they would on an Account
+    cash = batch['kind'] <= WITHDRAW
+    if (cash & (batch['amount'] <= 0)).any():
+        raise ValueError("Deposit and withdrawal amounts must be positive")
+    if (~cash & (batch['quantity'] <= 0)).any():
+        raise ValueError("Quantity must be positive")
+
+
+def _add_position(holders: Dict[int, int], row: int, quantity: int) -> None:
+    # Only rows holding shares are stored
+    held = holders.get(row, 0) + quantity
+    if held:
+        holders[row] = held
+    else:
+        del holders[row]
+
+
+class AccountView:
+    """An Account-compatible handle on one row of an AccountBook.
+
+    The view holds no state of its own; every read and write goes to the book.
+    """
+
+    def __init__(self, book: AccountBook, row: int) -> None:
+        """Initialize a view over a row of the book.
+
+        Args:
+            book: Book holding the account
+            row: Row of the account in the book
+        """
+        self.book = book
+        self.row = row
+
+    @property
+    def account_id(self) -> str:
+        """Unique identifier of the account."""
+        return self.book.ids[self.row]
+
+    @property
+    def balance(self) -> float:
+        """Current cash balance."""
+        return float(self.book.balances[self.row])
+
+    @property
+    def initial_deposit(self) -> float:
+        """Amount of the initial deposit."""
+        return float(self.book.initial_deposits[self.row])
+
+    @property
+    def portfolio(self) -> Dict[str, int]:
+        """Current holdings by symbol, built from the book's positions."""
+        row = self.row
+        return {symbol: holders[row] for symbol, holders in zip(self.book.symbols, self.book.positions)
+                if row in holders}
+
+    @property
+    def transactions(self) -> List[Transaction]:
+        """All recorded transactions of the account."""
+        return self.list_transactions()
+
+    def _apply(self, kind: str, symbol: Optional[str] = None, quantity: int = 0, amount: float = 0.0) -> bool:
+        batch = self.book.orders([self.account_id], [kind], [symbol], [quantity], [amount])
+        return bool(self.book.apply_orders(batch)[0])
+
+    def deposit(self, amount: float) -> None:
+        """Deposit funds, as Account.deposit."""
+        if amount <= 0:
+            raise ValueError("Deposit amount must be positive")
+        self._apply("DEPOSIT", amount=amount)
+
+    def withdraw(self, amount: float) -> bool:
+        """Withdraw funds, as Account.withdraw."""
+        if amount <= 0:
+            raise ValueError("Withdrawal amount must be positive")
+        return self._apply("WITHDRAW", amount=amount)
+
+    def buy_shares(self, symbol: str, quantity: int) -> bool:
+        """Buy shares, as Account.buy_shares."""
+        if quantity <= 0:
+            raise ValueError("Quantity must be positive")
+        return self._apply("BUY", symbol, quantity)
+
+    def sell_shares(self, symbol: str, quantity: int) -> bool:
+        """Sell shares, as Account.sell_shares."""
+        if quantity <= 0:
+            raise ValueError("Quantity must be positive")
+        return self._apply("SELL", symbol, quantity)
+
+    def get_portfolio_value(self) -> float:
+        """Calculate the current total value of all shares held."""
+        portfolio = self.portfolio
+        prices = get_share_prices(portfolio)
+        total_value = 0.0
+        for symbol, quantity in portfolio.items():
+            total_value += prices[symbol] * quantity
+        return total_value
+
+    def get_profit_or_loss(self) -> float:
+        """Compute the net profit or loss against the initial deposit."""
+        total_value = self.get_portfolio_value() + self.balance
+        return total_value - self.initial_deposit
+
+    def get_holdings(self) -> dict:
+        """Return a copy of the holdings."""
+        return self.portfolio
+
+    def list_transactions(self) -> List[Transaction]:
+        """Return a list of the transactions of this account, in order."""
+        entries = self.book.account_journal(self.row)
+        symbols = self.book.symbols
+        return [
+            (TRANSACTION_KINDS[kind], None, None, float(price)) if symbol < 0
+            else (TRANSACTION_KINDS[kind], symbols[symbol], int(quantity), float(price))
+            for kind, symbol, quantity, price in entries[['kind', 'symbol', 'quantity', 'price']].tolist()
+        ]
@@ -1,3 +1,36 @@
+import threading
+import time
+from array import array
+from bisect import bisect_right
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+Transaction = Tuple[str, Optional[str], Optional[int], float]
+
+TRANSACTION_KINDS = ("DEPOSIT", "WITHDRAW", "BUY", "SELL")
+_KIND_CODES = {kind: code for code, kind in enumerate(TRANSACTION_KINDS)}
+_DEPOSIT, _WITHDRAW, _BUY, _SELL = range(len(TRANSACTION_KINDS))
+# Range of the ledger's quantity column
+_MIN_QUANTITY, _MAX_QUANTITY = -2 ** 63, 2 ** 63 - 1
+
+
+def _apply(balance: float, positions: Dict[str, int], code: int,
+           symbol: Optional[str], quantity: int, price: float) -> float:
+    """Apply one transaction to a balance and positions, returning the new balance."""
+    if code == _DEPOSIT:
+        return balance + price
+    if code == _WITHDRAW:
+        return balance - price
+    if code == _BUY:
+        positions[symbol] = positions.get(symbol, 0) + quantity
+        return balance - price * quantity
+    positions[symbol] -= quantity
+    if positions[symbol] == 0:
+        del positions[symbol]
+    return balance + price * quantity
+
+
 def get_share_price(symbol: str) -> float:
     """Returns the current price for a given share symbol.
     This is a test implementation that returns fixed prices for AAPL, TSLA, and GOOGL.
@@ -9,8 +42,381 @@ def get_share_price(symbol: str) -> float:
     }
     return prices.get(symbol, 0.0)
 
+
+class PriceProvider:
+    """Interface for a source of share prices.
+
+    Subclasses implement get_prices, which looks up many symbols in one call;
+    an unknown symbol is priced at 0.0, as in get_share_price.
+    """
+
+    def get_prices(self, symbols: Iterable[str]) -> Dict[str, float]:
+        """Return the current price for each of the given symbols.
+
+        Args:
+            symbols: Stock symbols to look up
+
+        Returns:
+            Dictionary mapping each symbol to its price
+        """
+        raise NotImplementedError
+
+    def get_price(self, symbol: str) -> float:
+        """Return the current price for a single symbol."""
+        return self.get_prices([symbol])[symbol]
+
+
+class StubPriceProvider(PriceProvider):
+    """Price provider backed by the get_share_price test implementation."""
+
+    def get_prices(self, symbols: Iterable[str]) -> Dict[str, float]:
+        return {symbol: get_share_price(symbol) for symbol in symbols}
+
+
+class CachedPriceProvider(PriceProvider):
+    """A TTL and LRU bounded cache in front of another price provider.
+
+    Symbols missing from the cache, or whose entry is older than ``ttl``
+    seconds, are fetched from the wrapped provider in a single batch call.
+    """
+
+    def __init__(self, provider: PriceProvider, ttl: float = 5.0, maxsize: int = 1024,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        """Initialize the cache.
+
+        Args:
+            provider: Price provider to fetch missing prices from
+            ttl: Seconds a cached price stays valid
+            maxsize: Maximum number of symbols kept in the cache
+            clock: Monotonic time source, replaceable for testing
+        """
+        if maxsize <= 0:
+            raise ValueError("Cache size must be positive")
+        self.provider = provider
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_prices(self, symbols: Iterable[str]) -> Dict[str, float]:
+        now = self.clock()
+        prices: Dict[str, float] = {}
+        missing: Dict[str, None] = {}
+        with self._lock:
+            for symbol in symbols:
+                if symbol in prices or symbol in missing:
+                    continue
+                entry = self._entries.get(symbol)
+                if entry is not None and now - entry[1] < self.ttl:
+                    self._entries.move_to_end(symbol)
+                    prices[symbol] = entry[0]
+                    self.hits += 1
+                else:
+                    missing[symbol] = None
+            self.misses += len(missing)
+
+        if missing:
+            fetched = self.provider.get_prices(list(missing))
+            prices.update(fetched)
+            with self._lock:
+                for symbol, price in fetched.items():
+                    self._entries[symbol] = (price, now)
+                    self._entries.move_to_end(symbol)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+        return prices
+
+    def invalidate(self, symbol: Optional[str] = None) -> None:
+        """Drop one symbol, or every symbol, from the cache.
+
+        Args:
+            symbol: Symbol to drop, or None to clear the cache
+        """
+        with self._lock:
+            if symbol is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(symbol, None)
+
+    def stats(self) -> Dict[str, int]:
+        """Return the hit and miss counters and the current cache size."""
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
+
+
+_price_provider: PriceProvider = StubPriceProvider()
+
+
+def get_price_provider() -> PriceProvider:
+    """Return the price provider used by accounts."""
+    return _price_provider
+
+
+def set_price_provider(provider: PriceProvider) -> None:
+    """Replace the price provider used by accounts, e.g. with a live quote service.
+
+    Args:
+        provider: New price provider
+    """
+    global _price_provider
+    _price_provider = provider
+
+
+def get_share_prices(symbols: Iterable[str]) -> Dict[str, float]:
+    """Returns the current prices for many share symbols in one lookup.
+
+    Args:
+        symbols: Stock symbols to look up
+
+    Returns:
+        Dictionary mapping each symbol to its price
+    """
+    return _price_provider.get_prices(symbols)
+
+
+class Ledger:
+    """An append-only, columnar record of the transactions of one account.
+
+    Transactions are stored across typed arrays (kind code, interned symbol id,
+    quantity and price) rather than as a list of tuples, and the resulting cash
+    balance and per-symbol positions are updated as each entry is appended.
+    The ledger is itself a read-only sequence of ``(kind, symbol, quantity, price)``
+    tuples, built on access, so it can be indexed and iterated without copying.
+
+    Every entry is also timestamped, and a snapshot of the balance and positions
+    is kept every ``checkpoint_interval`` entries, so the state at any earlier
+    point can be rebuilt by replaying at most that many entries.
+    """
+
+    def __init__(self, checkpoint_interval: int = 1024) -> None:
+        """Initialize an empty ledger with a zero balance and no positions.
+
+        Args:
+            checkpoint_interval: Number of entries between state snapshots
+        """
+        if checkpoint_interval <= 0:
+            raise ValueError("Checkpoint interval must be positive")
+        self.kinds = array('b')
+        self.symbol_ids = array('i')  # -1 for cash movements
+        self.quantities = array('q')
+        self.prices = array('d')
+        self.times = array('d')
+        self.symbols: List[str] = []
+        self._symbol_index: Dict[str, int] = {}
+        self.balance = 0.0
+        self.positions: Dict[str, int] = {}
+        self.checkpoint_interval = checkpoint_interval
+        # _checkpoints[i] is the state after the first i * checkpoint_interval entries
+        self._checkpoints: List[Tuple[float, Dict[str, int]]] = [(0.0, {})]
+        # Called with (ledger, index) after each entry is appended
+        self.observers: List[Callable[["Ledger", int], None]] = []
+
+    def intern(self, symbol: str) -> int:
+        """Return the integer id for a symbol, assigning a new one if needed.
+
+        Args:
+            symbol: Stock symbol
+
+        Returns:
+            Id of the symbol within this ledger
+        """
+        symbol_id = self._symbol_index.get(symbol)
+        if symbol_id is None:
+            symbol_id = len(self.symbols)
+            self.symbols.append(symbol)
+            self._symbol_index[symbol] = symbol_id
+        return symbol_id
+
+    def append(self, kind: str, symbol: Optional[str], quantity: Optional[int], price: float,
+               timestamp: Optional[float] = None) -> None:
+        """Record a transaction and apply it to the balance and positions.
+
+        The caller is responsible for validating the transaction first.
+
+        Args:
+            kind: One of DEPOSIT, WITHDRAW, BUY or SELL
+            symbol: Stock symbol, or None for cash movements
+            quantity: Number of shares, or None for cash movements
+            price: Price per share, or the amount for cash movements
+            timestamp: Time of the transaction, defaults to now; clamped so
+                timestamps never decrease along the ledger
+        """
+        code = _KIND_CODES[kind]
+        if timestamp is None:
+            timestamp = time.time()
+        if self.times and timestamp < self.times[-1]:
+            timestamp = self.times[-1]
+        quantity_value = 0 if quantity is None else quantity
+        if not _MIN_QUANTITY <= quantity_value <= _MAX_QUANTITY:
+            raise OverflowError(f"Quantity {quantity} is out of range")
+        if symbol is None:
+            symbol_id = -1
+        else:
+            symbol_id = self._symbol_index.get(symbol, len(self.symbols))
+
+        # The entry is either recorded in every column and applied, or leaves no trace. An
+        # append fails e.g. with BufferError while a column() view is alive
+        columns = (self.kinds, self.symbol_ids, self.quantities, self.prices, self.times)
+        appended = 0
+        try:
+            for column, value in zip(columns, (code, symbol_id, quantity_value, price, timestamp)):
+                column.append(value)
+                appended += 1
+            self.balance = _apply(self.balance, self.positions, code, symbol, quantity, price)
+        except BaseException:
+            for column in columns[:appended]:
+                column.pop()
+            raise
+        if symbol is not None:
+            self.intern(symbol)
+
+        if len(self) % self.checkpoint_interval == 0:
+            self._checkpoints.append((self.balance, self.positions.copy()))
+
+        for observer in self.observers:
+            observer(self, len(self) - 1)
+
+    def checkpoint(self, number: int) -> Tuple[float, Dict[str, int]]:
+        """Return the balance and positions after ``number * checkpoint_interval`` entries.
+
+        The positions dict is shared with the ledger and must not be modified.
+
+        Args:
+            number: Index of the checkpoint
+
+        Returns:
+            Tuple of (balance, positions)
+        """
+        return self._checkpoints[number]
+
+    def restore(self, kinds: Iterable[int], symbols: Iterable[Optional[str]], quantities: Iterable[int],
+                prices: Iterable[float], times: Iterable[float],
+                checkpoints: List[Tuple[float, Dict[str, int]]]) -> None:
+        """Load previously recorded entries into an empty ledger.
+
+        The columns are filled in bulk and the current state is rebuilt from the
+        last checkpoint, replaying only the entries recorded after it.
+
+        Args:
+            kinds: Kind code of each entry
+            symbols: Symbol of each entry, None for cash movements
+            quantities: Quantity of each entry
+            prices: Price or amount of each entry
+            times: Timestamp of each entry
+            checkpoints: Saved checkpoints, starting with the one after
+                ``checkpoint_interval`` entries
+        """
+        if len(self):
+            raise ValueError("Can only restore into an empty ledger")
+        self.kinds.extend(kinds)
+        self.symbol_ids.extend(-1 if symbol is None else self.intern(symbol) for symbol in symbols)
+        self.quantities.extend(quantities)
+        self.prices.extend(prices)
+        self.times.extend(times)
+        if len(checkpoints) != len(self) // self.checkpoint_interval:
+            raise ValueError("Checkpoints do not match the restored entries")
+        self._checkpoints.extend(checkpoints)
+        self.balance, self.positions = self.state_at(len(self))
+
+    def seq_at(self, timestamp: float) -> int:
+        """Return the number of transactions recorded at or before a time.
+
+        Args:
+            timestamp: Point in time, as seconds since the epoch
+
+        Returns:
+            Sequence number of the ledger state at that time
+        """
+        return bisect_right(self.times, timestamp)
+
+    def state_at(self, seq: int) -> Tuple[float, Dict[str, int]]:
+        """Rebuild the balance and positions after the first ``seq`` transactions.
+
+        Starts from the nearest earlier checkpoint and replays the remaining
+        entries, so the cost does not depend on the length of the ledger.
+
+        Args:
+            seq: Number of transactions to include
+
+        Returns:
+            Tuple of (balance, positions); the positions dict is a fresh copy
+        """
+        if not 0 <= seq <= len(self):
+            raise IndexError("ledger sequence out of range")
+        checkpoint = seq // self.checkpoint_interval
+        balance, positions = self._checkpoints[checkpoint]
+        positions = positions.copy()
+        symbols = self.symbols
+        for index in range(checkpoint * self.checkpoint_interval, seq):
+            symbol_id = self.symbol_ids[index]
+            balance = _apply(balance, positions, self.kinds[index],
+                             symbols[symbol_id] if symbol_id >= 0 else None,
+                             self.quantities[index], self.prices[index])
+        return balance, positions
+
+    def _entry(self, index: int) -> Transaction:
+        symbol_id = self.symbol_ids[index]
+        if symbol_id < 0:
+            return (TRANSACTION_KINDS[self.kinds[index]], None, None, self.prices[index])
+        return (TRANSACTION_KINDS[self.kinds[index]], self.symbols[symbol_id],
+                self.quantities[index], self.prices[index])
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._entry(i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("ledger index out of range")
+        return self._entry(index)
+
+    def __iter__(self) -> Iterator[Transaction]:
+        return self.iter_range()
+
+    def iter_range(self, start: int = 0, stop: Optional[int] = None) -> Iterator[Transaction]:
+        """Iterate over a window of the ledger without copying it.
+
+        Args:
+            start: Index of the first transaction
+            stop: Index one past the last transaction, or None for the end
+
+        Returns:
+            Iterator of transaction tuples
+        """
+        stop = len(self) if stop is None else min(stop, len(self))
+        for index in range(start, stop):
+            yield self._entry(index)
+
+    def column(self, name: str) -> memoryview:
+        """Return a read-only, zero-copy view of one column of the ledger.
+
+        The ledger cannot grow while a view is alive: recording a transaction
+        raises BufferError and records nothing. Release the view (or use it as
+        a context manager) before recording further transactions.
+
+        Args:
+            name: One of kinds, symbol_ids, quantities, prices or times
+
+        Returns:
+            Read-only memoryview over the column
+        """
+        if name not in ("kinds", "symbol_ids", "quantities", "prices", "times"):
+            raise ValueError(f"Unknown ledger column: {name}")
+        return memoryview(getattr(self, name)).toreadonly()
+
+
 class Account:
-    """A class representing a trading account in a simulation platform."""
+    """A class representing a trading account in a simulation platform.
+    
+    Each account has its own lock, so the check-then-update in withdraw,
+    buy_shares and sell_shares is atomic when the account is shared between
+    threads, while threads working on different accounts never contend.
+    """
     
     def __init__(self, account_id: str, initial_deposit: float) -> None:
         """Initialize a new account with a given ID and initial deposit amount.
@@ -20,10 +426,49 @@ class Account:
             initial_deposit: Initial amount of money deposited
         """
         self.account_id = account_id
-        self.balance = initial_deposit
         self.initial_deposit = initial_deposit
-        self.portfolio = {}
-        self.transactions = [("DEPOSIT", None, None, initial_deposit)]
+        self.ledger = Ledger()
+        self._lock = threading.RLock()
+        self.ledger.append("DEPOSIT", None, None, initial_deposit)
+
+    @classmethod
+    def from_ledger(cls, account_id: str, initial_deposit: float, ledger: Ledger) -> "Account":
+        """Build an account around an existing ledger, e.g. one restored from storage.
+        
+        Args:
+            account_id: Unique identifier for the account
+            initial_deposit: Initial amount of money deposited
+            ledger: Ledger holding every transaction, including the initial deposit
+            
+        Returns:
+            Account backed by the given ledger
+        """
+        account = cls.__new__(cls)
+        account.account_id = account_id
+        account.initial_deposit = initial_deposit
+        account.ledger = ledger
+        account._lock = threading.RLock()
+        return account
+
+    @property
+    def balance(self) -> float:
+        """Current cash balance, maintained by the ledger."""
+        return self.ledger.balance
+
+    @property
+    def portfolio(self) -> Dict[str, int]:
+        """Current holdings by symbol, maintained by the ledger."""
+        return self.ledger.positions
+
+    @property
+    def transactions(self) -> Ledger:
+        """Read-only sequence view of all recorded transactions."""
+        return self.ledger
+
+    @property
+    def lock(self) -> threading.RLock:
+        """The account's lock, for callers that must update several accounts atomically."""
+        return self._lock
     
     def deposit(self, amount: float) -> None:
         """Increase the account balance by the specified deposit amount.
@@ -34,8 +479,8 @@ class Account:
         if amount <= 0:
             raise ValueError("Deposit amount must be positive")
         
-        self.balance += amount
-        self.transactions.append(("DEPOSIT", None, None, amount))
+        with self._lock:
+            self.ledger.append("DEPOSIT", None, None, amount)
     
     def withdraw(self, amount: float) -> bool:
         """Attempt to withdraw the specified amount from the account balance.
@@ -49,11 +494,11 @@ class Account:
         if amount <= 0:
             raise ValueError("Withdrawal amount must be positive")
         
-        if amount > self.balance:
-            return False
-        
-        self.balance -= amount
-        self.transactions.append(("WITHDRAW", None, None, amount))
+        with self._lock:
+            if amount > self.balance:
+                return False
+            
+            self.ledger.append("WITHDRAW", None, None, amount)
         return True
     
     def buy_shares(self, symbol: str, quantity: int) -> bool:
@@ -66,29 +511,7 @@ class Account:
         Returns:
             True if purchase was successful, False otherwise
         """
-        if quantity <= 0:
-            raise ValueError("Quantity must be positive")
-        
-        price = get_share_price(symbol)
-        if price == 0.0:
-            return False  # Symbol not found
-        
-        total_cost = price * quantity
-        
-        if total_cost > self.balance:
-            return False  # Insufficient funds
-        
-        # Update balance and portfolio
-        self.balance -= total_cost
-        
-        if symbol in self.portfolio:
-            self.portfolio[symbol] += quantity
-        else:
-            self.portfolio[symbol] = quantity
-            
-        # Record transaction
-        self.transactions.append(("BUY", symbol, quantity, price))
-        return True
+        return self.trade("BUY", symbol, quantity) is not None
     
     def sell_shares(self, symbol: str, quantity: int) -> bool:
         """Sell a specified quantity of shares for the given symbol.
@@ -100,30 +523,72 @@ class Account:
         Returns:
             True if sale was successful, False otherwise
         """
+        return self.trade("SELL", symbol, quantity) is not None
+    
+    def trade(self, kind: str, symbol: str, quantity: int) -> Optional[float]:
+        """Buy or sell shares at the current price.
+        
+        Args:
+            kind: BUY or SELL
+            symbol: Stock symbol
+            quantity: Number of shares
+            
+        Returns:
+            The price per share the trade was recorded at, or None if it was rejected
+        """
         if quantity <= 0:
             raise ValueError("Quantity must be positive")
         
         # Check if user has enough shares
-        if symbol not in self.portfolio or self.portfolio[symbol] < quantity:
-            return False
+        if kind == "SELL" and self.portfolio.get(symbol, 0) < quantity:
+            return None
         
-        price = get_share_price(symbol)
+        price = _price_provider.get_price(symbol)
         if price == 0.0:
-            return False  # Symbol not found
+            return None  # Symbol not found
         
-        # Update balance and portfolio
-        total_amount = price * quantity
-        self.balance += total_amount
+        # Checks funds and shares again, another thread may have traded in the meantime
+        return self.execute(kind, symbol, quantity, price)
+    
+    def can_execute(self, kind: str, symbol: str, quantity: int, price: float) -> bool:
+        """Check whether a buy or sell at a given price would be accepted now.
+        
+        Args:
+            kind: BUY or SELL
+            symbol: Stock symbol
+            quantity: Number of shares
+            price: Price per share
+            
+        Returns:
+            True if there are enough funds (BUY) or shares (SELL)
+        """
+        if kind == "BUY":
+            return price * quantity <= self.balance
+        return self.portfolio.get(symbol, 0) >= quantity
+    
+    def execute(self, kind: str, symbol: str, quantity: int, price: float) -> Optional[float]:
+        """Record a buy or sell at a given price, such as a limit order fill.
         
-        self.portfolio[symbol] -= quantity
+        Applies the same funds and shares checks as buy_shares and sell_shares.
         
-        # Remove symbol from portfolio if no shares left
-        if self.portfolio[symbol] == 0:
-            del self.portfolio[symbol]
+        Args:
+            kind: BUY or SELL
+            symbol: Stock symbol
+            quantity: Number of shares
+            price: Price per share
             
-        # Record transaction
-        self.transactions.append(("SELL", symbol, quantity, price))
-        return True
+        Returns:
+            The price per share recorded, or None if the trade was rejected
+        """
+        if kind not in ("BUY", "SELL"):
+            raise ValueError(f"Cannot execute a {kind} transaction")
+        with self._lock:
+            if not self.can_execute(kind, symbol, quantity, price):
+                return None  # Insufficient funds or shares
+            
+            # Record transaction, which updates balance and portfolio
+            self.ledger.append(kind, symbol, quantity, price)
+        return price
     
     def get_portfolio_value(self) -> float:
         """Calculate the current total value of all shares in the portfolio.
@@ -132,10 +597,11 @@ class Account:
             Total portfolio value
         """
         total_value = 0.0
+        holdings = self.get_holdings()
+        prices = get_share_prices(holdings)
         
-        for symbol, quantity in self.portfolio.items():
-            price = get_share_price(symbol)
-            total_value += price * quantity
+        for symbol, quantity in holdings.items():
+            total_value += prices[symbol] * quantity
             
         return total_value
     
@@ -145,21 +611,171 @@ class Account:
         Returns:
             Net profit or loss
         """
-        total_value = self.get_portfolio_value() + self.balance
+        with self._lock:
+            total_value = self.get_portfolio_value() + self.balance
         return total_value - self.initial_deposit
     
+    def snapshot(self) -> Tuple[int, float, dict]:
+        """Read the transaction count, balance and holdings as one consistent state.
+        
+        Returns:
+            Tuple of (number of transactions, balance, copy of holdings)
+        """
+        with self._lock:
+            return len(self.ledger), self.balance, self.portfolio.copy()
+    
+    def subscribe(self, observer: Callable[[Ledger, int], None],
+                  on_snapshot: Optional[Callable[[int, float, dict], None]] = None) -> Tuple[int, float, dict]:
+        """Register a ledger observer, starting from a consistent snapshot.
+        
+        No transaction can be recorded between taking the snapshot and
+        registering the observer, so the observer sees every later entry exactly once.
+        
+        Args:
+            observer: Called with (ledger, index) after each new entry
+            on_snapshot: Optional callback given the snapshot before any new entry is observed
+            
+        Returns:
+            Tuple of (number of transactions, balance, copy of holdings)
+        """
+        with self._lock:
+            snapshot = self.snapshot()
+            if on_snapshot is not None:
+                on_snapshot(*snapshot)
+            self.ledger.observers.append(observer)
+        return snapshot
+    
+    def holdings_at(self, timestamp: float) -> dict:
+        """Return the holdings as they were at a given point in time.
+        
+        Args:
+            timestamp: Point in time, as seconds since the epoch
+            
+        Returns:
+            Dictionary representing holdings at that time
+        """
+        with self._lock:
+            _, positions = self.ledger.state_at(self.ledger.seq_at(timestamp))
+        return positions
+    
+    def profit_or_loss_at(self, timestamp: float, prices: Optional[Dict[str, float]] = None) -> float:
+        """Compute the net profit or loss as it was at a given point in time.
+        
+        Args:
+            timestamp: Point in time, as seconds since the epoch
+            prices: Share prices to value the holdings at; current prices
+                from the price provider are used when omitted
+            
+        Returns:
+            Net profit or loss at that time
+        """
+        with self._lock:
+            balance, positions = self.ledger.state_at(self.ledger.seq_at(timestamp))
+        if prices is None:
+            prices = get_share_prices(positions)
+        portfolio_value = 0.0
+        for symbol, quantity in positions.items():
+            portfolio_value += prices[symbol] * quantity
+        return portfolio_value + balance - self.initial_deposit
+    
     def get_holdings(self) -> dict:
         """Return a copy of the portfolio dictionary.
         
         Returns:
             Dictionary representing current holdings
         """
-        return self.portfolio.copy()
+        with self._lock:
+            return self.portfolio.copy()
     
     def list_transactions(self) -> list:
         """Return a list of all recorded transactions.
         
+        This copies the whole ledger; prefer iter_transactions() or the
+        transactions view for large histories.
+        
         Returns:
             List of transactions
         """
-        return self.transactions.copy()
\ No newline at end of file
+        with self._lock:
+            return list(self.ledger)
+    
+    def iter_transactions(self, start: int = 0, stop: Optional[int] = None) -> Iterator[Transaction]:
+        """Iterate over recorded transactions without copying the ledger.
+        
+        Args:
+            start: Index of the first transaction
+            stop: Index one past the last transaction, or None for the end
+            
+        Returns:
+            Iterator of transactions
+        """
+        return self.ledger.iter_range(start, stop)
+
+
+class AccountRegistry:
+    """A thread-safe collection of accounts keyed by account id.
+
+    The registry lock only guards the id lookup; all work on an account is
+    serialized by that account's own lock. When a storage backend such as
+    persistence.SQLiteAccountStore is given, accounts are created in and
+    loaded from it.
+    """
+
+    def __init__(self, storage=None) -> None:
+        """Initialize an empty registry.
+
+        Args:
+            storage: Optional backend with create_account(), load() and
+                exists() methods
+        """
+        self.storage = storage
+        self._accounts: Dict[str, Account] = {}
+        self._lock = threading.Lock()
+
+    def create(self, account_id: str, initial_deposit: float) -> Account:
+        """Create a new account.
+
+        Args:
+            account_id: Unique identifier for the account
+            initial_deposit: Initial amount of money deposited
+
+        Returns:
+            The new account
+        """
+        with self._lock:
+            if account_id in self._accounts or (
+                    self.storage is not None and self.storage.exists(account_id)):
+                raise ValueError(f"Account {account_id} already exists")
+            if self.storage is not None:
+                account = self.storage.create_account(account_id, initial_deposit)
+            else:
+                account = Account(account_id, initial_deposit)
+            self._accounts[account_id] = account
+            return account
+
+    def get(self, account_id: str) -> Account:
+        """Return an existing account, loading it from storage if needed.
+
+        Args:
+            account_id: Id of the account
+
+        Returns:
+            The account; raises KeyError if it does not exist
+        """
+        account = self._accounts.get(account_id)
+        if account is not None:
+            return account
+        with self._lock:
+            if account_id not in self._accounts:
+                if self.storage is None:
+                    raise KeyError(account_id)
+                self._accounts[account_id] = self.storage.load(account_id)
+            return self._accounts[account_id]
+
+    def __contains__(self, account_id: str) -> bool:
+        if account_id in self._accounts:
+            return True
+        return self.storage is not None and self.storage.exists(account_id)
+
+    def __len__(self) -> int:
+        return len(self._accounts)
@@ -0,0 +1,288 @@
+"""HTTP JSON API for trading accounts, built on asyncio streams.
+
+Run from this directory:
+
+    python api.py --port 8000
+
+Endpoints (request and response bodies are JSON):
+
+    POST /accounts                      {"account_id", "initial_deposit"}
+    GET  /accounts/{id}                 balance, portfolio value and profit or loss
+    POST /accounts/{id}/deposit         {"amount"}
+    POST /accounts/{id}/withdraw        {"amount"}
+    POST /accounts/{id}/buy             {"symbol", "quantity"}
+    POST /accounts/{id}/sell            {"symbol", "quantity"}
+    GET  /accounts/{id}/holdings
+    GET  /accounts/{id}/transactions    ?start=0&limit=100
+
+Invalid input gets 400, unknown accounts 404, and trades or withdrawals the
+account cannot cover 409, each with an {"error": message} body.
+"""
+import argparse
+import asyncio
+import json
+import math
+import sys
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from accounts import Account, AccountRegistry
+
+# Largest request body accepted, in bytes
+MAX_BODY = 64 * 1024
+
+REASONS = {200: "OK", 201: "Created", 400: "Bad Request", 404: "Not Found",
+           405: "Method Not Allowed", 409: "Conflict", 413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+class HTTPError(Exception):
+    """An error response with a status code."""
+
+    def __init__(self, status: int, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+
+
+def _field(body: dict, name: str, kind: type):
+    if name not in body:
+        raise HTTPError(400, f"Missing field: {name}")
+    try:
+        return kind(body[name])
+    except (TypeError, ValueError):
+        raise HTTPError(400, f"Invalid {name}: {body[name]!r}")
+
+
+def _amount(body: dict, name: str) -> float:
+    amount = _field(body, name, float)
+    # float() also accepts "nan" and "inf", which no balance check would catch
+    if not math.isfinite(amount) or amount <= 0:
+        raise HTTPError(400, f"Invalid {name}: {body[name]!r} is not a positive amount")
+    return amount
+
+
+def _transaction(transaction) -> dict:
+    kind, symbol, quantity, price = transaction
+    if symbol is None:
+        return {"type": kind, "amount": price}
+    return {"type": kind, "symbol": symbol, "quantity": quantity, "price": price}
+
+
+class AccountAPI:
+    """Routes API requests to the accounts of a registry."""
+
+    def __init__(self, registry: Optional[AccountRegistry] = None) -> None:
+        """Initialize the API.
+
+        Args:
+            registry: Accounts to serve, a new empty registry by default
+        """
+        self.registry = registry if registry is not None else AccountRegistry()
+        self.requests = 0
+
+    def _account(self, account_id: str) -> Account:
+        try:
+            return self.registry.get(account_id)
+        except KeyError:
+            raise HTTPError(404, f"Account {account_id} not found")
+
+    def handle(self, method: str, target: str, body: dict) -> Tuple[int, dict]:
+        """Handle one request.
+
+        Args:
+            method: HTTP method
+            target: Request path and query string
+            body: Parsed JSON body, empty for GET requests
+
+        Returns:
+            Tuple of (status, response body)
+        """
+        self.requests += 1
+        url = urlsplit(target)
+        parts = [part for part in url.path.split("/") if part]
+        if not parts or parts[0] != "accounts" or len(parts) > 3:
+            raise HTTPError(404, f"No such endpoint: {url.path}")
+
+        if len(parts) == 1:
+            if method != "POST":
+                raise HTTPError(405, "Use POST to create an account")
+            return self.create(body)
+
+        account = self._account(parts[1])
+        action = parts[2] if len(parts) == 3 else "summary"
+        if action in ("summary", "holdings", "transactions"):
+            if method != "GET":
+                raise HTTPError(405, f"Use GET for {action}")
+            if action == "transactions":
+                return 200, self.transactions(account, parse_qs(url.query))
+            return 200, self.summary(account) if action == "summary" else {"holdings": account.get_holdings()}
+        if action not in ("deposit", "withdraw", "buy", "sell"):
+            raise HTTPError(404, f"No such endpoint: {url.path}")
+        if method != "POST":
+            raise HTTPError(405, f"Use POST for {action}")
+        return getattr(self, action)(account, body)
+
+    def create(self, body: dict) -> Tuple[int, dict]:
+        account_id = _field(body, "account_id", str)
+        initial_deposit = _amount(body, "initial_deposit")
+        try:
+            account = self.registry.create(account_id, initial_deposit)
+        except ValueError as e:
+            raise HTTPError(409 if account_id in self.registry else 400, str(e))
+        return 201, {"account_id": account.account_id, "balance": account.balance}
+
+    def summary(self, account: Account) -> dict:
+        with account.lock:
+            balance = account.balance
+            portfolio_value = account.get_portfolio_value()
+        return {
+            "account_id": account.account_id,
+            "balance": balance,
+            "initial_deposit": account.initial_deposit,
+            "portfolio_value": portfolio_value,
+            "profit_or_loss": portfolio_value + balance - account.initial_deposit,
+        }
+
+    def transactions(self, account: Account, query: Dict[str, List[str]]) -> dict:
+        try:
+            start = int(query.get("start", ["0"])[0])
+            limit = int(query.get("limit", ["100"])[0])
+        except ValueError:
+            raise HTTPError(400, "start and limit must be integers")
+        if start < 0 or limit < 0:
+            raise HTTPError(400, "start and limit must not be negative")
+        with account.lock:
+            count = len(account.transactions)
+            entries = [_transaction(entry) for entry in account.iter_transactions(start, start + limit)]
+        return {"count": count, "start": start, "transactions": entries}
+
+    def deposit(self, account: Account, body: dict) -> Tuple[int, dict]:
+        try:
+            account.deposit(_amount(body, "amount"))
+        except ValueError as e:
+            raise HTTPError(400, str(e))
+        return 200, {"balance": account.balance}
+
+    def withdraw(self, account: Account, body: dict) -> Tuple[int, dict]:
+        try:
+            if not account.withdraw(_amount(body, "amount")):
+                raise HTTPError(409, "Insufficient funds")
+        except ValueError as e:
+            raise HTTPError(400, str(e))
+        return 200, {"balance": account.balance}
+
+    def buy(self, account: Account, body: dict) -> Tuple[int, dict]:
+        return self._trade(account, body, account.buy_shares, "Insufficient funds or unknown symbol")
+
+    def sell(self, account: Account, body: dict) -> Tuple[int, dict]:
+        return self._trade(account, body, account.sell_shares, "Not enough shares held")
+
+    def _trade(self, account: Account, body: dict, trade, refusal: str) -> Tuple[int, dict]:
+        symbol = _field(body, "symbol", str).upper()
+        quantity = _field(body, "quantity", int)
+        try:
+            if not trade(symbol, quantity):
+                raise HTTPError(409, refusal)
+        except ValueError as e:
+            raise HTTPError(400, str(e))
+        return 200, {"balance": account.balance, "position": account.portfolio.get(symbol, 0)}
+
+
+def _response(status: int, payload: dict, keep_alive: bool) -> bytes:
+    body = json.dumps(payload).encode()
+    head = (f"HTTP/1.1 {status} {REASONS.get(status, 'Error')}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+    return head.encode() + body
+
+
+async def _serve_connection(api: AccountAPI, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    try:
+        while True:
+            request_line = await reader.readline()
+            if not request_line:
+                break
+            try:
+                method, target, version = request_line.decode("latin-1").split()
+            except ValueError:
+                writer.write(_response(400, {"error": "Malformed request line"}, False))
+                break
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+            keep_alive = headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+
+            try:
+                length = int(headers.get("content-length") or 0)
+                if length < 0:
+                    raise ValueError(length)
+            except ValueError:
+                # Without a length the body cannot be told apart from the next request
+                writer.write(_response(400, {"error": "Invalid Content-Length"}, False))
+                break
+            if length > MAX_BODY:
+                writer.write(_response(413, {"error": "Request body too large"}, False))
+                break
+            raw = await reader.readexactly(length) if length else b""
+            try:
+                body = json.loads(raw) if raw else {}
+                if not isinstance(body, dict):
+                    raise HTTPError(400, "Request body must be a JSON object")
+                status, payload = api.handle(method, target, body)
+            except json.JSONDecodeError:
+                status, payload = 400, {"error": "Request body is not valid JSON"}
+            except HTTPError as e:
+                status, payload = e.status, {"error": str(e)}
+            except Exception as e:
+                status, payload = 500, {"error": f"{type(e).__name__}: {e}"}
+            writer.write(_response(status, payload, keep_alive))
+            await writer.drain()
+            if not keep_alive:
+                break
+    except (asyncio.IncompleteReadError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+
+async def start_server(api: Optional[AccountAPI] = None, host: str = "127.0.0.1",
+                       port: int = 8000) -> asyncio.AbstractServer:
+    """Start serving the API on the running event loop.
+
+    Args:
+        api: API to serve, one with an empty registry by default
+        host: Interface to listen on
+        port: Port to listen on, 0 for any free port
+
+    Returns:
+        The listening server
+    """
+    api = api if api is not None else AccountAPI()
+    return await asyncio.start_server(lambda reader, writer: _serve_connection(api, reader, writer), host, port)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Serve the accounts HTTP JSON API")
+    parser.add_argument("--host", default="127.0.0.1", help="interface to listen on (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8000, help="port to listen on (default: 8000)")
+    args = parser.parse_args(argv)
+
+    async def serve() -> None:
+        server = await start_server(host=args.host, port=args.port)
+        print(f"Serving on http://{args.host}:{server.sockets[0].getsockname()[1]}")
+        async with server:
+            await server.serve_forever()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,57 +1,110 @@
+import atexit
+import os
+
 import gradio as gr
-from accounts import Account, get_share_price
+from accounts import AccountRegistry, CachedPriceProvider, get_price_provider, get_share_prices, set_price_provider
+from persistence import SQLiteAccountStore
+from risk import PriceHistory, risk_report
+
+# Serve repeated price lookups from a short-lived cache
+set_price_provider(CachedPriceProvider(get_price_provider(), ttl=5.0))
+
+# Accounts shared by all sessions and kept in ACCOUNTS_DB across restarts;
+# each session remembers the id of its own account
+store = SQLiteAccountStore(os.environ.get("ACCOUNTS_DB", "accounts.db"))
+atexit.register(store.close)
+accounts = AccountRegistry(store)
+
+# Number of callbacks Gradio runs in parallel
+CONCURRENCY_LIMIT = 16
+
+# Transactions shown per page of the history table
+HISTORY_PAGE_SIZE = 50
+HISTORY_HEADERS = ["#", "Type", "Symbol", "Quantity", "Price ($)", "Total ($)"]
+
+RISK_HEADERS = ["Symbol", "Position", "Average Cost ($)", "Realized P&L ($)", "Unrealized P&L ($)"]
 
-# Create a single account for the demo
-account = None
+# Rendered account summary and holdings, keyed by account id
+_render_cache = {}
 
-def initialize_account(account_id, initial_deposit):
-    global account
+def session_account(account_id):
+    """Return the account of the current session, or None if it has not created one."""
+    if not account_id:
+        return None
+    try:
+        return accounts.get(account_id)
+    except KeyError:
+        return None
+
+def saved(message):
+    """Add a warning to a result while recorded transactions could not be written to the database."""
+    try:
+        store.check()
+    except Exception as e:
+        return f"{message}\n⚠️ Warning: not saved to disk yet, retrying ({e})"
+    return message
+
+def initialize_account(account_id, initial_deposit, session_account_id=None):
     try:
         initial_deposit = float(initial_deposit)
         if initial_deposit <= 0:
-            return f"❌ Error: Initial deposit must be positive"
-        account = Account(account_id, initial_deposit)
-        return f"✅ Account {account_id} created with initial deposit of ${initial_deposit:.2f}"
+            return f"❌ Error: Initial deposit must be positive", session_account_id
     except ValueError:
-        return f"❌ Error: Please enter a valid number for initial deposit"
+        return f"❌ Error: Please enter a valid number for initial deposit", session_account_id
+    try:
+        accounts.create(account_id, initial_deposit)
+    except ValueError as e:
+        return f"❌ Error: {str(e)}", session_account_id
+    return saved(f"✅ Account {account_id} created with initial deposit of ${initial_deposit:.2f}"), account_id
+
+def open_account(account_id, session_account_id=None):
+    """Continue with an account created earlier, e.g. before the app was restarted."""
+    if not account_id:
+        return "❌ Error: Please enter an account ID", session_account_id
+    account = session_account(account_id)
+    if account is None:
+        return f"❌ Error: Account {account_id} not found", session_account_id
+    return f"✅ Opened account {account_id}. Balance: ${account.balance:.2f}", account_id
 
-def deposit_funds(amount):
-    global account
+def deposit_funds(amount, account_id=None):
+    account = session_account(account_id)
     if account is None:
         return "❌ Error: Please create an account first"
     
     try:
         amount = float(amount)
         account.deposit(amount)
-        return f"✅ Deposited ${amount:.2f}. New balance: ${account.balance:.2f}"
+        return saved(f"✅ Deposited ${amount:.2f}. New balance: ${account.balance:.2f}")
     except ValueError as e:
         return f"❌ Error: {str(e)}"
 
-def withdraw_funds(amount):
-    global account
+def withdraw_funds(amount, account_id=None):
+    account = session_account(account_id)
     if account is None:
         return "❌ Error: Please create an account first"
     
     try:
         amount = float(amount)
         if account.withdraw(amount):
-            return f"✅ Withdrew ${amount:.2f}. New balance: ${account.balance:.2f}"
+            return saved(f"✅ Withdrew ${amount:.2f}. New balance: ${account.balance:.2f}")
         else:
             return f"❌ Error: Insufficient funds. Current balance: ${account.balance:.2f}"
     except ValueError as e:
         return f"❌ Error: {str(e)}"
 
-def buy_stock(symbol, quantity):
-    global account
+def buy_stock(symbol, quantity, account_id=None):
+    account = session_account(account_id)
     if account is None:
         return "❌ Error: Please create an account first"
     
     try:
         quantity = int(quantity)
-        if account.buy_shares(symbol.upper(), quantity):
-            return f"✅ Bought {quantity} shares of {symbol.upper()} at ${get_share_price(symbol.upper()):.2f} per share.\nNew balance: ${account.balance:.2f}"
+        # The fill price comes from the trade itself, another session may trade the same account meanwhile
+        price = account.trade("BUY", symbol.upper(), quantity)
+        if price is not None:
+            return saved(f"✅ Bought {quantity} shares of {symbol.upper()} at ${price:.2f} per share.\nNew balance: ${account.balance:.2f}")
         else:
-            price = get_share_price(symbol.upper())
+            price = get_price_provider().get_price(symbol.upper())
             if price == 0.0:
                 return f"❌ Error: Symbol {symbol.upper()} not found"
             else:
@@ -59,15 +112,16 @@ def buy_stock(symbol, quantity):
     except ValueError as e:
         return f"❌ Error: {str(e)}"
 
-def sell_stock(symbol, quantity):
-    global account
+def sell_stock(symbol, quantity, account_id=None):
+    account = session_account(account_id)
     if account is None:
         return "❌ Error: Please create an account first"
     
     try:
         quantity = int(quantity)
-        if account.sell_shares(symbol.upper(), quantity):
-            return f"✅ Sold {quantity} shares of {symbol.upper()} at ${get_share_price(symbol.upper()):.2f} per share.\nNew balance: ${account.balance:.2f}"
+        price = account.trade("SELL", symbol.upper(), quantity)
+        if price is not None:
+            return saved(f"✅ Sold {quantity} shares of {symbol.upper()} at ${price:.2f} per share.\nNew balance: ${account.balance:.2f}")
         else:
             if symbol.upper() not in account.portfolio:
                 return f"❌ Error: You don't own any shares of {symbol.upper()}"
@@ -76,64 +130,130 @@ def sell_stock(symbol, quantity):
     except ValueError as e:
         return f"❌ Error: {str(e)}"
 
-def get_account_summary():
-    global account
-    if account is None:
-        return "❌ Error: Please create an account first"
+def _render_account(account):
+    """Return (summary, holdings) text for an account.
     
-    portfolio_value = account.get_portfolio_value()
-    profit_loss = account.get_profit_or_loss()
+    The text is cached per account and rendered again only when a transaction
+    has been recorded or the price of a held share has changed, so refreshing
+    costs one bulk price lookup regardless of the length of the history.
+    """
+    seq, balance, holdings = account.snapshot()
+    prices = get_share_prices(holdings)
+    key = (seq, tuple(prices[symbol] for symbol in holdings))
+    cached = _render_cache.get(account.account_id)
+    if cached is not None and cached[0] == key:
+        return cached[1], cached[2]
     
-    summary = f"Account ID: {account.account_id}\n"
-    summary += f"Cash Balance: ${account.balance:.2f}\n"
-    summary += f"Initial Deposit: ${account.initial_deposit:.2f}\n"
-    summary += f"Portfolio Value: ${portfolio_value:.2f}\n"
-    summary += f"Total Value: ${(account.balance + portfolio_value):.2f}\n"
-    summary += f"Profit/Loss: ${profit_loss:.2f} "
+    portfolio_value = 0.0
+    lines = ["Current Holdings:"]
+    for symbol, quantity in holdings.items():
+        price = prices[symbol]
+        value = price * quantity
+        portfolio_value += value
+        lines.append(f"{symbol}: {quantity} shares @ ${price:.2f} = ${value:.2f}")
+    portfolio = "\n".join(lines) + "\n" if holdings else "No stocks in portfolio."
+    profit_loss = portfolio_value + balance - account.initial_deposit
     
+    summary = "\n".join([
+        f"Account ID: {account.account_id}",
+        f"Cash Balance: ${balance:.2f}",
+        f"Initial Deposit: ${account.initial_deposit:.2f}",
+        f"Portfolio Value: ${portfolio_value:.2f}",
+        f"Total Value: ${(balance + portfolio_value):.2f}",
+        f"Profit/Loss: ${profit_loss:.2f} ",
+    ])
     if profit_loss > 0:
         summary += "📈"
     elif profit_loss < 0:
         summary += "📉"
     
-    return summary
+    _render_cache[account.account_id] = (key, summary, portfolio)
+    return summary, portfolio
 
-def get_portfolio():
-    global account
+def get_account_summary(account_id=None):
+    account = session_account(account_id)
     if account is None:
         return "❌ Error: Please create an account first"
+    return _render_account(account)[0]
+
+def get_portfolio(account_id=None):
+    account = session_account(account_id)
+    if account is None:
+        return "❌ Error: Please create an account first"
+    return _render_account(account)[1]
+
+def get_transaction_history(page=1, account_id=None):
+    """Return one page of the transaction history, newest first, and a page caption."""
+    account = session_account(account_id)
+    if account is None:
+        return [], "❌ Error: Please create an account first"
     
-    if not account.portfolio:
-        return "No stocks in portfolio."
+    count = len(account.transactions)
+    if count == 0:
+        return [], "No transactions recorded."
     
-    portfolio = "Current Holdings:\n"
-    for symbol, quantity in account.portfolio.items():
-        price = get_share_price(symbol)
-        value = price * quantity
-        portfolio += f"{symbol}: {quantity} shares @ ${price:.2f} = ${value:.2f}\n"
+    pages = (count + HISTORY_PAGE_SIZE - 1) // HISTORY_PAGE_SIZE
+    page = min(max(int(page or 1), 1), pages)
+    stop = count - (page - 1) * HISTORY_PAGE_SIZE
+    start = max(stop - HISTORY_PAGE_SIZE, 0)
+    
+    rows = []
+    for idx, (transaction_type, symbol, quantity, price) in enumerate(account.iter_transactions(start, stop), start + 1):
+        if transaction_type in ("DEPOSIT", "WITHDRAW"):
+            rows.append([idx, transaction_type, "", "", round(price, 2), round(price, 2)])
+        else:
+            rows.append([idx, transaction_type, symbol, quantity, round(price, 2), round(quantity * price, 2)])
+    rows.reverse()
     
-    return portfolio
+    return rows, f"Page {page} of {pages} ({count} transactions, newest first)"
 
-def get_transaction_history():
-    global account
+def refresh_account_information(page=1, account_id=None):
+    account = session_account(account_id)
     if account is None:
-        return "❌ Error: Please create an account first"
+        error = "❌ Error: Please create an account first"
+        return error, error, [], error
+    summary, portfolio = _render_account(account)
+    rows, caption = get_transaction_history(page, account_id)
+    return summary, portfolio, rows, caption
+
+def get_risk_analysis(price_file=None, window=20, confidence=95, account_id=None):
+    """Return a risk summary and per-symbol P&L rows for the session's account.
     
-    if not account.transactions:
-        return "No transactions recorded."
+    Without a price history file, the account is valued at the prices it
+    traded at, followed by the current prices.
+    """
+    account = session_account(account_id)
+    if account is None:
+        return "❌ Error: Please create an account first", []
     
-    history = "Transaction History:\n"
-    for idx, (transaction_type, symbol, quantity, price) in enumerate(account.transactions, 1):
-        if transaction_type == "DEPOSIT":
-            history += f"{idx}. DEPOSIT: ${price:.2f}\n"
-        elif transaction_type == "WITHDRAW":
-            history += f"{idx}. WITHDRAW: ${price:.2f}\n"
-        elif transaction_type == "BUY":
-            history += f"{idx}. BUY: {quantity} shares of {symbol} @ ${price:.2f} = ${quantity * price:.2f}\n"
-        elif transaction_type == "SELL":
-            history += f"{idx}. SELL: {quantity} shares of {symbol} @ ${price:.2f} = ${quantity * price:.2f}\n"
+    try:
+        window = int(window or 20)
+        confidence = float(confidence or 95) / 100
+        prices = None
+        if price_file:
+            history = PriceHistory.from_csv(price_file)
+        else:
+            with account.lock:
+                prices = get_share_prices(account.ledger.symbols)
+                history = PriceHistory.from_trades(account.ledger, prices)
+        # Rows are trades or price file rows rather than days, so the Sharpe ratio is left per period
+        report = risk_report(account, history, window=window, confidence=confidence, periods_per_year=1,
+                             prices=prices)
+    except (OSError, KeyError, ValueError) as e:
+        return f"❌ Error: {str(e)}", []
     
-    return history
+    volatility = f"{report.volatility[-1]:.2%}" if len(report.volatility) else "n/a (too few periods)"
+    summary = "\n".join([
+        f"Periods: {len(report.equity)}",
+        f"Final Equity: ${report.equity[-1]:.2f}",
+        f"Max Drawdown: {report.max_drawdown:.2%}",
+        f"Volatility ({window} periods): {volatility}",
+        f"Sharpe Ratio (per period): {report.sharpe_ratio:.2f}",
+        f"Value at Risk ({confidence:.0%}): {report.value_at_risk:.2%}",
+    ])
+    rows = [[entry.symbol, entry.position, round(entry.average_cost, 2), round(entry.realized, 2),
+             round(entry.unrealized, 2)] for entry in report.symbols]
+    return summary, rows
 
 def get_available_stocks():
     stocks = "Available Stocks for Demo:\n"
@@ -146,17 +266,28 @@ with gr.Blocks(title="Trading Simulation Platform") as demo:
     gr.Markdown("# Trading Simulation Platform")
     gr.Markdown("A simple demo of a trading account management system")
     
+    # Id of the account created or opened in this browser session
+    session_account_id = gr.State(None)
+    
     with gr.Tab("Create Account"):
         with gr.Row():
             account_id_input = gr.Textbox(label="Account ID")
             initial_deposit_input = gr.Textbox(label="Initial Deposit ($)")
-        create_account_btn = gr.Button("Create Account")
+        with gr.Row():
+            create_account_btn = gr.Button("Create Account")
+            open_account_btn = gr.Button("Open Existing Account")
         create_account_output = gr.Textbox(label="Result", lines=2)
         
         create_account_btn.click(
             initialize_account,
-            inputs=[account_id_input, initial_deposit_input],
-            outputs=create_account_output
+            inputs=[account_id_input, initial_deposit_input, session_account_id],
+            outputs=[create_account_output, session_account_id]
+        )
+        
+        open_account_btn.click(
+            open_account,
+            inputs=[account_id_input, session_account_id],
+            outputs=[create_account_output, session_account_id]
         )
     
     with gr.Tab("Deposit/Withdraw"):
@@ -173,13 +304,13 @@ with gr.Blocks(title="Trading Simulation Platform") as demo:
         
         deposit_btn.click(
             deposit_funds,
-            inputs=[deposit_amount],
+            inputs=[deposit_amount, session_account_id],
             outputs=deposit_output
         )
         
         withdraw_btn.click(
             withdraw_funds,
-            inputs=[withdraw_amount],
+            inputs=[withdraw_amount, session_account_id],
             outputs=withdraw_output
         )
     
@@ -201,13 +332,13 @@ with gr.Blocks(title="Trading Simulation Platform") as demo:
         
         buy_btn.click(
             buy_stock,
-            inputs=[buy_symbol, buy_quantity],
+            inputs=[buy_symbol, buy_quantity, session_account_id],
             outputs=buy_output
         )
         
         sell_btn.click(
             sell_stock,
-            inputs=[sell_symbol, sell_quantity],
+            inputs=[sell_symbol, sell_quantity, session_account_id],
             outputs=sell_output
         )
     
@@ -221,13 +352,40 @@ with gr.Blocks(title="Trading Simulation Platform") as demo:
             with gr.Column():
                 holdings = gr.Textbox(label="Current Holdings", lines=7)
         
-        transactions = gr.Textbox(label="Transaction History", lines=10)
+        with gr.Row():
+            history_page = gr.Number(label="History Page", value=1, precision=0, minimum=1)
+            history_caption = gr.Markdown()
+        transactions = gr.Dataframe(headers=HISTORY_HEADERS, label="Transaction History", interactive=False)
         
         refresh_btn.click(
-            lambda: [get_account_summary(), get_portfolio(), get_transaction_history()],
-            inputs=None,
-            outputs=[account_summary, holdings, transactions]
+            refresh_account_information,
+            inputs=[history_page, session_account_id],
+            outputs=[account_summary, holdings, transactions, history_caption]
+        )
+        
+        history_page.change(
+            get_transaction_history,
+            inputs=[history_page, session_account_id],
+            outputs=[transactions, history_caption]
+        )
+
+    with gr.Tab("Risk Analysis"):
+        with gr.Row():
+            risk_prices = gr.File(label="Price History CSV (symbol, price, timestamp)", type="filepath")
+            with gr.Column():
+                risk_window = gr.Number(label="Volatility Window (periods)", value=20, precision=0, minimum=2)
+                risk_confidence = gr.Number(label="VaR Confidence (%)", value=95, minimum=50, maximum=99.9)
+        risk_btn = gr.Button("Analyze Risk")
+        risk_summary = gr.Textbox(label="Risk Summary", lines=6)
+        risk_symbols = gr.Dataframe(headers=RISK_HEADERS, label="Profit/Loss by Symbol", interactive=False)
+        
+        risk_btn.click(
+            get_risk_analysis,
+            inputs=[risk_prices, risk_window, risk_confidence, session_account_id],
+            outputs=[risk_summary, risk_symbols]
         )
 
+demo.queue(default_concurrency_limit=CONCURRENCY_LIMIT)
+
 if __name__ == "__main__":
     demo.launch()
\ No newline at end of file
@@ -0,0 +1,160 @@
+from typing import List, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+from accounts import Account
+
+
+class BacktestResult(NamedTuple):
+    """Outcome of replaying orders for many accounts over a price history.
+
+    Shapes use T time steps, A accounts and S symbols.
+    """
+    balances: np.ndarray        # (A,) final cash balances
+    positions: np.ndarray       # (A, S) final shares held
+    equity: np.ndarray          # (T, A) portfolio value plus balance after each step
+    rejected: np.ndarray        # (T, A, S) orders refused for lack of funds, shares or price
+    cash_rejected: np.ndarray   # (T, A) withdrawals refused for lack of funds
+    initial_deposits: np.ndarray  # (A,)
+
+    def profit_or_loss(self) -> np.ndarray:
+        """Return the (T, A) profit or loss against the initial deposit after each step."""
+        return self.equity - self.initial_deposits
+
+
+def _validate(prices, orders, initial_deposits, cash):
+    prices = np.asarray(prices, dtype=np.float64)
+    orders = np.asarray(orders, dtype=np.int64)
+    if prices.ndim != 2:
+        raise ValueError("Prices must be a (time, symbol) matrix")
+    steps, symbols = prices.shape
+    if orders.ndim != 3 or orders.shape[0] != steps or orders.shape[2] != symbols:
+        raise ValueError("Orders must be a (time, account, symbol) array matching the prices")
+    count = orders.shape[1]
+    initial_deposits = np.broadcast_to(np.asarray(initial_deposits, dtype=np.float64), (count,)).copy()
+    if cash is not None:
+        cash = np.asarray(cash, dtype=np.float64)
+        if cash.shape != (steps, count):
+            raise ValueError("Cash flows must be a (time, account) matrix")
+    return prices, orders, initial_deposits, cash
+
+
+def run_backtest(prices, orders, initial_deposits, cash=None) -> BacktestResult:
+    """Replay share orders for many accounts at once over a price history.
+
+    At each time step, every account first applies its cash flow (a deposit if
+    positive, a withdrawal if negative), then its orders symbol by symbol in
+    column order: a positive quantity buys and a negative one sells at that
+    step's price. The rules are those of Account: no overdraft, no selling
+    more shares than held, and no trading a symbol whose price is 0.0. Work is
+    vectorized across accounts, so the result is identical to replay_accounts().
+
+    Args:
+        prices: (T, S) share prices
+        orders: (T, A, S) signed share quantities
+        initial_deposits: Initial deposit of each account, or one for all
+        cash: Optional (T, A) deposits (positive) and withdrawals (negative)
+
+    Returns:
+        Balances, positions, equity curves and rejections
+    """
+    prices, orders, initial_deposits, cash = _validate(prices, orders, initial_deposits, cash)
+    steps, count, symbols = orders.shape
+
+    balances = initial_deposits.copy()
+    positions = np.zeros((count, symbols), dtype=np.int64)
+    equity = np.empty((steps, count), dtype=np.float64)
+    rejected = np.zeros((steps, count, symbols), dtype=bool)
+    cash_rejected = np.zeros((steps, count), dtype=bool)
+
+    for step in range(steps):
+        if cash is not None:
+            flow = cash[step]
+            deposit = flow > 0
+            balances[deposit] += flow[deposit]
+            amount = -flow
+            withdraw = flow < 0
+            allowed = withdraw & (amount <= balances)
+            balances[allowed] -= amount[allowed]
+            cash_rejected[step] = withdraw & ~allowed
+
+        for column in range(symbols):
+            quantity = orders[step, :, column]
+            buy = quantity > 0
+            sell = quantity < 0
+            if not (buy.any() or sell.any()):
+                continue
+            price = prices[step, column]
+            if price == 0.0:
+                rejected[step, :, column] = buy | sell
+                continue
+            total = price * np.abs(quantity)
+            bought = buy & (total <= balances)
+            sold = sell & (positions[:, column] >= -quantity)
+            balances[bought] -= total[bought]
+            balances[sold] += total[sold]
+            positions[:, column] += np.where(bought | sold, quantity, 0)
+            rejected[step, :, column] = (buy & ~bought) | (sell & ~sold)
+
+        value = np.zeros(count, dtype=np.float64)
+        for column in range(symbols):
+            value += positions[:, column] * prices[step, column]
+        equity[step] = value + balances
+
+    return BacktestResult(balances, positions, equity, rejected, cash_rejected, initial_deposits)
+
+
+def replay_accounts(prices, orders, initial_deposits, cash=None,
+                    symbols: Optional[Sequence[str]] = None) -> BacktestResult:
+    """Replay the same inputs as run_backtest() one Account call at a time.
+
+    This is the scalar reference the vectorized backtest is checked against,
+    and is far slower.
+
+    Args:
+        prices: (T, S) share prices
+        orders: (T, A, S) signed share quantities
+        initial_deposits: Initial deposit of each account, or one for all
+        cash: Optional (T, A) deposits (positive) and withdrawals (negative)
+        symbols: Names for the S symbols, S0, S1, ... by default
+
+    Returns:
+        Balances, positions, equity curves and rejections
+    """
+    prices, orders, initial_deposits, cash = _validate(prices, orders, initial_deposits, cash)
+    steps, count, width = orders.shape
+    names: List[str] = list(symbols) if symbols is not None else [f"S{column}" for column in range(width)]
+    accounts = [Account(f"backtest{index}", float(deposit)) for index, deposit in enumerate(initial_deposits)]
+
+    equity = np.empty((steps, count), dtype=np.float64)
+    rejected = np.zeros((steps, count, width), dtype=bool)
+    cash_rejected = np.zeros((steps, count), dtype=bool)
+
+    for step in range(steps):
+        for index, account in enumerate(accounts):
+            if cash is not None:
+                flow = float(cash[step, index])
+                if flow > 0:
+                    account.deposit(flow)
+                elif flow < 0:
+                    cash_rejected[step, index] = not account.withdraw(-flow)
+            for column in range(width):
+                quantity = int(orders[step, index, column])
+                if quantity == 0:
+                    continue
+                price = float(prices[step, column])
+                kind = "BUY" if quantity > 0 else "SELL"
+                # Price 0.0 means the symbol is not found, as in buy_shares and sell_shares
+                ok = price != 0.0 and account.execute(kind, names[column], abs(quantity), price) is not None
+                rejected[step, index, column] = not ok
+
+            value = 0.0
+            holdings = account.get_holdings()
+            for column in range(width):
+                value += holdings.get(names[column], 0) * float(prices[step, column])
+            equity[step, index] = value + account.balance
+
+    balances = np.array([account.balance for account in accounts], dtype=np.float64)
+    positions = np.array([[account.portfolio.get(name, 0) for name in names] for account in accounts],
+                         dtype=np.int64).reshape(count, width)
+    return BacktestResult(balances, positions, equity, rejected, cash_rejected, initial_deposits)
@@ -0,0 +1,310 @@
+"""Benchmarks for the accounts module and the app.py formatting callbacks.
+
+Run from this directory:
+
+    python bench_accounts.py --output bench.json
+    python bench_accounts.py --baseline bench.json --threshold 0.2
+
+Each benchmark reports operations per second (best of --repeat runs). With
+--baseline, the run fails if any benchmark is slower than the baseline by more
+than the threshold fraction, so a regenerated accounts.py can be compared
+against the previous one. Only the public Account API and get_share_price
+are used, so the suite runs against any regenerated accounts.py.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+import accounts
+from accounts import Account
+
+# name -> function(scale) returning (operations, seconds)
+BENCHMARKS: Dict[str, Callable[[float], Tuple[int, float]]] = {}
+
+
+def benchmark(name: str):
+    """Register a benchmark function under a name."""
+    def register(function):
+        BENCHMARKS[name] = function
+        return function
+    return register
+
+
+def _flat_price(symbol: str) -> float:
+    """Local stand-in for get_share_price that prices every symbol at 100.0."""
+    return 100.0
+
+
+def _timed(function: Callable[[], None]) -> float:
+    start = time.perf_counter()
+    function()
+    return time.perf_counter() - start
+
+
+@benchmark("deposit")
+def bench_deposit(scale: float) -> Tuple[int, float]:
+    ops = int(200_000 * scale)
+    account = Account("bench", 1000.0)
+    return ops, _timed(lambda: [account.deposit(1.0) for _ in range(ops)])
+
+
+@benchmark("withdraw")
+def bench_withdraw(scale: float) -> Tuple[int, float]:
+    ops = int(200_000 * scale)
+    account = Account("bench", float(ops))
+    return ops, _timed(lambda: [account.withdraw(1.0) for _ in range(ops)])
+
+
+@benchmark("buy_shares")
+def bench_buy(scale: float) -> Tuple[int, float]:
+    ops = int(100_000 * scale)
+    account = Account("bench", 150.0 * ops)
+    return ops, _timed(lambda: [account.buy_shares("AAPL", 1) for _ in range(ops)])
+
+
+@benchmark("sell_shares")
+def bench_sell(scale: float) -> Tuple[int, float]:
+    ops = int(100_000 * scale)
+    account = Account("bench", 150.0 * ops)
+    account.buy_shares("AAPL", ops)
+    return ops, _timed(lambda: [account.sell_shares("AAPL", 1) for _ in range(ops)])
+
+
+def _bench_portfolio_value(symbols: int, scale: float) -> Tuple[int, float]:
+    ops = max(int(2_000_000 * scale) // symbols, 1)
+    previous = accounts.get_share_price
+    accounts.get_share_price = _flat_price
+    try:
+        account = Account("bench", 100.0 * symbols)
+        for index in range(symbols):
+            account.buy_shares(f"S{index}", 1)
+        return ops, _timed(lambda: [account.get_portfolio_value() for _ in range(ops)])
+    finally:
+        accounts.get_share_price = previous
+
+
+for _symbols in (10, 100, 1_000, 10_000):
+    benchmark(f"get_portfolio_value[{_symbols}]")(
+        lambda scale, symbols=_symbols: _bench_portfolio_value(symbols, scale))
+
+
+def _large_account(entries: int) -> Account:
+    """Build an account with the given number of transactions."""
+    account = Account("bench", 1000.0)
+    for index in range(1, entries):
+        if index % 2:
+            account.buy_shares("AAPL", 1)
+        else:
+            account.sell_shares("AAPL", 1)
+    return account
+
+
+@benchmark("list_transactions[1M]")
+def bench_list_transactions(scale: float) -> Tuple[int, float]:
+    entries = int(1_000_000 * scale)
+    account = _large_account(entries)
+    return entries, _timed(account.list_transactions)
+
+
+@benchmark("iter_transactions[1M]")
+def bench_iter_transactions(scale: float) -> Optional[Tuple[int, float]]:
+    # Not part of every generated accounts.py
+    if not hasattr(Account, "iter_transactions"):
+        return None
+    entries = int(1_000_000 * scale)
+    account = _large_account(entries)
+    return entries, _timed(lambda: sum(1 for _ in account.iter_transactions()))
+
+
+def _random_orders(count: int, accounts_list: list, seed: int = 1) -> list:
+    """Generate limit orders around a price of 100, roughly a third of them crossing."""
+    import random
+    rng = random.Random(seed)
+    orders = []
+    for index in range(count):
+        side = "BUY" if index % 2 else "SELL"
+        offset = rng.randint(-3, 6)
+        price = 100.0 - offset if side == "BUY" else 100.0 + offset
+        orders.append((rng.choice(accounts_list), "AAPL", side, rng.randint(1, 10), price))
+    return orders
+
+
+@benchmark("order_book.submit")
+def bench_order_book(scale: float) -> Tuple[int, float]:
+    from order_book import MatchingEngine
+    ops = int(200_000 * scale)
+    orders = _random_orders(ops, [None])
+    engine = MatchingEngine()
+    return ops, _timed(lambda: [engine.submit(*order) for order in orders])
+
+
+@benchmark("order_book.submit+settle")
+def bench_order_book_settle(scale: float) -> Optional[Tuple[int, float]]:
+    from order_book import MatchingEngine
+    ops = int(200_000 * scale)
+    traders = []
+    for index in range(100):
+        account = Account(f"trader{index}", 1e12)
+        account.buy_shares("AAPL", 10**6)
+        traders.append(account)
+    # Settlement locks each Account, which not every generated accounts.py supports
+    if not hasattr(traders[0], "lock"):
+        return None
+    orders = _random_orders(ops, traders)
+    engine = MatchingEngine()
+    return ops, _timed(lambda: [engine.submit(*order) for order in orders])
+
+
+@benchmark("backtest[252x1000x10]")
+def bench_backtest(scale: float) -> Tuple[int, float]:
+    import numpy as np
+    from backtest import run_backtest
+    count = max(int(1_000 * scale), 1)
+    rng = np.random.default_rng(1)
+    prices = rng.uniform(10.0, 500.0, size=(252, 10))
+    orders = rng.integers(-5, 6, size=(252, count, 10))
+    return orders.size, _timed(lambda: run_backtest(prices, orders, 1e5))
+
+
+def _app_module():
+    """Import app.py, or return None when gradio is not installed."""
+    # Benchmark accounts are not worth keeping
+    os.environ.setdefault("ACCOUNTS_DB", ":memory:")
+    try:
+        import app
+    except ImportError:
+        return None
+    return app
+
+
+def _bench_app(callback: str, scale: float) -> Optional[Tuple[int, float]]:
+    app = _app_module()
+    if app is None:
+        return None
+    ops = int(2_000 * scale)
+    account = app.accounts.create(f"bench-{callback}-{time.time_ns()}", 1e9)
+    for index in range(int(100_000 * scale)):
+        if index % 2:
+            account.buy_shares("AAPL", 1)
+        else:
+            account.deposit(1.0)
+    if callback == "get_account_summary":
+        # Defeat the render cache so the formatting itself is measured
+        run = lambda: (app._render_cache.clear(), app.get_account_summary(account.account_id))
+    elif callback == "get_portfolio":
+        run = lambda: app.get_portfolio(account.account_id)
+    else:
+        run = lambda: app.get_transaction_history(1, account.account_id)
+    return ops, _timed(lambda: [run() for _ in range(ops)])
+
+
+for _callback in ("get_account_summary", "get_portfolio", "get_transaction_history"):
+    benchmark(f"app.{_callback}")(lambda scale, callback=_callback: _bench_app(callback, scale))
+
+
+def run_benchmarks(names: List[str], scale: float = 1.0, repeat: int = 3) -> Dict[str, dict]:
+    """Run benchmarks and return their results keyed by name.
+
+    Args:
+        names: Names of the benchmarks to run
+        scale: Multiplier for the number of operations of each benchmark
+        repeat: Number of runs; the fastest one is reported
+
+    Returns:
+        Dictionary of results, with ``skipped`` set for benchmarks whose
+        dependencies are not installed
+    """
+    results = {}
+    for name in names:
+        best = None
+        for _ in range(repeat):
+            outcome = BENCHMARKS[name](scale)
+            if outcome is None:
+                break
+            ops, seconds = outcome
+            if best is None or seconds < best[1]:
+                best = (ops, seconds)
+        if best is None:
+            results[name] = {"skipped": True}
+        else:
+            ops, seconds = best
+            results[name] = {"ops": ops, "seconds": seconds, "ops_per_sec": ops / seconds if seconds else float("inf")}
+    return results
+
+
+def compare(results: Dict[str, dict], baseline: Dict[str, dict], threshold: float) -> List[str]:
+    """Return a description of every benchmark that regressed beyond the threshold.
+
+    Args:
+        results: Results of the current run
+        baseline: Results of an earlier run
+        threshold: Allowed slowdown as a fraction, e.g. 0.2 for 20%
+
+    Returns:
+        List of regression messages, empty if there are none
+    """
+    regressions = []
+    for name, result in results.items():
+        previous = baseline.get(name)
+        if not previous or result.get("skipped") or previous.get("skipped"):
+            continue
+        ratio = result["ops_per_sec"] / previous["ops_per_sec"]
+        if ratio < 1.0 - threshold:
+            regressions.append(f"{name}: {result['ops_per_sec']:.0f} ops/s vs "
+                               f"{previous['ops_per_sec']:.0f} ops/s baseline ({ratio:.0%})")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the accounts module and app callbacks")
+    parser.add_argument("names", nargs="*", help="benchmarks to run (default: all)")
+    parser.add_argument("--output", help="write results to this JSON file")
+    parser.add_argument("--baseline", help="compare against results in this JSON file")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed slowdown fraction (default: 0.2)")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiplier for operation counts")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per benchmark (default: 3)")
+    parser.add_argument("--list", action="store_true", help="list benchmark names and exit")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        print("\n".join(BENCHMARKS))
+        return 0
+    unknown = [name for name in args.names if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmarks: {', '.join(unknown)}")
+
+    results = run_benchmarks(args.names or list(BENCHMARKS), args.scale, args.repeat)
+    for name, result in results.items():
+        if result.get("skipped"):
+            print(f"{name:40} skipped")
+        else:
+            print(f"{name:40} {result['ops_per_sec']:>14,.0f} ops/s")
+
+    if args.output:
+        report = {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "time": time.time(),
+            "scale": args.scale,
+            "results": results,
+        }
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline["results"], args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,205 @@
+"""Load generator for the accounts HTTP API in api.py.
+
+Run from this directory, against an in-process server:
+
+    python load_test.py --concurrency 64 --requests 20000
+
+or against a server started separately with ``python api.py``:
+
+    python load_test.py --url http://127.0.0.1:8000 --duration 10
+
+Each client opens one keep-alive connection, creates its own account and
+then sends a mix of deposits, withdrawals, trades and queries. The report
+gives throughput and p50/p95/p99 latency per endpoint and overall.
+"""
+import argparse
+import asyncio
+import json
+import math
+import random
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import api
+
+# (weight, method, endpoint) of each request in the mix
+REQUEST_MIX = [
+    (20, "POST", "deposit"),
+    (10, "POST", "withdraw"),
+    (25, "POST", "buy"),
+    (15, "POST", "sell"),
+    (15, "GET", "summary"),
+    (10, "GET", "holdings"),
+    (5, "GET", "transactions"),
+]
+
+SYMBOLS = ["AAPL", "TSLA", "GOOGL"]
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Return a percentile of sorted values, by the nearest-rank method."""
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(fraction * len(sorted_values)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+class _Connection:
+    """A keep-alive HTTP/1.1 client connection."""
+
+    def __init__(self, host: str, port: int) -> None:
+        self.host = host
+        self.port = port
+        self.reader: Optional[asyncio.StreamReader] = None
+        self.writer: Optional[asyncio.StreamWriter] = None
+
+    async def request(self, method: str, path: str, body: Optional[dict] = None) -> Tuple[int, dict]:
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        payload = json.dumps(body).encode() if body is not None else b""
+        self.writer.write(f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\n"
+                          f"Content-Type: application/json\r\nContent-Length: {len(payload)}\r\n\r\n".encode()
+                          + payload)
+        await self.writer.drain()
+        status = int((await self.reader.readline()).split()[1])
+        length = 0
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            if name.strip().lower() == "content-length":
+                length = int(value)
+        return status, json.loads(await self.reader.readexactly(length)) if length else {}
+
+    def close(self) -> None:
+        if self.writer is not None:
+            self.writer.close()
+
+
+async def _client(index: int, host: str, port: int, deadline: Optional[float], counter: List[int],
+                  total: Optional[int], latencies: Dict[str, List[float]], statuses: Dict[int, int],
+                  seed: int) -> None:
+    rng = random.Random(seed + index)
+    weights = [weight for weight, _, _ in REQUEST_MIX]
+    connection = _Connection(host, port)
+    account_id = f"load-{seed}-{index}-{time.time_ns()}"
+    try:
+        await connection.request("POST", "/accounts", {"account_id": account_id, "initial_deposit": 1e6})
+        base = f"/accounts/{account_id}"
+        while True:
+            if deadline is not None and time.perf_counter() >= deadline:
+                break
+            if total is not None:
+                if counter[0] >= total:
+                    break
+                counter[0] += 1
+            _, method, endpoint = rng.choices(REQUEST_MIX, weights)[0]
+            if endpoint in ("deposit", "withdraw"):
+                path, body = f"{base}/{endpoint}", {"amount": rng.randint(1, 1000)}
+            elif endpoint in ("buy", "sell"):
+                path, body = f"{base}/{endpoint}", {"symbol": rng.choice(SYMBOLS), "quantity": rng.randint(1, 5)}
+            elif endpoint == "summary":
+                path, body = base, None
+            elif endpoint == "transactions":
+                path, body = f"{base}/transactions?start=0&limit=20", None
+            else:
+                path, body = f"{base}/{endpoint}", None
+            start = time.perf_counter()
+            status, _ = await connection.request(method, path, body)
+            latencies[endpoint].append(time.perf_counter() - start)
+            statuses[status] = statuses.get(status, 0) + 1
+    finally:
+        connection.close()
+
+
+async def run_load(url: str, concurrency: int = 32, requests: Optional[int] = None,
+                   duration: Optional[float] = None, seed: int = 0) -> dict:
+    """Drive the API with concurrent clients and measure it.
+
+    Args:
+        url: Base URL of the API, e.g. http://127.0.0.1:8000
+        concurrency: Number of clients, each with its own connection and account
+        requests: Total number of requests to send, shared by all clients
+        duration: Seconds to run for, when no request count is given
+
+    Returns:
+        Report with throughput, latency percentiles in milliseconds and status counts
+    """
+    if requests is None and duration is None:
+        raise ValueError("Give a number of requests or a duration")
+    parts = urlsplit(url)
+    latencies: Dict[str, List[float]] = {endpoint: [] for _, _, endpoint in REQUEST_MIX}
+    statuses: Dict[int, int] = {}
+    counter = [0]
+    start = time.perf_counter()
+    deadline = start + duration if requests is None else None
+    await asyncio.gather(*(
+        _client(index, parts.hostname, parts.port or 80, deadline, counter, requests, latencies, statuses, seed)
+        for index in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    def summarize(values: List[float]) -> dict:
+        values = sorted(values)
+        return {
+            "requests": len(values),
+            "p50_ms": percentile(values, 0.50) * 1000,
+            "p95_ms": percentile(values, 0.95) * 1000,
+            "p99_ms": percentile(values, 0.99) * 1000,
+        }
+
+    everything = [value for values in latencies.values() for value in values]
+    return {
+        "concurrency": concurrency,
+        "seconds": elapsed,
+        "throughput": len(everything) / elapsed if elapsed else 0.0,
+        "overall": summarize(everything),
+        "endpoints": {endpoint: summarize(values) for endpoint, values in latencies.items()},
+        "statuses": {str(status): count for status, count in sorted(statuses.items())},
+    }
+
+
+async def _run_local(concurrency: int, requests: Optional[int], duration: Optional[float], seed: int) -> dict:
+    server = await api.start_server(port=0)
+    port = server.sockets[0].getsockname()[1]
+    try:
+        return await run_load(f"http://127.0.0.1:{port}", concurrency, requests, duration, seed)
+    finally:
+        server.close()
+        await server.wait_closed()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Load test the accounts HTTP API")
+    parser.add_argument("--url", help="base URL of a running API (default: start one in this process)")
+    parser.add_argument("--concurrency", type=int, default=32, help="number of concurrent clients (default: 32)")
+    parser.add_argument("--requests", type=int, help="total number of requests to send")
+    parser.add_argument("--duration", type=float, default=10.0,
+                        help="seconds to run for when --requests is not given (default: 10)")
+    parser.add_argument("--seed", type=int, default=0, help="random seed of the request mix")
+    parser.add_argument("--output", help="write the report to this JSON file")
+    args = parser.parse_args(argv)
+
+    duration = None if args.requests is not None else args.duration
+    if args.url:
+        report = asyncio.run(run_load(args.url, args.concurrency, args.requests, duration, args.seed))
+    else:
+        report = asyncio.run(_run_local(args.concurrency, args.requests, duration, args.seed))
+
+    print(f"{report['overall']['requests']} requests in {report['seconds']:.2f}s "
+          f"with {args.concurrency} clients: {report['throughput']:,.0f} req/s")
+    print(f"{'endpoint':14} {'requests':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for name, stats in [("overall", report["overall"])] + list(report["endpoints"].items()):
+        print(f"{name:14} {stats['requests']:>9} {stats['p50_ms']:>9.2f} {stats['p95_ms']:>9.2f} {stats['p99_ms']:>9.2f}")
+    print("status codes: " + ", ".join(f"{status}: {count}" for status, count in report["statuses"].items()))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
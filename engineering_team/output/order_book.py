@@ -0,0 +1,340 @@
+import heapq
+import itertools
+from collections import deque
+from typing import Callable, Deque, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from accounts import Account
+
+BUY, SELL = "BUY", "SELL"
+
+OPEN, FILLED, CANCELLED, REJECTED = "OPEN", "FILLED", "CANCELLED", "REJECTED"
+
+
+class Order:
+    """A limit order to buy or sell shares of one symbol."""
+
+    __slots__ = ("order_id", "account", "symbol", "side", "price", "quantity", "remaining", "status")
+
+    def __init__(self, order_id: int, account: Optional[Account], symbol: str, side: str,
+                 price: float, quantity: int) -> None:
+        self.order_id = order_id
+        self.account = account
+        self.symbol = symbol
+        self.side = side
+        self.price = price
+        self.quantity = quantity
+        self.remaining = quantity
+        self.status = OPEN
+
+    def __repr__(self) -> str:
+        return (f"Order({self.order_id}, {self.side} {self.remaining}/{self.quantity} "
+                f"{self.symbol} @ {self.price}, {self.status})")
+
+
+class Fill(NamedTuple):
+    """A trade between two orders, or between an order and the market on a tick.
+
+    The order id of the market side of a tick fill is None.
+    """
+    symbol: str
+    price: float
+    quantity: int
+    buy_order_id: Optional[int]
+    sell_order_id: Optional[int]
+
+
+def _settle(buyer: Optional[Account], seller: Optional[Account], symbol: str,
+            quantity: int, price: float) -> Optional[str]:
+    """Post a trade to both accounts atomically.
+
+    Returns None on success, or the side (BUY or SELL) whose account could not
+    cover the trade, in which case neither account is changed.
+    """
+    if buyer is None or seller is None:
+        account, side = (seller, SELL) if buyer is None else (buyer, BUY)
+        if account is not None and account.execute(side, symbol, quantity, price) is None:
+            return side
+        return None
+
+    # Lock in a fixed order so two settlements cannot deadlock
+    first, second = (buyer, seller) if id(buyer) <= id(seller) else (seller, buyer)
+    with first.lock, second.lock:
+        if not buyer.can_execute(BUY, symbol, quantity, price):
+            return BUY
+        if not seller.can_execute(SELL, symbol, quantity, price):
+            return SELL
+        # Both checks passed while holding both locks, so record the trade directly
+        buyer.ledger.append(BUY, symbol, quantity, price)
+        seller.ledger.append(SELL, symbol, quantity, price)
+    return None
+
+
+class OrderBook:
+    """Resting limit orders for one symbol, matched with price-time priority.
+
+    Each side keeps a heap of price levels and a FIFO queue of orders per level.
+    Bids are keyed by negated price so both heaps pop the best price first.
+    Cancelled orders are dropped lazily when they reach the front of their level.
+    """
+
+    def __init__(self, symbol: str, on_close: Optional[Callable[[Order], None]] = None) -> None:
+        """Initialize an empty book.
+
+        Args:
+            symbol: Stock symbol traded in this book
+            on_close: Called with each resting order that is filled, cancelled or rejected
+        """
+        self.symbol = symbol
+        self.on_close = on_close
+        # side -> heap of keys, and key -> orders at that level in time order
+        self._heaps: Dict[str, List[float]] = {BUY: [], SELL: []}
+        self._levels: Dict[str, Dict[float, Deque[Order]]] = {BUY: {}, SELL: {}}
+        self.orders: Dict[int, Order] = {}
+
+    @staticmethod
+    def _key(side: str, price: float) -> float:
+        return -price if side == BUY else price
+
+    def best_bid(self) -> Optional[float]:
+        """Return the highest resting buy price, or None."""
+        key = self._best_key(BUY)
+        return -key if key is not None else None
+
+    def best_ask(self) -> Optional[float]:
+        """Return the lowest resting sell price, or None."""
+        return self._best_key(SELL)
+
+    def _best_key(self, side: str) -> Optional[float]:
+        heap = self._heaps[side]
+        levels = self._levels[side]
+        while heap:
+            level = levels[heap[0]]
+            while level and level[0].status != OPEN:
+                level.popleft()
+            if level:
+                return heap[0]
+            del levels[heapq.heappop(heap)]
+        return None
+
+    def depth(self, side: str) -> List[Tuple[float, int]]:
+        """Return (price, total remaining quantity) for each level of one side, best first."""
+        levels = []
+        for key in sorted(self._levels[side]):
+            quantity = sum(order.remaining for order in self._levels[side][key] if order.status == OPEN)
+            if quantity:
+                levels.append((-key if side == BUY else key, quantity))
+        return levels
+
+    def submit(self, order: Order) -> List[Fill]:
+        """Match an incoming order against the book and rest any remainder.
+
+        Trades happen at the resting order's price. If the incoming order's
+        account cannot cover a trade it is rejected; if a resting order's account
+        cannot, that resting order is rejected and matching continues.
+
+        Args:
+            order: New order for this book's symbol
+
+        Returns:
+            Fills produced by the order
+        """
+        fills: List[Fill] = []
+        opposite = SELL if order.side == BUY else BUY
+        heap = self._heaps[opposite]
+        levels = self._levels[opposite]
+        # A resting level crosses when its key is at most this limit
+        limit = order.price if order.side == BUY else -order.price
+
+        while order.remaining and heap and heap[0] <= limit:
+            key = heap[0]
+            level = levels[key]
+            price = key if opposite == SELL else -key
+            while level and order.remaining:
+                resting = level[0]
+                if resting.status != OPEN:
+                    level.popleft()
+                    continue
+                quantity = min(order.remaining, resting.remaining)
+                if order.side == BUY:
+                    buy, sell = order, resting
+                else:
+                    buy, sell = resting, order
+                failed = _settle(buy.account, sell.account, self.symbol, quantity, price)
+                if failed is not None:
+                    rejected = buy if failed == BUY else sell
+                    if rejected is order:
+                        order.status = REJECTED
+                        return fills
+                    self._close(resting, REJECTED)
+                    level.popleft()
+                    continue
+                order.remaining -= quantity
+                resting.remaining -= quantity
+                fills.append(Fill(self.symbol, price, quantity, buy.order_id, sell.order_id))
+                if resting.remaining == 0:
+                    self._close(resting, FILLED)
+                    level.popleft()
+            if not level:
+                heapq.heappop(heap)
+                del levels[key]
+
+        if order.remaining == 0:
+            order.status = FILLED
+        else:
+            self._rest(order)
+        return fills
+
+    def _rest(self, order: Order) -> None:
+        key = self._key(order.side, order.price)
+        levels = self._levels[order.side]
+        level = levels.get(key)
+        if level is None:
+            level = levels[key] = deque()
+            heapq.heappush(self._heaps[order.side], key)
+        level.append(order)
+        self.orders[order.order_id] = order
+
+    def _close(self, order: Order, status: str) -> None:
+        order.status = status
+        self.orders.pop(order.order_id, None)
+        if self.on_close is not None:
+            self.on_close(order)
+
+    def cancel(self, order_id: int) -> bool:
+        """Cancel a resting order.
+
+        Args:
+            order_id: Id of the order
+
+        Returns:
+            True if the order was open and is now cancelled
+        """
+        order = self.orders.get(order_id)
+        if order is None:
+            return False
+        self._close(order, CANCELLED)
+        return True
+
+    def match_tick(self, price: float) -> List[Fill]:
+        """Fill resting orders that the market price has reached.
+
+        Bids at or above the tick price and asks at or below it trade in full
+        against the market at the tick price, best price first, then oldest first.
+
+        Args:
+            price: New market price of the symbol
+
+        Returns:
+            Fills against the market
+        """
+        fills: List[Fill] = []
+        for side, limit in ((BUY, -price), (SELL, price)):
+            heap = self._heaps[side]
+            levels = self._levels[side]
+            while heap and heap[0] <= limit:
+                key = heapq.heappop(heap)
+                for order in levels.pop(key):
+                    if order.status != OPEN:
+                        continue
+                    buyer = order.account if side == BUY else None
+                    seller = order.account if side == SELL else None
+                    if _settle(buyer, seller, self.symbol, order.remaining, price) is not None:
+                        self._close(order, REJECTED)
+                        continue
+                    fills.append(Fill(self.symbol, price, order.remaining,
+                                      order.order_id if side == BUY else None,
+                                      order.order_id if side == SELL else None))
+                    order.remaining = 0
+                    self._close(order, FILLED)
+        return fills
+
+
+class MatchingEngine:
+    """Order books for every symbol, with order ids shared across books."""
+
+    def __init__(self) -> None:
+        """Initialize an engine with no books."""
+        self.books: Dict[str, OrderBook] = {}
+        self._order_ids = itertools.count(1)
+        self._symbols: Dict[int, str] = {}
+
+    def book(self, symbol: str) -> OrderBook:
+        """Return the book for a symbol, creating it if needed."""
+        book = self.books.get(symbol)
+        if book is None:
+            book = self.books[symbol] = OrderBook(symbol, self._forget)
+        return book
+
+    def _forget(self, order: Order) -> None:
+        self._symbols.pop(order.order_id, None)
+
+    def submit(self, account: Optional[Account], symbol: str, side: str, quantity: int,
+               price: float) -> Tuple[Order, List[Fill]]:
+        """Submit a limit order.
+
+        Args:
+            account: Account the fills are posted to, or None for liquidity
+                that is not backed by an account
+            symbol: Stock symbol
+            side: BUY or SELL
+            quantity: Number of shares
+            price: Limit price per share
+
+        Returns:
+            Tuple of the order and the fills it produced immediately
+        """
+        if side not in (BUY, SELL):
+            raise ValueError(f"Unknown order side: {side}")
+        if quantity <= 0:
+            raise ValueError("Quantity must be positive")
+        if price <= 0:
+            raise ValueError("Limit price must be positive")
+        order = Order(next(self._order_ids), account, symbol, side, price, quantity)
+        fills = self.book(symbol).submit(order)
+        if order.status == OPEN:
+            self._symbols[order.order_id] = symbol
+        return order, fills
+
+    def submit_batch(self, orders: Iterable[Tuple[Optional[Account], str, str, int, float]]) -> List[Fill]:
+        """Submit many orders in sequence.
+
+        Args:
+            orders: Tuples of (account, symbol, side, quantity, price)
+
+        Returns:
+            Every fill produced, in order
+        """
+        fills: List[Fill] = []
+        for account, symbol, side, quantity, price in orders:
+            fills.extend(self.submit(account, symbol, side, quantity, price)[1])
+        return fills
+
+    def cancel(self, order_id: int) -> bool:
+        """Cancel a resting order by id.
+
+        Args:
+            order_id: Id returned with the order
+
+        Returns:
+            True if the order was open and is now cancelled
+        """
+        symbol = self._symbols.get(order_id)
+        if symbol is None:
+            return False
+        return self.books[symbol].cancel(order_id)
+
+    def on_tick(self, tick) -> List[Fill]:
+        """Match resting orders against a new market price.
+
+        Can be registered as a price_feed.PriceFeed listener.
+
+        Args:
+            tick: Object with symbol and price attributes, e.g. price_feed.Tick
+
+        Returns:
+            Fills against the market
+        """
+        book = self.books.get(tick.symbol)
+        if book is None:
+            return []
+        return book.match_tick(tick.price)
@@ -0,0 +1,274 @@
+import json
+import sqlite3
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from accounts import Account, Ledger
+
+# How hard each commit pushes data to disk:
+#   always - commit every entry as it is recorded, fsyncing each commit
+#   commit - group commit, fsyncing once per group
+#   normal - group commit, fsyncing only at WAL checkpoints (survives a crash
+#            of the process, but the last groups can be lost on power failure)
+#   off    - group commit, leaving fsync to the operating system
+FSYNC_POLICIES = {
+    "always": "FULL",
+    "commit": "FULL",
+    "normal": "NORMAL",
+    "off": "OFF",
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS accounts (
+    account_id TEXT PRIMARY KEY,
+    initial_deposit REAL NOT NULL,
+    checkpoint_interval INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS entries (
+    account_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    kind INTEGER NOT NULL,
+    symbol TEXT,
+    quantity INTEGER NOT NULL,
+    price REAL NOT NULL,
+    ts REAL NOT NULL,
+    PRIMARY KEY (account_id, seq)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS snapshots (
+    account_id TEXT NOT NULL,
+    number INTEGER NOT NULL,
+    balance REAL NOT NULL,
+    positions TEXT NOT NULL,
+    PRIMARY KEY (account_id, number)
+) WITHOUT ROWID;
+"""
+
+
+class SQLiteAccountStore:
+    """Durable storage for accounts in a SQLite database in WAL mode.
+
+    Every ledger entry of an attached account is queued as it is recorded and
+    written by a background thread in group commits, so deposits and trades do
+    not wait on the disk. The ledger's checkpoints are saved as snapshots, which
+    lets load() rebuild the current state by replaying only the entries after
+    the latest one.
+
+    If a group commit fails, its writes go back to the front of the queue and
+    are retried with the next commit, so the stored ledgers never skip an
+    entry. Transactions are still recorded in memory meanwhile; check()
+    raises the error while writes are waiting on it, and close() raises it if
+    they could not be stored in the end.
+    """
+
+    def __init__(self, path: str, fsync_policy: str = "commit", commit_every: int = 4096,
+                 commit_interval: float = 0.05) -> None:
+        """Open (or create) the database.
+
+        Args:
+            path: Path of the SQLite database file
+            fsync_policy: One of the keys of FSYNC_POLICIES
+            commit_every: Number of queued writes that triggers an early commit
+            commit_interval: Maximum seconds a write waits in the queue
+        """
+        if fsync_policy not in FSYNC_POLICIES:
+            raise ValueError(f"Unknown fsync policy: {fsync_policy}")
+        self.path = path
+        self.fsync_policy = fsync_policy
+        self.commit_every = commit_every
+        self.commit_interval = commit_interval
+        self.commits = 0
+
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(f"PRAGMA synchronous={FSYNC_POLICIES[fsync_policy]}")
+        self._conn.executescript(SCHEMA)
+        self._db_lock = threading.Lock()
+
+        self._entries: List[tuple] = []
+        self._snapshots: List[tuple] = []
+        self._queue_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._closed = False
+        # Error of the last commit, if it failed; cleared once a commit succeeds
+        self._error: Optional[Exception] = None
+        self._writer: Optional[threading.Thread] = None
+        if fsync_policy != "always":
+            self._writer = threading.Thread(target=self._write_loop, name="account-store-writer", daemon=True)
+            self._writer.start()
+
+    def __enter__(self) -> "SQLiteAccountStore":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def create_account(self, account_id: str, initial_deposit: float,
+                       checkpoint_interval: int = 1024) -> Account:
+        """Create a new persistent account.
+
+        Args:
+            account_id: Unique identifier for the account
+            initial_deposit: Initial amount of money deposited
+            checkpoint_interval: Number of entries between saved snapshots
+
+        Returns:
+            The new account, already attached to this store
+        """
+        ledger = Ledger(checkpoint_interval)
+        account = Account.from_ledger(account_id, initial_deposit, ledger)
+        self.attach(account)
+        ledger.append("DEPOSIT", None, None, initial_deposit)
+        return account
+
+    def attach(self, account: Account) -> None:
+        """Persist an account and every transaction it records from now on.
+
+        Entries already in the ledger are written immediately.
+
+        Args:
+            account: Account to persist; its id must not already be stored
+        """
+        ledger = account.ledger
+        with self._db_lock:
+            self._conn.execute(
+                "INSERT INTO accounts (account_id, initial_deposit, checkpoint_interval) VALUES (?, ?, ?)",
+                (account.account_id, account.initial_deposit, ledger.checkpoint_interval))
+        for index in range(len(ledger)):
+            self._record(account.account_id, ledger, index)
+        ledger.observers.append(lambda ledger, index: self._record(account.account_id, ledger, index))
+        self.flush()
+
+    def _record(self, account_id: str, ledger: Ledger, index: int) -> None:
+        symbol_id = ledger.symbol_ids[index]
+        entry = (account_id, index, ledger.kinds[index],
+                 ledger.symbols[symbol_id] if symbol_id >= 0 else None,
+                 ledger.quantities[index], ledger.prices[index], ledger.times[index])
+        snapshot = None
+        if (index + 1) % ledger.checkpoint_interval == 0:
+            number = (index + 1) // ledger.checkpoint_interval
+            balance, positions = ledger.checkpoint(number)
+            snapshot = (account_id, number, balance, json.dumps(positions))
+
+        # Runs after the entry is recorded in memory, so a failure to store it is
+        # reported by check() and close() rather than raised to the caller
+        with self._queue_lock:
+            self._entries.append(entry)
+            if snapshot is not None:
+                self._snapshots.append(snapshot)
+            pending = len(self._entries)
+        if self._writer is None:
+            try:
+                self.flush()
+            except Exception:
+                pass  # kept in _error by flush
+        elif pending >= self.commit_every:
+            self._wakeup.set()
+
+    def _write_loop(self) -> None:
+        while not self._closed:
+            self._wakeup.wait(self.commit_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception:
+                pass  # kept in _error and retried with the next commit
+
+    def flush(self) -> None:
+        """Commit every queued write now.
+
+        Raises the error if the commit fails; the writes stay queued.
+        """
+        # Holding the database lock while taking the queue commits the groups in order
+        with self._db_lock:
+            with self._queue_lock:
+                entries, self._entries = self._entries, []
+                snapshots, self._snapshots = self._snapshots, []
+            if not entries and not snapshots:
+                return
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(
+                    "INSERT INTO entries (account_id, seq, kind, symbol, quantity, price, ts) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)", entries)
+                self._conn.executemany(
+                    "INSERT INTO snapshots (account_id, number, balance, positions) VALUES (?, ?, ?, ?)",
+                    snapshots)
+                self._conn.execute("COMMIT")
+            except BaseException as e:
+                self._conn.execute("ROLLBACK")
+                with self._queue_lock:
+                    self._entries[:0] = entries
+                    self._snapshots[:0] = snapshots
+                    if isinstance(e, Exception):
+                        self._error = e
+                raise
+            with self._queue_lock:
+                self._error = None
+            self.commits += 1
+
+    def check(self) -> None:
+        """Raise the error of the last commit if it failed and its writes are still queued."""
+        with self._queue_lock:
+            error = self._error
+        if error is not None:
+            raise error
+
+    def exists(self, account_id: str) -> bool:
+        """Return whether an account is stored, with one primary key lookup."""
+        with self._db_lock:
+            return self._conn.execute(
+                "SELECT 1 FROM accounts WHERE account_id = ?", (account_id,)).fetchone() is not None
+
+    def account_ids(self) -> List[str]:
+        """Return the ids of every stored account."""
+        with self._db_lock:
+            return [row[0] for row in self._conn.execute("SELECT account_id FROM accounts ORDER BY account_id")]
+
+    def load(self, account_id: str) -> Account:
+        """Load a stored account and keep persisting its new transactions.
+
+        Args:
+            account_id: Id of the account to load
+
+        Returns:
+            The account, with its full transaction history
+        """
+        self.flush()
+        with self._db_lock:
+            row = self._conn.execute(
+                "SELECT initial_deposit, checkpoint_interval FROM accounts WHERE account_id = ?",
+                (account_id,)).fetchone()
+            if row is None:
+                raise KeyError(account_id)
+            initial_deposit, checkpoint_interval = row
+            entries = self._conn.execute(
+                "SELECT kind, symbol, quantity, price, ts FROM entries WHERE account_id = ? ORDER BY seq",
+                (account_id,)).fetchall()
+            snapshots = self._conn.execute(
+                "SELECT balance, positions FROM snapshots WHERE account_id = ? ORDER BY number",
+                (account_id,)).fetchall()
+
+        ledger = Ledger(checkpoint_interval)
+        kinds, symbols, quantities, prices, times = zip(*entries) if entries else ((),) * 5
+        checkpoints: List[Tuple[float, Dict[str, int]]] = [
+            (balance, json.loads(positions)) for balance, positions in snapshots]
+        ledger.restore(kinds, symbols, quantities, prices, times, checkpoints)
+        ledger.observers.append(lambda ledger, index: self._record(account_id, ledger, index))
+        return Account.from_ledger(account_id, initial_deposit, ledger)
+
+    def close(self) -> None:
+        """Commit queued writes, stop the writer thread and close the database.
+
+        Raises the commit's error if the queued writes cannot be stored; they are lost.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        if self._writer is not None:
+            self._wakeup.set()
+            self._writer.join()
+        try:
+            self.flush()
+        finally:
+            self._conn.close()
+
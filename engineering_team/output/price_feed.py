@@ -0,0 +1,280 @@
+import asyncio
+import csv
+import json
+import random
+import threading
+from typing import AsyncIterator, Callable, Dict, Iterable, List, NamedTuple, Optional
+
+from accounts import TRANSACTION_KINDS, Account, Ledger, PriceProvider, StubPriceProvider
+
+
+class Tick(NamedTuple):
+    """A new price for one symbol."""
+    symbol: str
+    price: float
+    timestamp: float = 0.0
+
+
+async def _paced(ticks: Iterable[Tick], speed: Optional[float]) -> AsyncIterator[Tick]:
+    """Yield ticks, sleeping between them to follow their timestamps at a given speed-up."""
+    previous = None
+    for count, tick in enumerate(ticks):
+        if speed and previous is not None and tick.timestamp > previous:
+            await asyncio.sleep((tick.timestamp - previous) / speed)
+        elif count % 1024 == 0:
+            await asyncio.sleep(0)
+        previous = tick.timestamp
+        yield tick
+
+
+def replay_csv(path: str, speed: Optional[float] = None) -> AsyncIterator[Tick]:
+    """Replay ticks from a CSV file with symbol, price and optional timestamp columns.
+
+    Args:
+        path: Path of the CSV file, with a header row
+        speed: Replay speed-up relative to the timestamps, or None for as fast as possible
+
+    Returns:
+        Async iterator of ticks
+    """
+    def read():
+        with open(path, newline="") as f:
+            for row in csv.DictReader(f):
+                yield Tick(row["symbol"], float(row["price"]), float(row.get("timestamp") or 0.0))
+    return _paced(read(), speed)
+
+
+def replay_jsonl(path: str, speed: Optional[float] = None) -> AsyncIterator[Tick]:
+    """Replay ticks from a JSONL file of {"symbol", "price", "timestamp"} objects.
+
+    Args:
+        path: Path of the JSONL file
+        speed: Replay speed-up relative to the timestamps, or None for as fast as possible
+
+    Returns:
+        Async iterator of ticks
+    """
+    def read():
+        with open(path) as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    yield Tick(record["symbol"], float(record["price"]), float(record.get("timestamp", 0.0)))
+    return _paced(read(), speed)
+
+
+def synthetic_ticks(start_prices: Dict[str, float], count: int, volatility: float = 0.001,
+                    interval: float = 1.0, seed: Optional[int] = None,
+                    speed: Optional[float] = None) -> AsyncIterator[Tick]:
+    """Generate a random walk of ticks over the given symbols.
+
+    Args:
+        start_prices: Initial price of each symbol
+        count: Number of ticks to generate
+        volatility: Standard deviation of each relative price move
+        interval: Seconds between consecutive ticks
+        seed: Random seed, for reproducible runs
+        speed: Replay speed-up relative to the timestamps, or None for as fast as possible
+
+    Returns:
+        Async iterator of ticks
+    """
+    def generate():
+        rng = random.Random(seed)
+        prices = dict(start_prices)
+        symbols = list(prices)
+        for index in range(count):
+            symbol = rng.choice(symbols)
+            prices[symbol] = max(prices[symbol] * (1.0 + rng.gauss(0.0, volatility)), 0.01)
+            yield Tick(symbol, prices[symbol], index * interval)
+    return _paced(generate(), speed)
+
+
+class LivePriceProvider(PriceProvider):
+    """Price provider that serves the latest tick for each symbol.
+
+    Symbols that have not ticked yet are looked up in a fallback provider.
+    """
+
+    def __init__(self, fallback: Optional[PriceProvider] = None) -> None:
+        """Initialize the provider.
+
+        Args:
+            fallback: Provider for symbols without a tick, the stub prices by default
+        """
+        self.fallback = fallback if fallback is not None else StubPriceProvider()
+        self.prices: Dict[str, float] = {}
+
+    def update(self, tick: Tick) -> None:
+        """Record the latest price of a symbol."""
+        self.prices[tick.symbol] = tick.price
+
+    def get_prices(self, symbols: Iterable[str]) -> Dict[str, float]:
+        prices = {}
+        missing = []
+        for symbol in symbols:
+            price = self.prices.get(symbol)
+            if price is None:
+                missing.append(symbol)
+            else:
+                prices[symbol] = price
+        if missing:
+            prices.update(self.fallback.get_prices(missing))
+        return prices
+
+
+class PortfolioTracker:
+    """Keeps the portfolio value of many accounts up to date as prices tick.
+
+    A reverse index from symbol to the accounts holding it (and how many shares
+    each holds) means each tick only touches those accounts, adjusting their
+    value by quantity times the price change. Trades are picked up through the
+    ledger observer hook, so the index and values follow the accounts without
+    rescanning them.
+    """
+
+    def __init__(self, provider: PriceProvider) -> None:
+        """Initialize an empty tracker.
+
+        Args:
+            provider: Source of the prices used to value newly held symbols
+        """
+        self.provider = provider
+        self.accounts: Dict[str, Account] = {}
+        self.values: Dict[str, float] = {}
+        self.holders: Dict[str, Dict[str, int]] = {}
+        self.prices: Dict[str, float] = {}
+        self.touched = 0
+        self._lock = threading.Lock()
+
+    def track(self, account: Account) -> None:
+        """Start tracking an account.
+
+        Args:
+            account: Account to value incrementally
+        """
+        account_id = account.account_id
+        prices = self.provider.get_prices(account.get_holdings())
+
+        def start(seq: int, balance: float, holdings: dict) -> None:
+            with self._lock:
+                self.accounts[account_id] = account
+                value = 0.0
+                for symbol, quantity in holdings.items():
+                    if symbol not in self.prices:
+                        self.prices[symbol] = prices[symbol] if symbol in prices else self.provider.get_price(symbol)
+                    self.holders.setdefault(symbol, {})[account_id] = quantity
+                    value += quantity * self.prices[symbol]
+                self.values[account_id] = value
+
+        account.subscribe(lambda ledger, index: self._on_entry(account_id, ledger, index), start)
+
+    def _on_entry(self, account_id: str, ledger: Ledger, index: int) -> None:
+        symbol_id = ledger.symbol_ids[index]
+        if symbol_id < 0:
+            return
+        symbol = ledger.symbols[symbol_id]
+        quantity = ledger.quantities[index]
+        if TRANSACTION_KINDS[ledger.kinds[index]] == "SELL":
+            quantity = -quantity
+        price = self.prices.get(symbol)
+        if price is None:
+            price = self.provider.get_price(symbol)
+        with self._lock:
+            price = self.prices.setdefault(symbol, price)
+            holders = self.holders.setdefault(symbol, {})
+            held = holders.get(account_id, 0) + quantity
+            if held:
+                holders[account_id] = held
+            else:
+                holders.pop(account_id, None)
+            self.values[account_id] = self.values.get(account_id, 0.0) + quantity * price
+
+    def on_tick(self, tick: Tick) -> List[str]:
+        """Apply a price change to the accounts holding the symbol.
+
+        Args:
+            tick: New price of a symbol
+
+        Returns:
+            Ids of the accounts whose value changed
+        """
+        with self._lock:
+            previous = self.prices.get(tick.symbol)
+            self.prices[tick.symbol] = tick.price
+            holders = self.holders.get(tick.symbol)
+            if previous is None or not holders:
+                return []
+            change = tick.price - previous
+            values = self.values
+            for account_id, quantity in holders.items():
+                values[account_id] += quantity * change
+            self.touched += len(holders)
+            return list(holders)
+
+    def portfolio_value(self, account_id: str) -> float:
+        """Return the tracked portfolio value of an account."""
+        return self.values[account_id]
+
+    def profit_or_loss(self, account_id: str) -> float:
+        """Return the profit or loss of an account at the latest tracked prices."""
+        account = self.accounts[account_id]
+        return self.values[account_id] + account.balance - account.initial_deposit
+
+    def revalue(self, account_id: str) -> float:
+        """Recompute an account's value from scratch at the tracked prices.
+
+        Incremental updates accumulate floating point rounding; calling this
+        periodically resets the drift.
+
+        Args:
+            account_id: Id of the account
+
+        Returns:
+            The exact portfolio value
+        """
+        with self._lock:
+            value = 0.0
+            for symbol, holders in self.holders.items():
+                quantity = holders.get(account_id)
+                if quantity:
+                    value += quantity * self.prices[symbol]
+            self.values[account_id] = value
+        return value
+
+
+class PriceFeed:
+    """Pushes ticks from a source into a live price provider and trackers."""
+
+    def __init__(self, provider: LivePriceProvider,
+                 trackers: Iterable[PortfolioTracker] = (),
+                 listeners: Iterable[Callable[[Tick], None]] = ()) -> None:
+        """Initialize the feed.
+
+        Args:
+            provider: Price provider to update with every tick
+            trackers: Portfolio trackers to revalue on every tick
+            listeners: Extra callbacks to call with every tick
+        """
+        self.provider = provider
+        self.trackers = list(trackers)
+        self.listeners = list(listeners)
+        self.ticks = 0
+
+    async def run(self, source: AsyncIterator[Tick]) -> int:
+        """Consume a tick source until it is exhausted.
+
+        Args:
+            source: Async iterator of ticks, e.g. from replay_csv or synthetic_ticks
+
+        Returns:
+            Number of ticks processed
+        """
+        async for tick in source:
+            self.provider.update(tick)
+            for tracker in self.trackers:
+                tracker.on_tick(tick)
+            for listener in self.listeners:
+                listener(tick)
+            self.ticks += 1
+        return self.ticks
@@ -0,0 +1,531 @@
+import csv
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from accounts import Account, Ledger, TRANSACTION_KINDS
+
+_DEPOSIT, _WITHDRAW, _BUY, _SELL = (TRANSACTION_KINDS.index(kind) for kind in ("DEPOSIT", "WITHDRAW", "BUY", "SELL"))
+
+
+class PriceHistory:
+    """Prices of several symbols, valued at common points in time.
+
+    Each symbol keeps its own series of (time, price) ticks sorted by time,
+    and its price at a time is the latest tick at or before it, or its first
+    tick for times before it first ticked. Prices are looked up from the
+    series when needed, so a history takes space in proportion to its ticks
+    rather than to its times times its symbols.
+    """
+
+    def __init__(self, times: np.ndarray, symbols: List[str], prices: np.ndarray) -> None:
+        """Initialize a history from prices sampled at common times.
+
+        Args:
+            times: (N,) increasing timestamps, which are also the valuation times
+            symbols: S symbols, one per column
+            prices: (N, S) prices
+        """
+        times = np.asarray(times, dtype=np.float64)
+        prices = np.asarray(prices, dtype=np.float64).reshape(len(times), len(symbols))
+        self.times = times
+        self.symbols = list(symbols)
+        # Every symbol's series, one after the other; symbol i holds ticks starts[i]:starts[i + 1]
+        self._tick_times = np.tile(times, len(symbols))
+        self._tick_prices = prices.T.ravel()
+        # Index in times of each tick
+        self._tick_rows = np.tile(np.arange(len(times)), len(symbols))
+        self._starts = np.arange(len(symbols) + 1) * len(times)
+
+    @classmethod
+    def from_ticks(cls, ticks: Iterable) -> "PriceHistory":
+        """Build a history from (symbol, price, timestamp) ticks, e.g. price_feed.Tick.
+
+        Each symbol's price is carried forward to every later timestamp, and its
+        first price is carried back to the timestamps before it first ticked.
+
+        Args:
+            ticks: Ticks in any order
+
+        Returns:
+            Price history with a row per distinct timestamp
+        """
+        ticks = list(ticks)
+        if not ticks:
+            raise ValueError("No ticks to build a price history from")
+        symbols = sorted({tick[0] for tick in ticks})
+        column = {symbol: index for index, symbol in enumerate(symbols)}
+        return cls._from_arrays(symbols,
+                                np.array([column[tick[0]] for tick in ticks], dtype=np.int64),
+                                np.array([tick[1] for tick in ticks], dtype=np.float64),
+                                np.array([tick[2] for tick in ticks], dtype=np.float64))
+
+    @classmethod
+    def from_trades(cls, ledger: Ledger, prices: Optional[Dict[str, float]] = None,
+                    timestamp: Optional[float] = None) -> "PriceHistory":
+        """Build a history from the prices an account traded at.
+
+        Each trade is a tick at its own time, optionally followed by a row of
+        current prices, so an account can be analyzed without market data.
+
+        Args:
+            ledger: Transactions of the account
+            prices: Current price of each traded symbol, added as a final row
+            timestamp: Time of the final row, just after the last entry by default
+
+        Returns:
+            Price history with a row per distinct trade time
+        """
+        columns = _columns(ledger)
+        trades = columns.symbol_ids >= 0
+        symbol_ids = columns.symbol_ids[trades].astype(np.int64)
+        trade_prices = columns.prices[trades]
+        trade_times = columns.times[trades]
+        if prices:
+            if timestamp is None:
+                timestamp = float(columns.times[-1]) + 1.0 if len(columns.times) else 0.0
+            latest = [(index, prices[symbol]) for index, symbol in enumerate(columns.symbols) if symbol in prices]
+            symbol_ids = np.append(symbol_ids, [index for index, _ in latest])
+            trade_prices = np.append(trade_prices, [price for _, price in latest])
+            trade_times = np.append(trade_times, [timestamp] * len(latest))
+        if symbol_ids.size == 0:
+            raise ValueError("No trades to build a price history from")
+        return cls._from_arrays(columns.symbols, symbol_ids, trade_prices, trade_times)
+
+    @classmethod
+    def _from_arrays(cls, symbols: List[str], tick_symbols: np.ndarray, tick_prices: np.ndarray,
+                     tick_times: np.ndarray) -> "PriceHistory":
+        # Group the ticks by symbol in time order; ties keep their input order, so the last one wins.
+        # Ticks taken from a ledger are already in time order and only need grouping
+        if np.all(tick_times[1:] >= tick_times[:-1]):
+            order = _group_order(tick_symbols, len(symbols))
+        else:
+            order = np.lexsort((tick_times, tick_symbols))
+        history = cls.__new__(cls)
+        history.times, rows = np.unique(tick_times, return_inverse=True)
+        history.symbols = list(symbols)
+        history._tick_times = tick_times[order]
+        history._tick_prices = tick_prices[order]
+        history._tick_rows = rows.ravel()[order]
+        history._starts = np.searchsorted(tick_symbols[order], np.arange(len(symbols) + 1))
+        return history
+
+    def series(self, column: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Return the tick times and prices of the symbol in a column, sorted by time."""
+        start, end = self._starts[column], self._starts[column + 1]
+        return self._tick_times[start:end], self._tick_prices[start:end]
+
+    def prices_at(self, column: int, times: Optional[np.ndarray] = None) -> np.ndarray:
+        """Return the price of the symbol in a column at each of the given times.
+
+        Args:
+            column: Index of the symbol in symbols
+            times: Times to look up, the valuation times by default
+
+        Returns:
+            The latest tick price at or before each time, or the first tick price before any
+        """
+        tick_times, tick_prices = self.series(column)
+        if len(tick_times) == 0:
+            raise ValueError(f"No prices for {self.symbols[column]}")
+        times = self.times if times is None else np.asarray(times, dtype=np.float64)
+        return tick_prices[np.maximum(np.searchsorted(tick_times, times, side="right") - 1, 0)]
+
+    @property
+    def prices(self) -> np.ndarray:
+        """(N, S) price of every symbol at every valuation time.
+
+        Built on each access, taking N x S space; prefer prices_at for large histories.
+        """
+        prices = np.empty((len(self.times), len(self.symbols)), dtype=np.float64)
+        for column in range(len(self.symbols)):
+            prices[:, column] = self.prices_at(column)
+        return prices
+
+    def latest_prices(self) -> Dict[str, float]:
+        """Return the price of every symbol at the last valuation time."""
+        if len(self.times) == 0:
+            return {}
+        last = self.times[-1:]
+        return {symbol: float(self.prices_at(column, last)[0]) for column, symbol in enumerate(self.symbols)}
+
+    @classmethod
+    def from_csv(cls, path: str) -> "PriceHistory":
+        """Load a history from a CSV file with symbol, price and timestamp columns.
+
+        This is the format price_feed.replay_csv reads.
+
+        Args:
+            path: Path of the CSV file, with a header row
+
+        Returns:
+            Price history with a row per distinct timestamp
+        """
+        with open(path, newline="") as f:
+            return cls.from_ticks((row["symbol"], float(row["price"]), float(row.get("timestamp") or 0.0))
+                                  for row in csv.DictReader(f))
+
+
+class SymbolPnL(NamedTuple):
+    """Profit or loss on one symbol, using the average cost of the shares held."""
+    symbol: str
+    position: int
+    average_cost: float
+    realized: float
+    unrealized: float
+
+
+class RiskReport(NamedTuple):
+    """Risk and performance figures for one account over a price history."""
+    equity: np.ndarray       # (N,) account value at each time of the history
+    returns: np.ndarray      # (N - 1,) time-weighted returns between consecutive times
+    max_drawdown: float      # of the returns compounded, so deposits and withdrawals do not count
+    volatility: np.ndarray   # rolling standard deviation of the returns
+    sharpe_ratio: float
+    value_at_risk: float
+    symbols: List[SymbolPnL]
+
+
+class _Columns(NamedTuple):
+    kinds: np.ndarray
+    symbol_ids: np.ndarray
+    quantities: np.ndarray
+    prices: np.ndarray
+    times: np.ndarray
+    symbols: List[str]
+
+
+def _columns(ledger: Ledger) -> _Columns:
+    """Copy the columns of a ledger into NumPy arrays."""
+    return _Columns(np.array(ledger.kinds), np.array(ledger.symbol_ids), np.array(ledger.quantities),
+                    np.array(ledger.prices), np.array(ledger.times), list(ledger.symbols))
+
+
+def _group_order(ids: np.ndarray, count: int) -> np.ndarray:
+    """Return the stable order that groups entries by id, keeping each group in its original order."""
+    # NumPy radix sorts 16-bit integers, several times faster than sorting wider ones
+    return np.argsort(ids.astype(np.int16 if count <= np.iinfo(np.int16).max else np.int64), kind="stable")
+
+
+def _cash_flows(columns: _Columns) -> np.ndarray:
+    """Return the change in cash balance made by each entry."""
+    kinds, prices = columns.kinds, columns.prices
+    flows = np.where(kinds == _DEPOSIT, prices, -prices)
+    trade = (kinds == _BUY) | (kinds == _SELL)
+    # Same operations as Account, so the running balance matches it exactly
+    amounts = prices[trade] * columns.quantities[trade]
+    flows[trade] = np.where(kinds[trade] == _BUY, -amounts, amounts)
+    return flows
+
+
+def _external_flows(columns: _Columns) -> np.ndarray:
+    """Return the cash each entry moved into the account from outside: deposits less withdrawals."""
+    kinds, prices = columns.kinds, columns.prices
+    return np.where(kinds == _DEPOSIT, prices, np.where(kinds == _WITHDRAW, -prices, 0.0))
+
+
+def period_flows(ledger: Ledger, history: PriceHistory) -> np.ndarray:
+    """Return the deposits less withdrawals recorded in each period of a price history.
+
+    Args:
+        ledger: Transactions of the account
+        history: Price history whose times bound the periods
+
+    Returns:
+        (N - 1,) net external cash flow after each time, up to and including the next
+    """
+    return _period_flows(_columns(ledger), history)
+
+
+def _period_flows(columns: _Columns, history: PriceHistory) -> np.ndarray:
+    deposited = np.concatenate(([0.0], np.cumsum(_external_flows(columns))))
+    return np.diff(deposited[np.searchsorted(columns.times, history.times, side="right")])
+
+
+def _signed_quantities(columns: _Columns) -> np.ndarray:
+    """Return the change in position made by each entry: positive for buys, negative for sells."""
+    quantities = np.where(columns.kinds == _SELL, -columns.quantities, columns.quantities)
+    quantities[columns.symbol_ids < 0] = 0
+    return quantities
+
+
+def equity_curve(ledger: Ledger, history: PriceHistory) -> np.ndarray:
+    """Value the account at every time of a price history.
+
+    The cash balance and positions at each time include every entry recorded
+    at or before it, and positions are valued at that row's prices.
+
+    Args:
+        ledger: Transactions of the account
+        history: Prices of every symbol the account has traded
+
+    Returns:
+        (N,) cash balance plus portfolio value at each time
+    """
+    return _equity_curve(_columns(ledger), history)
+
+
+def _equity_curve(columns: _Columns, history: PriceHistory) -> np.ndarray:
+    missing = set(columns.symbols) - set(history.symbols)
+    if missing:
+        raise ValueError(f"No price history for {', '.join(sorted(missing))}")
+    balance = np.concatenate(([0.0], np.cumsum(_cash_flows(columns))))
+
+    # A holding of h shares at price p changes value by h * (p' - p) when its
+    # symbol ticks to p', and by q * p when q shares are traded. Both kinds of
+    # change are found for every tick and trade at once and added up at the
+    # rows of the history they fall on, so the work grows with the ticks and
+    # trades rather than times x symbols. A trade falls on the first row at or
+    # after it, the first valuation that includes it; one after the last time
+    # falls on an extra row that is dropped
+    rows = len(history.times) + 1
+    column = {symbol: index for index, symbol in enumerate(history.symbols)}
+    symbol_columns = np.array([column[symbol] for symbol in columns.symbols], dtype=np.int64)
+    entry_rows = np.searchsorted(history.times, columns.times)
+    # Number of entries recorded at or before each time of the history
+    seq = np.cumsum(np.bincount(entry_rows, minlength=rows)[:-1])
+    trades = np.flatnonzero(columns.symbol_ids >= 0)
+    trade_columns = symbol_columns[columns.symbol_ids[trades]]
+    order = _group_order(trade_columns, len(history.symbols))
+    trades, trade_columns = trades[order], trade_columns[order]
+    quantities = _signed_quantities(columns)[trades]
+    traded = np.bincount(trade_columns, minlength=len(history.symbols))
+    unpriced = np.flatnonzero((traded > 0) & (np.diff(history._starts) == 0))
+    if unpriced.size:
+        raise ValueError(f"No prices for {history.symbols[unpriced[0]]}")
+
+    # Trades and ticks keyed so they sort by column, then row
+    trade_keys = trade_columns * rows + entry_rows[trades]
+    tick_columns = np.repeat(np.arange(len(history.symbols)), np.diff(history._starts))
+    tick_keys = tick_columns * rows + history._tick_rows
+
+    # Each trade at its symbol's latest tick on or before its row, or its first tick
+    prices = history._tick_prices[np.maximum(np.searchsorted(tick_keys, trade_keys, side="right") - 1,
+                                             history._starts[trade_columns])]
+    # Shares of its symbol held before each tick's row
+    held = np.concatenate(([0], np.cumsum(quantities)))
+    group_starts = np.concatenate(([0], np.cumsum(traded)))
+    held = held[np.searchsorted(trade_keys, tick_keys)] - held[group_starts[tick_columns]]
+    # A symbol is priced at its first tick before it, so its first tick moves nothing
+    moves = np.diff(history._tick_prices, prepend=0.0)
+    moves[history._starts[:-1][history._starts[:-1] < history._starts[1:]]] = 0.0
+
+    changes = (np.bincount(entry_rows[trades], weights=quantities * prices, minlength=rows)
+               + np.bincount(history._tick_rows, weights=held * moves, minlength=rows))
+    holdings = np.cumsum(changes[:-1])
+    return holdings + balance[seq]
+
+
+def simple_returns(equity: np.ndarray, flows: Optional[np.ndarray] = None) -> np.ndarray:
+    """Return the relative change between consecutive values of an equity curve.
+
+    With flows, these are time-weighted returns: the cash deposited or
+    withdrawn in a period is taken out of its change in value before dividing
+    by the value at its start, so only gains and losses count as returns.
+
+    Args:
+        equity: (N,) account values
+        flows: (N - 1,) deposits less withdrawals in each period, e.g. from period_flows
+
+    Returns:
+        (N - 1,) returns, 0.0 for periods that start with nothing invested
+    """
+    equity = np.asarray(equity, dtype=np.float64)
+    change = np.diff(equity)
+    if flows is not None:
+        change = change - np.asarray(flows, dtype=np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        returns = change / equity[:-1]
+    returns[~np.isfinite(returns)] = 0.0
+    return returns
+
+
+def max_drawdown(equity: np.ndarray) -> float:
+    """Return the largest fall from a running peak, as a fraction of that peak."""
+    equity = np.asarray(equity, dtype=np.float64)
+    if equity.size == 0:
+        return 0.0
+    peaks = np.maximum.accumulate(equity)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        drawdowns = np.where(peaks > 0, (peaks - equity) / peaks, 0.0)
+    return float(drawdowns.max())
+
+
+def rolling_volatility(returns: np.ndarray, window: int) -> np.ndarray:
+    """Return the sample standard deviation of the returns over a sliding window.
+
+    Args:
+        returns: Simple returns
+        window: Number of returns in each window, at least 2
+
+    Returns:
+        One value per full window, empty if there are fewer returns than the window
+    """
+    if window < 2:
+        raise ValueError("Window must be at least 2")
+    returns = np.asarray(returns, dtype=np.float64)
+    if len(returns) < window:
+        return np.empty(0, dtype=np.float64)
+    # Windowed sums of the returns and their squares, from running totals; centering the returns
+    # first keeps the difference of squares from losing precision
+    centered = returns - returns.mean()
+    totals = np.concatenate(([0.0], np.cumsum(centered)))
+    squares = np.concatenate(([0.0], np.cumsum(centered * centered)))
+    total = totals[window:] - totals[:-window]
+    variance = (squares[window:] - squares[:-window] - total * total / window) / (window - 1)
+    return np.sqrt(np.maximum(variance, 0.0))
+
+
+def sharpe_ratio(returns: np.ndarray, periods_per_year: float = 252, risk_free_rate: float = 0.0) -> float:
+    """Return the annualized Sharpe ratio of periodic returns.
+
+    Args:
+        returns: Simple returns, one per period
+        periods_per_year: Number of periods in a year, 252 for daily returns
+        risk_free_rate: Annual risk-free rate
+
+    Returns:
+        The Sharpe ratio, or 0.0 if the returns do not vary
+    """
+    returns = np.asarray(returns, dtype=np.float64)
+    if len(returns) < 2:
+        return 0.0
+    excess = returns - risk_free_rate / periods_per_year
+    deviation = excess.std(ddof=1)
+    if deviation == 0:
+        return 0.0
+    return float(excess.mean() / deviation * np.sqrt(periods_per_year))
+
+
+def value_at_risk(returns: np.ndarray, confidence: float = 0.95) -> float:
+    """Return the historical value at risk of one period, as a positive fraction.
+
+    Args:
+        returns: Simple returns, one per period
+        confidence: Confidence level, e.g. 0.95 for the loss exceeded 5% of the time
+
+    Returns:
+        The loss at the given confidence, 0.0 if that quantile is a gain
+    """
+    if not 0 < confidence < 1:
+        raise ValueError("Confidence must be between 0 and 1")
+    returns = np.asarray(returns, dtype=np.float64)
+    if returns.size == 0:
+        return 0.0
+    loss = float(-np.quantile(returns, 1 - confidence))
+    return loss if loss > 0 else 0.0
+
+
+def _affine_scan(scale: np.ndarray, offset: np.ndarray) -> np.ndarray:
+    """Solve x[i] = scale[i] * x[i - 1] + offset[i] for every i, with x[-1] = 0.
+
+    Composes the maps in log2(n) vectorized passes instead of one Python step
+    per element. A zero scale restarts the recurrence, so the passes stop once
+    every element reaches back to a restart.
+    """
+    scale = scale.copy()
+    offset = offset.copy()
+    shift = 1
+    while shift < len(scale) and scale[shift:].any():
+        offset[shift:] = scale[shift:] * offset[:-shift] + offset[shift:]
+        scale[shift:] = scale[shift:] * scale[:-shift]
+        shift *= 2
+    return offset
+
+
+def symbol_pnl(ledger: Ledger, prices: Dict[str, float]) -> List[SymbolPnL]:
+    """Split the profit or loss on every traded symbol into realized and unrealized parts.
+
+    Shares are costed at their average purchase price: buying moves the
+    average, selling realizes the difference between the sale price and the
+    average, and closing a position resets it.
+
+    Args:
+        ledger: Transactions of the account
+        prices: Current price of every symbol still held
+
+    Returns:
+        One entry per symbol ever traded, in the order first traded
+    """
+    return _symbol_pnl(_columns(ledger), prices)
+
+
+def _symbol_pnl(columns: _Columns, prices: Dict[str, float]) -> List[SymbolPnL]:
+    count = len(columns.symbols)
+    trades = np.flatnonzero(columns.symbol_ids >= 0)
+    if trades.size == 0:
+        return []
+    # Group the trades by symbol, keeping each symbol's trades in time order
+    trades = trades[_group_order(columns.symbol_ids[trades], count)]
+    symbol_ids = columns.symbol_ids[trades]
+    quantities = _signed_quantities(columns)[trades]
+    trade_prices = columns.prices[trades]
+    starts = np.flatnonzero(np.diff(symbol_ids, prepend=-1))
+
+    # Position before and after each trade, restarting at zero for each symbol
+    running = np.cumsum(quantities)
+    before_group = np.repeat(running[starts] - quantities[starts], np.diff(np.append(starts, len(trades))))
+    after = running - before_group
+    before = after - quantities
+
+    # Average cost after each trade: a buy blends in its price, a sell keeps it,
+    # and a buy into an empty position starts afresh (its scale is zero)
+    buy = quantities > 0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        scale = np.where(buy, before / after, 1.0)
+        offset = np.where(buy, quantities * trade_prices / after, 0.0)
+    scale[starts] = 0.0
+    average = _affine_scan(scale, offset)
+    average_before = np.concatenate(([0.0], average[:-1]))
+
+    sell = ~buy
+    realized = np.bincount(symbol_ids[sell], weights=-quantities[sell] * (trade_prices[sell] - average_before[sell]),
+                           minlength=count)
+    ends = np.append(starts[1:], len(trades)) - 1
+    final_positions = np.zeros(count, dtype=np.int64)
+    final_average = np.zeros(count, dtype=np.float64)
+    final_positions[symbol_ids[ends]] = after[ends]
+    final_average[symbol_ids[ends]] = np.where(after[ends] != 0, average[ends], 0.0)
+
+    report = []
+    for symbol_id, symbol in enumerate(columns.symbols):
+        position = int(final_positions[symbol_id])
+        cost = float(final_average[symbol_id])
+        unrealized = position * (prices[symbol] - cost) if position else 0.0
+        report.append(SymbolPnL(symbol, position, cost, float(realized[symbol_id]), unrealized))
+    return report
+
+
+def risk_report(account: Account, history: PriceHistory, window: int = 20, confidence: float = 0.95,
+                periods_per_year: float = 252, risk_free_rate: float = 0.0,
+                prices: Optional[Dict[str, float]] = None) -> RiskReport:
+    """Compute every risk and performance figure for an account.
+
+    Args:
+        account: Account to analyze
+        history: Prices of every symbol the account has traded, one row per period
+        window: Number of returns in each rolling volatility window
+        confidence: Confidence level of the value at risk
+        periods_per_year: Number of history rows in a year, for the Sharpe ratio; 1 leaves it per period
+        risk_free_rate: Annual risk-free rate, for the Sharpe ratio
+        prices: Prices for the unrealized P&L, the last row of the history by default
+
+    Returns:
+        The report
+    """
+    with account.lock:
+        columns = _columns(account.ledger)
+    equity = _equity_curve(columns, history)
+    returns = simple_returns(equity, _period_flows(columns, history))
+    if prices is None:
+        prices = history.latest_prices()
+    return RiskReport(
+        equity=equity,
+        returns=returns,
+        # Drawn down from the growth of the money invested, so a withdrawal is not a loss
+        max_drawdown=max_drawdown(np.concatenate(([1.0], np.cumprod(1.0 + returns)))),
+        volatility=rolling_volatility(returns, window),
+        sharpe_ratio=sharpe_ratio(returns, periods_per_year, risk_free_rate),
+        value_at_risk=value_at_risk(returns, confidence),
+        symbols=_symbol_pnl(columns, prices),
+    )
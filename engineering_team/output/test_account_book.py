@@ -0,0 +1,152 @@
+import random
+import unittest
+
+
+class TestAccountBook(unittest.TestCase):
+    """Tests for the AccountBook engine."""
+    
+    def setUp(self):
+        """Set up a book with two accounts."""
+        from account_book import AccountBook
+        self.book = AccountBook(capacity=1)
+        self.book.open_accounts(['a', 'b'], [1000.0, 500.0])
+    
+    def test_open_accounts(self):
+        """Test opening accounts and growing the book."""
+        self.assertEqual(self.book.size, 2)
+        self.assertEqual(self.book.row_of('b'), 1)
+        self.assertEqual(self.book.account('a').balance, 1000.0)
+        self.assertEqual(self.book.account('b').list_transactions(), [("DEPOSIT", None, None, 500.0)])
+    
+    def test_open_duplicate_account(self):
+        """Test that duplicate account ids are rejected without side effects."""
+        with self.assertRaises(ValueError):
+            self.book.open_accounts(['c', 'a'], [1.0, 1.0])
+        self.assertEqual(self.book.size, 2)
+        with self.assertRaises(KeyError):
+            self.book.row_of('c')
+    
+    def test_apply_orders_rules(self):
+        """Test overdraft, overselling and unknown symbol rejections."""
+        batch = self.book.orders(
+            ['a', 'a', 'b', 'b', 'b', 'a'],
+            ['BUY', 'SELL', 'WITHDRAW', 'BUY', 'SELL', 'BUY'],
+            ['AAPL', 'AAPL', None, 'INVALID', 'TSLA', 'TSLA'],
+            [4, 5, 0, 1, 1, 1],
+            [0.0, 0.0, 600.0, 0.0, 0.0, 0.0],
+        )
+        accepted = self.book.apply_orders(batch)
+        self.assertEqual(accepted.tolist(), [True, False, False, False, False, False])
+        self.assertEqual(self.book.account('a').balance, 400.0)
+        self.assertEqual(self.book.account('a').portfolio, {'AAPL': 4})
+        self.assertEqual(self.book.account('b').balance, 500.0)
+    
+    def test_apply_orders_same_account_in_order(self):
+        """Test that orders for one account take effect in batch order."""
+        batch = self.book.orders(['b', 'b', 'b'], ['DEPOSIT', 'BUY', 'SELL'],
+                                 [None, 'TSLA', 'TSLA'], [0, 1, 1], [300.0, 0.0, 0.0])
+        self.assertEqual(self.book.apply_orders(batch).tolist(), [True, True, True])
+        self.assertEqual(self.book.account('b').balance, 800.0)
+        self.assertEqual(self.book.account('b').list_transactions()[1:], [
+            ("DEPOSIT", None, None, 300.0), ("BUY", "TSLA", 1, 800.0), ("SELL", "TSLA", 1, 800.0)])
+    
+    def test_apply_orders_invalid_amounts(self):
+        """Test that invalid amounts reject the whole batch."""
+        with self.assertRaises(ValueError):
+            self.book.orders(['a', 'b'], ['DEPOSIT', 'WITHDRAW'], amounts=[100.0, 0.0])
+        batch = self.book.orders(['a', 'b'], ['DEPOSIT', 'WITHDRAW'], amounts=[100.0, 1.0])
+        batch['amount'][1] = 0.0
+        with self.assertRaises(ValueError):
+            self.book.apply_orders(batch)
+        self.assertEqual(self.book.account('a').balance, 1000.0)
+    
+    def test_rejected_orders_add_no_symbols(self):
+        """Test that invalid orders and symbols without a price leave the symbol table unchanged."""
+        with self.assertRaises(ValueError):
+            self.book.orders(['a', 'b'], ['BUY', 'BUY'], ['AAPL', 'TSLA'], [1, 0])
+        self.assertEqual(self.book.symbols, [])
+        batch = self.book.orders(['a', 'b'], ['BUY', 'SELL'], ['NOPE', 'NOPE'], [1, 1])
+        self.assertEqual(self.book.apply_orders(batch).tolist(), [False, False])
+        self.assertEqual(self.book.symbols, [])
+        self.assertEqual(self.book.account('a').list_transactions(), [("DEPOSIT", None, None, 1000.0)])
+    
+    def test_view_matches_account(self):
+        """Test that a view behaves like an Account for the same operations."""
+        from accounts import Account
+        view = self.book.open_account('c', 1000.0)
+        account = Account('c', 1000.0)
+        for target in (view, account):
+            target.buy_shares('AAPL', 2)
+            target.deposit(50.0)
+            self.assertFalse(target.withdraw(5000.0))
+            self.assertFalse(target.sell_shares('AAPL', 3))
+            target.sell_shares('AAPL', 1)
+            with self.assertRaises(ValueError):
+                target.buy_shares('AAPL', 0)
+        self.assertEqual(view.balance, account.balance)
+        self.assertEqual(view.get_holdings(), account.get_holdings())
+        self.assertEqual(view.get_profit_or_loss(), account.get_profit_or_loss())
+        self.assertEqual(view.list_transactions(), account.list_transactions())
+    
+    def test_random_batch_matches_scalar_replay(self):
+        """Test a random batch against replaying it on Account objects."""
+        rng = random.Random(7)
+        ids = [f'acct{i}' for i in range(20)]
+        self.assert_matches_scalar_replay(ids, [rng.choice(ids) for _ in range(500)], rng)
+    
+    def test_skewed_batch_matches_scalar_replay(self):
+        """Test a batch where a few accounts place most orders, mixing vectorized rounds and sequential orders."""
+        rng = random.Random(11)
+        ids = [f'acct{i}' for i in range(300)]
+        owners = ['acct0'] * 1500 + ['acct1'] * 400 + [rng.choice(ids) for _ in range(1500)]
+        rng.shuffle(owners)
+        self.assert_matches_scalar_replay(ids, owners, rng)
+    
+    def assert_matches_scalar_replay(self, ids, owners, rng):
+        from account_book import AccountBook
+        from accounts import Account
+        book = AccountBook()
+        book.open_accounts(ids, [5000.0] * len(ids))
+        accounts = {account_id: Account(account_id, 5000.0) for account_id in ids}
+        
+        orders = []
+        for owner in owners:
+            kind = rng.choice(['DEPOSIT', 'WITHDRAW', 'BUY', 'SELL'])
+            symbol = rng.choice(['AAPL', 'TSLA', 'GOOGL', 'NOPE']) if kind in ('BUY', 'SELL') else None
+            orders.append((owner, kind, symbol, rng.randint(1, 4), float(rng.randint(1, 3000))))
+        batch = book.orders(*zip(*orders))
+        accepted = book.apply_orders(batch).tolist()
+        
+        expected = []
+        for account_id, kind, symbol, quantity, amount in orders:
+            account = accounts[account_id]
+            if kind == 'DEPOSIT':
+                account.deposit(amount)
+                expected.append(True)
+            elif kind == 'WITHDRAW':
+                expected.append(account.withdraw(amount))
+            elif kind == 'BUY':
+                expected.append(account.buy_shares(symbol, quantity))
+            else:
+                expected.append(account.sell_shares(symbol, quantity))
+        
+        self.assertEqual(accepted, expected)
+        for account_id, account in accounts.items():
+            view = book.account(account_id)
+            self.assertEqual(view.balance, account.balance)
+            self.assertEqual(view.portfolio, account.portfolio)
+            self.assertEqual(view.list_transactions(), account.list_transactions())
+    
+    def test_portfolio_values(self):
+        """Test valuing every account in one call."""
+        batch = self.book.orders(['a', 'b'], ['BUY', 'BUY'], ['AAPL', 'AAPL'], [2, 3])
+        self.book.apply_orders(batch)
+        self.assertEqual(self.book.portfolio_values().tolist(), [300.0, 450.0])
+        self.assertEqual(self.book.portfolio_values({'AAPL': 10.0}).tolist(), [20.0, 30.0])
+        self.book.apply_orders(self.book.orders(['a'], ['SELL'], ['AAPL'], [2]))
+        self.assertEqual(self.book.positions, [{1: 3}])
+        self.assertEqual(self.book.portfolio_values().tolist(), [0.0, 450.0])
+
+
+if __name__ == '__main__':
+    unittest.main()
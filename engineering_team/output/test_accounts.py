@@ -237,5 +237,257 @@ class TestAccount(unittest.TestCase):
         self.assertEqual(len(self.account.transactions), 4)  # Original unchanged
 
 
+class TestLedger(unittest.TestCase):
+    """Tests for the columnar transaction ledger."""
+    
+    def setUp(self):
+        """Set up an account with a few transactions."""
+        from accounts import Account
+        self.account = Account('ledger1', 1000.0)
+        self.account.buy_shares('AAPL', 2)
+        self.account.deposit(200.0)
+        self.account.sell_shares('AAPL', 1)
+    
+    def test_symbols_are_interned(self):
+        """Test that repeated symbols share one id."""
+        self.account.buy_shares('AAPL', 1)
+        ledger = self.account.ledger
+        self.assertEqual(ledger.symbols, ['AAPL'])
+        self.assertEqual(list(ledger.symbol_ids), [-1, 0, -1, 0, 0])
+    
+    def test_sequence_view(self):
+        """Test indexing, slicing and iterating the transactions view."""
+        transactions = self.account.transactions
+        self.assertEqual(transactions[-1], ("SELL", "AAPL", 1, 150.0))
+        self.assertEqual(transactions[1:3], [("BUY", "AAPL", 2, 150.0), ("DEPOSIT", None, None, 200.0)])
+        self.assertEqual(list(transactions), self.account.list_transactions())
+        with self.assertRaises(IndexError):
+            transactions[4]
+    
+    def test_iter_transactions_window(self):
+        """Test iterating over a window of the ledger."""
+        window = list(self.account.iter_transactions(1, 3))
+        self.assertEqual(window, [("BUY", "AAPL", 2, 150.0), ("DEPOSIT", None, None, 200.0)])
+    
+    def test_running_state(self):
+        """Test that balance and positions are maintained incrementally."""
+        self.assertEqual(self.account.balance, 1050.0)  # 1000 - 300 + 200 + 150
+        self.assertEqual(self.account.portfolio, {'AAPL': 1})
+    
+    def test_column_view(self):
+        """Test that column views are read-only and do not copy."""
+        with self.account.ledger.column('prices') as prices:
+            self.assertEqual(prices.tolist(), [1000.0, 150.0, 200.0, 150.0])
+            self.assertTrue(prices.readonly)
+        with self.assertRaises(ValueError):
+            self.account.ledger.column('unknown')
+
+    def test_failed_append_records_nothing(self):
+        """Test that a transaction the columns cannot hold leaves the ledger and balances unchanged."""
+        ledger = self.account.ledger
+        self.account.deposit(10 ** 30)
+        before = (list(ledger), ledger.balance, dict(ledger.positions), list(ledger.symbols))
+        with self.assertRaises(OverflowError):
+            self.account.buy_shares('AAPL', 10 ** 19)
+        with self.assertRaises(OverflowError):
+            ledger.append("BUY", "NVDA", 10 ** 19, 1.0)
+        with ledger.column('prices'):
+            with self.assertRaises(BufferError):
+                self.account.deposit(50.0)
+        self.assertEqual((list(ledger), ledger.balance, dict(ledger.positions), list(ledger.symbols)), before)
+        self.assertEqual({len(getattr(ledger, name)) for name in
+                          ("kinds", "symbol_ids", "quantities", "prices", "times")}, {len(before[0])})
+        self.account.deposit(50.0)
+        self.assertEqual(ledger[-1], ("DEPOSIT", None, None, 50.0))
+
+
+class TestPointInTime(unittest.TestCase):
+    """Tests for point-in-time holdings and profit/loss queries."""
+    
+    def setUp(self):
+        """Set up an account with timestamped transactions and frequent checkpoints."""
+        from accounts import Account, Ledger
+        self.account = Account('history1', 1000.0)
+        self.account.ledger = Ledger(checkpoint_interval=2)
+        ledger = self.account.ledger
+        ledger.append("DEPOSIT", None, None, 1000.0, timestamp=10.0)
+        ledger.append("BUY", "AAPL", 2, 150.0, timestamp=20.0)
+        ledger.append("BUY", "TSLA", 1, 600.0, timestamp=30.0)
+        ledger.append("SELL", "AAPL", 2, 100.0, timestamp=40.0)
+        ledger.append("DEPOSIT", None, None, 50.0, timestamp=50.0)
+    
+    def test_holdings_at(self):
+        """Test holdings at times before, between and after transactions."""
+        self.assertEqual(self.account.holdings_at(5.0), {})
+        self.assertEqual(self.account.holdings_at(20.0), {'AAPL': 2})
+        self.assertEqual(self.account.holdings_at(35.0), {'AAPL': 2, 'TSLA': 1})
+        self.assertEqual(self.account.holdings_at(45.0), {'TSLA': 1})
+        self.assertEqual(self.account.holdings_at(100.0), self.account.get_holdings())
+    
+    def test_profit_or_loss_at(self):
+        """Test profit/loss at a point in time with current and given prices."""
+        # Balance 1000 - 300 = 700, plus 2 AAPL at the current price of 150
+        self.assertEqual(self.account.profit_or_loss_at(25.0), 0.0)
+        self.assertEqual(self.account.profit_or_loss_at(25.0, prices={'AAPL': 200.0}), 100.0)
+        # Balance 1000 - 300 - 600 + 200 = 300, plus 1 TSLA at 800
+        self.assertEqual(self.account.profit_or_loss_at(45.0), 100.0)
+    
+    def test_state_matches_full_replay(self):
+        """Test that checkpointed state matches replaying from the start."""
+        ledger = self.account.ledger
+        for seq in range(len(ledger) + 1):
+            balance, positions = 0.0, {}
+            for kind, symbol, quantity, price in ledger[:seq]:
+                if kind == "DEPOSIT":
+                    balance += price
+                elif kind == "BUY":
+                    balance -= price * quantity
+                    positions[symbol] = positions.get(symbol, 0) + quantity
+                elif kind == "SELL":
+                    balance += price * quantity
+                    positions[symbol] -= quantity
+                    if positions[symbol] == 0:
+                        del positions[symbol]
+            self.assertEqual(ledger.state_at(seq), (balance, positions))
+    
+    def test_timestamps_never_decrease(self):
+        """Test that out-of-order timestamps are clamped."""
+        self.account.ledger.append("DEPOSIT", None, None, 1.0, timestamp=1.0)
+        self.assertEqual(self.account.ledger.times[-1], 50.0)
+
+
+class TestPricing(unittest.TestCase):
+    """Tests for price providers and the price cache."""
+    
+    def setUp(self):
+        """Set up a counting price provider and a cache with a fake clock."""
+        from accounts import CachedPriceProvider, PriceProvider, get_price_provider
+        
+        class CountingProvider(PriceProvider):
+            def __init__(self):
+                self.calls = []
+            
+            def get_prices(self, symbols):
+                symbols = list(symbols)
+                self.calls.append(symbols)
+                return {symbol: 100.0 + len(symbol) for symbol in symbols}
+        
+        self.now = 0.0
+        self.source = CountingProvider()
+        self.cache = CachedPriceProvider(self.source, ttl=10.0, maxsize=2, clock=lambda: self.now)
+        self.original_provider = get_price_provider()
+    
+    def tearDown(self):
+        """Restore the default price provider."""
+        from accounts import set_price_provider
+        set_price_provider(self.original_provider)
+    
+    def test_stub_provider_matches_get_share_price(self):
+        """Test that the default provider serves the test prices."""
+        from accounts import get_share_prices
+        self.assertEqual(get_share_prices(['AAPL', 'UNKNOWN']), {'AAPL': 150.0, 'UNKNOWN': 0.0})
+    
+    def test_cache_hits_and_misses(self):
+        """Test that misses are fetched in one batch and then served from cache."""
+        self.assertEqual(self.cache.get_prices(['AB', 'ABC', 'AB']), {'AB': 102.0, 'ABC': 103.0})
+        self.assertEqual(self.source.calls, [['AB', 'ABC']])
+        self.assertEqual(self.cache.get_price('AB'), 102.0)
+        self.assertEqual(len(self.source.calls), 1)
+        self.assertEqual(self.cache.stats(), {'hits': 1, 'misses': 2, 'size': 2})
+    
+    def test_cache_ttl(self):
+        """Test that expired entries are fetched again."""
+        self.cache.get_prices(['AB'])
+        self.now = 10.0
+        self.cache.get_prices(['AB'])
+        self.assertEqual(self.source.calls, [['AB'], ['AB']])
+    
+    def test_cache_lru_eviction(self):
+        """Test that the least recently used symbol is evicted first."""
+        self.cache.get_prices(['A', 'B'])
+        self.cache.get_prices(['A'])
+        self.cache.get_prices(['C'])
+        self.cache.get_prices(['A', 'B'])
+        self.assertEqual(self.source.calls[-1], ['B'])
+    
+    def test_portfolio_value_uses_one_lookup(self):
+        """Test that valuing a portfolio costs one bulk lookup."""
+        from accounts import Account, set_price_provider
+        account = Account('prices1', 10000.0)
+        account.buy_shares('AAPL', 2)
+        account.buy_shares('TSLA', 1)
+        set_price_provider(self.cache)
+        self.assertEqual(account.get_portfolio_value(), 312.0)  # 3 shares at 104
+        self.assertEqual(self.source.calls, [['AAPL', 'TSLA']])
+
+
+class TestConcurrency(unittest.TestCase):
+    """Tests for sharing accounts between threads."""
+    
+    def test_parallel_withdrawals_never_overdraw(self):
+        """Test that concurrent withdrawals and purchases cannot overdraw."""
+        import threading
+        from accounts import Account
+        account = Account('shared', 1000.0)
+        
+        def spend():
+            for _ in range(200):
+                account.withdraw(7.0)
+                account.buy_shares('AAPL', 1)
+        
+        threads = [threading.Thread(target=spend) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        self.assertGreaterEqual(account.balance, 0.0)
+        balance, positions = account.ledger.state_at(len(account.ledger))
+        self.assertEqual(balance, account.balance)
+        self.assertEqual(positions, account.get_holdings())
+    
+    def test_registry(self):
+        """Test creating and looking up accounts in a registry."""
+        from accounts import AccountRegistry
+        registry = AccountRegistry()
+        account = registry.create('r1', 100.0)
+        self.assertIs(registry.get('r1'), account)
+        self.assertIn('r1', registry)
+        self.assertEqual(len(registry), 1)
+        with self.assertRaises(ValueError):
+            registry.create('r1', 50.0)
+        with self.assertRaises(KeyError):
+            registry.get('missing')
+    
+    def test_registry_with_storage(self):
+        """Test that a registry loads accounts from its storage backend."""
+        import os
+        import tempfile
+        from accounts import AccountRegistry
+        from persistence import SQLiteAccountStore
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'registry.db')
+            with SQLiteAccountStore(path) as store:
+                AccountRegistry(store).create('r2', 100.0).deposit(20.0)
+            with SQLiteAccountStore(path) as store:
+                registry = AccountRegistry(store)
+                self.assertIn('r2', registry)
+                self.assertNotIn('r3', registry)
+                with self.assertRaises(ValueError):
+                    registry.create('r2', 10.0)
+                self.assertEqual(registry.get('r2').balance, 120.0)
+    
+    def test_trade_returns_fill_price(self):
+        """Test that trade and execute return the price they recorded, or None when rejected."""
+        from accounts import Account
+        account = Account('fills', 1000.0)
+        self.assertEqual(account.trade('BUY', 'AAPL', 2), 150.0)
+        self.assertEqual(account.execute('SELL', 'AAPL', 1, 155.5), 155.5)
+        self.assertIsNone(account.trade('SELL', 'AAPL', 5))
+        self.assertIsNone(account.trade('BUY', 'NOPE', 1))
+        self.assertIsNone(account.execute('BUY', 'AAPL', 100, 150.0))
+        self.assertEqual(account.list_transactions()[-1], ('SELL', 'AAPL', 1, 155.5))
+
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
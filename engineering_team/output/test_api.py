@@ -0,0 +1,141 @@
+import asyncio
+import unittest
+
+
+class TestAccountAPI(unittest.TestCase):
+    """Tests for the accounts HTTP API and its load generator."""
+    
+    def run_against_server(self, scenario):
+        """Start a server on a free port and run an async scenario with its URL host and port."""
+        import api
+        
+        async def main():
+            server = await api.start_server(port=0)
+            try:
+                return await scenario("127.0.0.1", server.sockets[0].getsockname()[1])
+            finally:
+                server.close()
+                await server.wait_closed()
+        return asyncio.run(main())
+    
+    def test_account_lifecycle(self):
+        """Test creating an account and trading through the API."""
+        from load_test import _Connection
+        
+        async def scenario(host, port):
+            connection = _Connection(host, port)
+            responses = [
+                await connection.request("POST", "/accounts", {"account_id": "alice", "initial_deposit": 1000}),
+                await connection.request("POST", "/accounts/alice/deposit", {"amount": 500}),
+                await connection.request("POST", "/accounts/alice/buy", {"symbol": "aapl", "quantity": 5}),
+                await connection.request("POST", "/accounts/alice/sell", {"symbol": "AAPL", "quantity": 2}),
+                await connection.request("POST", "/accounts/alice/withdraw", {"amount": 100}),
+                await connection.request("GET", "/accounts/alice/holdings"),
+                await connection.request("GET", "/accounts/alice"),
+                await connection.request("GET", "/accounts/alice/transactions?start=1&limit=2"),
+            ]
+            connection.close()
+            return responses
+        
+        responses = self.run_against_server(scenario)
+        self.assertEqual(responses[0], (201, {"account_id": "alice", "balance": 1000.0}))
+        self.assertEqual(responses[1], (200, {"balance": 1500.0}))
+        self.assertEqual(responses[2], (200, {"balance": 750.0, "position": 5}))
+        self.assertEqual(responses[3], (200, {"balance": 1050.0, "position": 3}))
+        self.assertEqual(responses[4], (200, {"balance": 950.0}))
+        self.assertEqual(responses[5], (200, {"holdings": {"AAPL": 3}}))
+        status, summary = responses[6]
+        self.assertEqual(summary["portfolio_value"], 450.0)
+        self.assertEqual(summary["profit_or_loss"], 400.0)
+        status, history = responses[7]
+        self.assertEqual(history["count"], 5)
+        self.assertEqual(history["transactions"], [
+            {"type": "DEPOSIT", "amount": 500.0},
+            {"type": "BUY", "symbol": "AAPL", "quantity": 5, "price": 150.0},
+        ])
+    
+    def test_errors(self):
+        """Test the status codes of invalid, unknown and refused requests."""
+        from load_test import _Connection
+        
+        async def scenario(host, port):
+            connection = _Connection(host, port)
+            await connection.request("POST", "/accounts", {"account_id": "bob", "initial_deposit": 100})
+            statuses = [
+                (await connection.request("POST", "/accounts", {"account_id": "bob", "initial_deposit": 100}))[0],
+                (await connection.request("GET", "/accounts/nobody"))[0],
+                (await connection.request("POST", "/accounts/bob/deposit", {"amount": -5}))[0],
+                (await connection.request("POST", "/accounts/bob/deposit", {}))[0],
+                (await connection.request("POST", "/accounts/bob/withdraw", {"amount": 500}))[0],
+                (await connection.request("POST", "/accounts/bob/buy", {"symbol": "TSLA", "quantity": 1}))[0],
+                (await connection.request("POST", "/accounts/bob/sell", {"symbol": "AAPL", "quantity": 1}))[0],
+                (await connection.request("GET", "/accounts/bob/deposit"))[0],
+                (await connection.request("GET", "/nowhere"))[0],
+            ]
+            connection.close()
+            return statuses
+        
+        self.assertEqual(self.run_against_server(scenario), [409, 404, 400, 400, 409, 409, 409, 405, 404])
+    
+    def test_invalid_amounts(self):
+        """Test that negative, zero and non-finite amounts are refused with 400."""
+        from load_test import _Connection
+
+        async def scenario(host, port):
+            connection = _Connection(host, port)
+            statuses = []
+            for amount in [-500, 0, "nan", "inf", "-inf", float("nan")]:
+                statuses.append((await connection.request(
+                    "POST", "/accounts", {"account_id": f"carol{len(statuses)}", "initial_deposit": amount}))[0])
+            await connection.request("POST", "/accounts", {"account_id": "dave", "initial_deposit": 100})
+            for amount in [-500, "nan", "inf", float("inf")]:
+                statuses.append((await connection.request("POST", "/accounts/dave/deposit", {"amount": amount}))[0])
+                statuses.append((await connection.request("POST", "/accounts/dave/withdraw", {"amount": amount}))[0])
+            summary = await connection.request("GET", "/accounts/dave")
+            missing = await connection.request("GET", "/accounts/carol0")
+            connection.close()
+            return statuses, summary, missing
+
+        statuses, summary, missing = self.run_against_server(scenario)
+        self.assertEqual(statuses, [400] * 14)
+        self.assertEqual(summary[1]["balance"], 100.0)
+        self.assertEqual(missing[0], 404)
+
+    def test_invalid_content_length(self):
+        """Test that a request with an unparseable Content-Length gets a 400 response."""
+
+        async def scenario(host, port):
+            responses = []
+            for length in ["abc", "-5"]:
+                reader, writer = await asyncio.open_connection(host, port)
+                writer.write(f"POST /accounts HTTP/1.1\r\nHost: {host}\r\nContent-Length: {length}\r\n\r\n".encode())
+                await writer.drain()
+                responses.append(await reader.read())
+                writer.close()
+            return responses
+
+        for response in self.run_against_server(scenario):
+            self.assertTrue(response.startswith(b"HTTP/1.1 400 Bad Request\r\n"), response)
+            self.assertIn(b'"Invalid Content-Length"', response)
+
+    def test_load_report(self):
+        """Test that the load generator sends the requested number of requests and reports percentiles."""
+        from load_test import run_load
+        report = self.run_against_server(
+            lambda host, port: run_load(f"http://{host}:{port}", concurrency=4, requests=200))
+        self.assertEqual(report["overall"]["requests"], 200)
+        self.assertEqual(sum(report["statuses"].values()), 200)
+        self.assertLessEqual(report["overall"]["p50_ms"], report["overall"]["p99_ms"])
+        self.assertGreater(report["throughput"], 0)
+    
+    def test_percentile(self):
+        """Test nearest-rank percentiles."""
+        from load_test import percentile
+        values = [float(value) for value in range(1, 101)]
+        self.assertEqual(percentile(values, 0.5), 50.0)
+        self.assertEqual(percentile(values, 0.99), 99.0)
+        self.assertEqual(percentile([], 0.5), 0.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+import unittest
+
+import numpy as np
+
+
+class TestBacktest(unittest.TestCase):
+    """Tests for the vectorized backtest engine."""
+    
+    def random_inputs(self, steps=30, count=25, symbols=4, seed=0):
+        rng = np.random.default_rng(seed)
+        prices = np.round(rng.uniform(10.0, 500.0, size=(steps, symbols)), 2)
+        prices[3, 1] = 0.0  # a step where one symbol has no price
+        orders = rng.integers(-6, 7, size=(steps, count, symbols))
+        orders[rng.random(orders.shape) < 0.5] = 0
+        cash = np.round(rng.normal(0.0, 400.0, size=(steps, count)), 2)
+        cash[rng.random(cash.shape) < 0.7] = 0.0
+        deposits = rng.uniform(500.0, 5000.0, size=count)
+        return prices, orders, deposits, cash
+    
+    def assert_results_equal(self, actual, expected):
+        for field in actual._fields:
+            np.testing.assert_array_equal(getattr(actual, field), getattr(expected, field), err_msg=field)
+    
+    def test_matches_scalar_replay(self):
+        """Test that the vectorized backtest matches an Account replay exactly."""
+        from backtest import replay_accounts, run_backtest
+        for seed in range(3):
+            inputs = self.random_inputs(seed=seed)
+            result = run_backtest(*inputs)
+            self.assert_results_equal(result, replay_accounts(*inputs))
+            self.assertTrue(result.rejected.any())
+            self.assertTrue(result.cash_rejected.any())
+    
+    def test_simple_sequence(self):
+        """Test a hand-checked sequence of buys, sells and rejections."""
+        from backtest import run_backtest
+        prices = np.array([[150.0, 800.0], [200.0, 800.0]])
+        orders = np.zeros((2, 1, 2), dtype=np.int64)
+        orders[0, 0] = [2, 1]   # AAPL costs 300, TSLA 800 > 700 left
+        orders[1, 0] = [-3, 0]  # only 2 held
+        result = run_backtest(prices, orders, 1000.0)
+        self.assertEqual(result.balances.tolist(), [700.0])
+        self.assertEqual(result.positions.tolist(), [[2, 0]])
+        self.assertEqual(result.equity[:, 0].tolist(), [1000.0, 1100.0])
+        self.assertEqual(result.rejected[:, 0].tolist(), [[False, True], [True, False]])
+        self.assertEqual(result.profit_or_loss()[:, 0].tolist(), [0.0, 100.0])
+    
+    def test_shape_validation(self):
+        """Test rejecting inconsistent input shapes."""
+        from backtest import run_backtest
+        with self.assertRaises(ValueError):
+            run_backtest(np.ones((2, 2)), np.zeros((3, 1, 2)), 1.0)
+        with self.assertRaises(ValueError):
+            run_backtest(np.ones((2, 2)), np.zeros((2, 1, 2)), 1.0, cash=np.zeros((2, 2)))
+
+
+if __name__ == '__main__':
+    unittest.main()
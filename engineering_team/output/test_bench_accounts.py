@@ -0,0 +1,38 @@
+import unittest
+
+
+class TestBenchmarks(unittest.TestCase):
+    """Tests for the benchmark runner."""
+    
+    def test_run_benchmarks(self):
+        """Test running a benchmark at a small scale."""
+        from bench_accounts import run_benchmarks
+        results = run_benchmarks(['deposit', 'get_portfolio_value[10]'], scale=0.001, repeat=2)
+        self.assertEqual(results['deposit']['ops'], 200)
+        self.assertGreater(results['get_portfolio_value[10]']['ops_per_sec'], 0)
+    
+    def test_compare(self):
+        """Test detecting regressions beyond the threshold."""
+        from bench_accounts import compare
+        baseline = {'a': {'ops_per_sec': 100.0}, 'b': {'ops_per_sec': 100.0}, 'c': {'skipped': True}}
+        results = {'a': {'ops_per_sec': 85.0}, 'b': {'ops_per_sec': 70.0}, 'c': {'ops_per_sec': 1.0},
+                   'd': {'ops_per_sec': 1.0}}
+        regressions = compare(results, baseline, threshold=0.2)
+        self.assertEqual(len(regressions), 1)
+        self.assertTrue(regressions[0].startswith('b:'))
+    
+    def test_main_fails_on_regression(self):
+        """Test that main exits non-zero when a regression is found."""
+        import json
+        import os
+        import tempfile
+        from bench_accounts import main
+        with tempfile.TemporaryDirectory() as tmpdir:
+            baseline = os.path.join(tmpdir, 'baseline.json')
+            with open(baseline, 'w') as f:
+                json.dump({'results': {'deposit': {'ops_per_sec': float('inf')}}}, f)
+            self.assertEqual(main(['deposit', '--scale', '0.001', '--repeat', '1', '--baseline', baseline]), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+import unittest
+
+
+class TestOrderBook(unittest.TestCase):
+    """Tests for the limit order book and matching engine."""
+    
+    def setUp(self):
+        """Set up an engine and two funded accounts, one holding shares."""
+        from accounts import Account
+        from order_book import MatchingEngine
+        self.engine = MatchingEngine()
+        self.buyer = Account('buyer', 10000.0)
+        self.seller = Account('seller', 10000.0)
+        self.seller.buy_shares('AAPL', 20)  # balance 7000
+    
+    def test_resting_orders(self):
+        """Test that non-crossing orders rest at their levels."""
+        from order_book import BUY, OPEN, SELL
+        order, fills = self.engine.submit(self.buyer, 'AAPL', BUY, 5, 140.0)
+        self.engine.submit(self.seller, 'AAPL', SELL, 5, 160.0)
+        self.assertEqual(fills, [])
+        self.assertEqual(order.status, OPEN)
+        book = self.engine.book('AAPL')
+        self.assertEqual((book.best_bid(), book.best_ask()), (140.0, 160.0))
+        self.assertEqual(book.depth(BUY), [(140.0, 5)])
+    
+    def test_price_time_priority(self):
+        """Test that better prices fill first, then older orders."""
+        from order_book import BUY, SELL, Fill
+        first, _ = self.engine.submit(self.seller, 'AAPL', SELL, 3, 151.0)
+        second, _ = self.engine.submit(self.seller, 'AAPL', SELL, 3, 151.0)
+        best, _ = self.engine.submit(self.seller, 'AAPL', SELL, 2, 150.0)
+        order, fills = self.engine.submit(self.buyer, 'AAPL', BUY, 6, 152.0)
+        self.assertEqual(fills, [
+            Fill('AAPL', 150.0, 2, order.order_id, best.order_id),
+            Fill('AAPL', 151.0, 3, order.order_id, first.order_id),
+            Fill('AAPL', 151.0, 1, order.order_id, second.order_id),
+        ])
+        self.assertEqual(second.remaining, 2)
+        self.assertEqual(self.buyer.get_holdings(), {'AAPL': 6})
+        self.assertEqual(self.buyer.balance, 10000.0 - 300.0 - 453.0 - 151.0)
+        self.assertEqual(self.seller.get_holdings(), {'AAPL': 14})
+        self.assertEqual(self.buyer.transactions[-1], ("BUY", "AAPL", 1, 151.0))
+    
+    def test_cancel(self):
+        """Test cancelling a resting order."""
+        from order_book import BUY, CANCELLED, SELL
+        order, _ = self.engine.submit(self.buyer, 'AAPL', BUY, 5, 150.0)
+        self.assertTrue(self.engine.cancel(order.order_id))
+        self.assertFalse(self.engine.cancel(order.order_id))
+        self.assertEqual(order.status, CANCELLED)
+        _, fills = self.engine.submit(self.seller, 'AAPL', SELL, 5, 150.0)
+        self.assertEqual(fills, [])
+        self.assertIsNone(self.engine.book('AAPL').best_bid())
+    
+    def test_rejections(self):
+        """Test that orders the account cannot cover are rejected."""
+        from order_book import BUY, REJECTED, SELL
+        resting, _ = self.engine.submit(self.buyer, 'AAPL', BUY, 10, 150.0)
+        self.buyer.withdraw(9500.0)  # 500 left, less than 5 * 150
+        order, fills = self.engine.submit(self.seller, 'AAPL', SELL, 5, 150.0)
+        self.assertEqual(fills, [])
+        self.assertEqual(resting.status, REJECTED)
+        self.assertEqual(self.engine.book('AAPL').best_ask(), 150.0)
+        
+        oversell, fills = self.engine.submit(self.buyer, 'AAPL', SELL, 1, 100.0)
+        self.assertEqual(fills, [])
+        self.assertEqual(oversell.status, 'OPEN')
+        self.engine.submit(self.seller, 'AAPL', BUY, 1, 100.0)
+        self.assertEqual(oversell.status, REJECTED)
+        self.assertEqual(self.buyer.list_transactions(), [("DEPOSIT", None, None, 10000.0),
+                                                          ("WITHDRAW", None, None, 9500.0)])
+    
+    def test_match_tick(self):
+        """Test filling resting orders when the market reaches their price."""
+        from order_book import BUY, FILLED, SELL
+        from price_feed import Tick
+        bid, _ = self.engine.submit(self.buyer, 'AAPL', BUY, 5, 145.0)
+        low_bid, _ = self.engine.submit(self.buyer, 'AAPL', BUY, 5, 140.0)
+        ask, _ = self.engine.submit(self.seller, 'AAPL', SELL, 5, 155.0)
+        fills = self.engine.on_tick(Tick('AAPL', 144.0))
+        self.assertEqual([(fill.price, fill.quantity, fill.buy_order_id) for fill in fills],
+                         [(144.0, 5, bid.order_id)])
+        self.assertEqual(bid.status, FILLED)
+        self.assertEqual(self.buyer.get_holdings(), {'AAPL': 5})
+        self.engine.on_tick(Tick('AAPL', 156.0))
+        self.assertEqual(ask.status, FILLED)
+        self.assertEqual(self.seller.get_holdings(), {'AAPL': 15})
+        self.assertEqual(low_bid.status, 'OPEN')
+    
+    def test_submit_batch_without_accounts(self):
+        """Test batch submission of orders not backed by accounts."""
+        from order_book import BUY, SELL
+        fills = self.engine.submit_batch([
+            (None, 'TSLA', SELL, 10, 800.0),
+            (None, 'TSLA', BUY, 4, 801.0),
+            (None, 'TSLA', BUY, 10, 799.0),
+        ])
+        self.assertEqual([(fill.price, fill.quantity) for fill in fills], [(800.0, 4)])
+        self.assertEqual(self.engine.book('TSLA').depth(SELL), [(800.0, 6)])
+    
+    def test_invalid_orders(self):
+        """Test validation of order parameters."""
+        with self.assertRaises(ValueError):
+            self.engine.submit(self.buyer, 'AAPL', 'HOLD', 1, 1.0)
+        with self.assertRaises(ValueError):
+            self.engine.submit(self.buyer, 'AAPL', 'BUY', 0, 1.0)
+        with self.assertRaises(ValueError):
+            self.engine.submit(self.buyer, 'AAPL', 'BUY', 1, 0.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,146 @@
+import os
+import sqlite3
+import tempfile
+import time
+import unittest
+
+
+class TestSQLiteAccountStore(unittest.TestCase):
+    """Tests for the SQLite account store."""
+    
+    def setUp(self):
+        """Create a temporary database path."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, 'accounts.db')
+    
+    def tearDown(self):
+        """Remove the temporary database."""
+        self.tmpdir.cleanup()
+    
+    def test_round_trip(self):
+        """Test that a reloaded account matches the original."""
+        from persistence import SQLiteAccountStore
+        with SQLiteAccountStore(self.path) as store:
+            account = store.create_account('p1', 1000.0, checkpoint_interval=3)
+            account.buy_shares('AAPL', 2)
+            account.deposit(250.0)
+            account.sell_shares('AAPL', 1)
+            account.buy_shares('TSLA', 1)
+            account.withdraw(10.0)
+            account.buy_shares('AAPL', 1)
+        
+        with SQLiteAccountStore(self.path) as store:
+            self.assertEqual(store.account_ids(), ['p1'])
+            loaded = store.load('p1')
+            self.assertEqual(loaded.list_transactions(), account.list_transactions())
+            self.assertEqual(loaded.balance, account.balance)
+            self.assertEqual(loaded.get_holdings(), account.get_holdings())
+            self.assertEqual(loaded.initial_deposit, 1000.0)
+            for seq in range(len(account.ledger) + 1):
+                self.assertEqual(loaded.ledger.state_at(seq), account.ledger.state_at(seq))
+            # New transactions on the loaded account are persisted too
+            loaded.deposit(1.0)
+        
+        with SQLiteAccountStore(self.path) as store:
+            self.assertEqual(store.load('p1').list_transactions()[-1], ("DEPOSIT", None, None, 1.0))
+    
+    def test_snapshots_saved_at_checkpoints(self):
+        """Test that one snapshot is written per checkpoint interval."""
+        from persistence import SQLiteAccountStore
+        with SQLiteAccountStore(self.path) as store:
+            account = store.create_account('p2', 100.0, checkpoint_interval=2)
+            for _ in range(4):
+                account.deposit(1.0)
+        conn = sqlite3.connect(self.path)
+        self.assertEqual(conn.execute("SELECT number, balance FROM snapshots").fetchall(),
+                         [(1, 101.0), (2, 103.0)])
+        conn.close()
+    
+    def test_fsync_always_commits_each_entry(self):
+        """Test that the always policy commits before the call returns."""
+        from persistence import SQLiteAccountStore
+        store = SQLiteAccountStore(self.path, fsync_policy='always')
+        account = store.create_account('p3', 100.0)
+        account.deposit(5.0)
+        conn = sqlite3.connect(self.path)
+        self.assertEqual(conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0], 2)
+        conn.close()
+        store.close()
+    
+    def test_group_commit(self):
+        """Test that queued writes are committed together."""
+        from persistence import SQLiteAccountStore
+        store = SQLiteAccountStore(self.path, commit_every=10**6, commit_interval=60.0)
+        account = store.create_account('p4', 100.0)
+        commits = store.commits
+        for _ in range(100):
+            account.deposit(1.0)
+        store.flush()
+        self.assertEqual(store.commits, commits + 1)
+        store.close()
+    
+    def wait_for(self, condition):
+        for _ in range(500):
+            if condition():
+                return
+            time.sleep(0.01)
+        self.fail("timed out")
+    
+    def test_failed_commit_is_retried(self):
+        """Test that writes of a failed group commit stay queued, in order, until they can be stored."""
+        from persistence import SQLiteAccountStore
+        store = SQLiteAccountStore(self.path, commit_interval=0.01)
+        account = store.create_account('p5', 100.0)
+        store.flush()
+        # Take the key of the next entry, so its group commit fails
+        conn = sqlite3.connect(self.path)
+        conn.execute("INSERT INTO entries VALUES ('p5', 1, 0, NULL, 0, 1.0, 0.0)")
+        conn.commit()
+        account.deposit(1.0)
+        self.wait_for(lambda: store._error is not None)
+        # The trade happened in memory, so recording it does not raise; check() reports the failure
+        account.deposit(2.0)
+        self.assertEqual(account.balance, 103.0)
+        with self.assertRaises(sqlite3.IntegrityError):
+            store.check()
+        self.assertEqual(conn.execute("SELECT COUNT(*) FROM entries WHERE account_id = 'p5'").fetchone()[0], 2)
+        
+        conn.execute("DELETE FROM entries WHERE account_id = 'p5' AND seq = 1")
+        conn.commit()
+        conn.close()
+        self.wait_for(lambda: store._error is None)
+        store.check()
+        store.close()
+        with SQLiteAccountStore(self.path) as store:
+            loaded = store.load('p5')
+            self.assertEqual(loaded.list_transactions(), account.list_transactions())
+            self.assertEqual(loaded.balance, 103.0)
+    
+    def test_close_raises_unstored_writes(self):
+        """Test that close() raises when queued writes still cannot be stored."""
+        from persistence import SQLiteAccountStore
+        for policy in ('commit', 'always'):
+            path = os.path.join(self.tmpdir.name, f'{policy}.db')
+            store = SQLiteAccountStore(path, fsync_policy=policy, commit_interval=0.01)
+            account = store.create_account('p6', 100.0)
+            conn = sqlite3.connect(path)
+            conn.execute("INSERT INTO entries VALUES ('p6', 1, 0, NULL, 0, 1.0, 0.0)")
+            conn.commit()
+            conn.close()
+            account.deposit(1.0)
+            self.assertEqual(account.balance, 101.0)
+            with self.assertRaises(sqlite3.IntegrityError):
+                store.close()
+    
+    def test_invalid_policy_and_missing_account(self):
+        """Test rejecting unknown fsync policies and account ids."""
+        from persistence import SQLiteAccountStore
+        with self.assertRaises(ValueError):
+            SQLiteAccountStore(self.path, fsync_policy='sometimes')
+        with SQLiteAccountStore(self.path) as store:
+            with self.assertRaises(KeyError):
+                store.load('missing')
+
+
+if __name__ == '__main__':
+    unittest.main()
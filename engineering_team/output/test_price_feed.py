@@ -0,0 +1,87 @@
+import asyncio
+import json
+import os
+import tempfile
+import unittest
+
+
+class TestPriceFeed(unittest.TestCase):
+    """Tests for the streaming price feed and incremental revaluation."""
+    
+    def setUp(self):
+        """Set up a live provider, a tracker and two accounts."""
+        from accounts import Account
+        from price_feed import LivePriceProvider, PortfolioTracker
+        self.provider = LivePriceProvider()
+        self.tracker = PortfolioTracker(self.provider)
+        self.alice = Account('alice', 10000.0)
+        self.bob = Account('bob', 10000.0)
+        self.alice.buy_shares('AAPL', 10)
+        self.bob.buy_shares('TSLA', 2)
+        self.tracker.track(self.alice)
+        self.tracker.track(self.bob)
+    
+    def run_feed(self, source):
+        from price_feed import PriceFeed
+        feed = PriceFeed(self.provider, [self.tracker])
+        return asyncio.run(feed.run(source))
+    
+    def test_tick_touches_only_holders(self):
+        """Test that a tick revalues only the accounts holding the symbol."""
+        from price_feed import Tick
+        self.assertEqual(self.tracker.on_tick(Tick('AAPL', 160.0)), ['alice'])
+        self.assertEqual(self.tracker.portfolio_value('alice'), 1600.0)
+        self.assertEqual(self.tracker.portfolio_value('bob'), 1600.0)
+        self.assertEqual(self.tracker.on_tick(Tick('GOOGL', 1.0)), [])
+        self.assertEqual(self.tracker.profit_or_loss('alice'), 100.0)
+    
+    def test_trades_update_index(self):
+        """Test that trades after tracking starts are followed."""
+        from price_feed import Tick
+        self.bob.buy_shares('AAPL', 1)
+        self.alice.sell_shares('AAPL', 10)
+        self.assertEqual(self.tracker.on_tick(Tick('AAPL', 100.0)), ['bob'])
+        self.assertEqual(self.tracker.portfolio_value('alice'), 0.0)
+        self.assertEqual(self.tracker.portfolio_value('bob'), 1700.0)
+    
+    def test_jsonl_replay_matches_full_revaluation(self):
+        """Test incremental values against a full revaluation after a replay."""
+        from price_feed import replay_jsonl
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'ticks.jsonl')
+            with open(path, 'w') as f:
+                for index, price in enumerate([151.0, 152.5, 149.0]):
+                    f.write(json.dumps({'symbol': 'AAPL', 'price': price, 'timestamp': index}) + '\n')
+                f.write(json.dumps({'symbol': 'TSLA', 'price': 810.0}) + '\n')
+            self.assertEqual(self.run_feed(replay_jsonl(path)), 4)
+        self.assertEqual(self.provider.get_price('AAPL'), 149.0)
+        self.assertAlmostEqual(self.tracker.portfolio_value('alice'), 1490.0)
+        self.assertAlmostEqual(self.tracker.portfolio_value('bob'), 1620.0)
+        self.assertEqual(self.tracker.revalue('alice'), 1490.0)
+    
+    def test_csv_replay(self):
+        """Test replaying ticks from a CSV file."""
+        from price_feed import replay_csv
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'ticks.csv')
+            with open(path, 'w') as f:
+                f.write('symbol,price,timestamp\nTSLA,900,1\nTSLA,700,2\n')
+            self.run_feed(replay_csv(path))
+        self.assertEqual(self.tracker.portfolio_value('bob'), 1400.0)
+    
+    def test_synthetic_ticks(self):
+        """Test that the synthetic generator is reproducible."""
+        from price_feed import synthetic_ticks
+        
+        async def collect():
+            return [tick async for tick in synthetic_ticks({'AAPL': 150.0, 'TSLA': 800.0}, 50, seed=3)]
+        
+        first = asyncio.run(collect())
+        self.assertEqual(len(first), 50)
+        self.assertEqual(first, asyncio.run(collect()))
+        self.run_feed(synthetic_ticks({'AAPL': 150.0, 'TSLA': 800.0}, 500, seed=3))
+        self.assertAlmostEqual(self.tracker.portfolio_value('alice'), 10 * self.provider.get_price('AAPL'))
+
+
+if __name__ == '__main__':
+    unittest.main()
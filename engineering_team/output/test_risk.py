@@ -0,0 +1,199 @@
+import unittest
+
+import numpy as np
+
+
+class TestRisk(unittest.TestCase):
+    """Tests for the risk and performance analytics."""
+    
+    def random_account(self, entries=3000, seed=0):
+        from accounts import Account, Ledger
+        rng = np.random.default_rng(seed)
+        ledger = Ledger(checkpoint_interval=64)
+        ledger.append("DEPOSIT", None, None, 100000.0, timestamp=0.0)
+        positions = {}
+        for index in range(1, entries):
+            symbol = ["AAPL", "TSLA", "GOOGL"][rng.integers(3)]
+            quantity = int(rng.integers(1, 20))
+            price = float(np.round(rng.uniform(50.0, 150.0), 2))
+            if index % 7 == 0:
+                ledger.append("DEPOSIT" if index % 2 else "WITHDRAW", None, None, 10.0, timestamp=float(index))
+            elif positions.get(symbol, 0) >= quantity and rng.random() < 0.5:
+                ledger.append("SELL", symbol, quantity, price, timestamp=float(index))
+                positions[symbol] -= quantity
+            else:
+                ledger.append("BUY", symbol, quantity, price, timestamp=float(index))
+                positions[symbol] = positions.get(symbol, 0) + quantity
+        return Account.from_ledger("risk", 100000.0, ledger)
+    
+    def test_equity_curve_matches_ledger_state(self):
+        """Test that the equity curve values the ledger state at each time."""
+        from risk import PriceHistory, equity_curve
+        account = self.random_account()
+        ledger = account.ledger
+        rng = np.random.default_rng(1)
+        times = np.array([-1.0, 0.0, 10.5, 500.0, 1234.0, 2999.0, 5000.0])
+        history = PriceHistory(times, ["GOOGL", "AAPL", "TSLA"], rng.uniform(50.0, 150.0, size=(len(times), 3)))
+        equity = equity_curve(ledger, history)
+        for row, timestamp in enumerate(times):
+            balance, positions = ledger.state_at(ledger.seq_at(timestamp))
+            value = 0.0
+            for column, symbol in enumerate(history.symbols):
+                value += positions.get(symbol, 0) * history.prices[row, column]
+            self.assertAlmostEqual(equity[row], value + balance, places=6)
+        self.assertEqual(equity[0], 0.0)
+    
+    def test_symbol_pnl_matches_average_cost_replay(self):
+        """Test realized and unrealized P&L against a step-by-step average cost replay."""
+        from risk import symbol_pnl
+        account = self.random_account()
+        prices = {"AAPL": 120.0, "TSLA": 80.0, "GOOGL": 101.0}
+        expected = {}
+        for kind, symbol, quantity, price in account.transactions:
+            if symbol is None:
+                continue
+            position, cost, realized = expected.get(symbol, (0, 0.0, 0.0))
+            if kind == "BUY":
+                cost = (position * cost + quantity * price) / (position + quantity)
+                position += quantity
+            else:
+                realized += quantity * (price - cost)
+                position -= quantity
+                if position == 0:
+                    cost = 0.0
+            expected[symbol] = (position, cost, realized)
+        
+        report = symbol_pnl(account.ledger, prices)
+        self.assertEqual([entry.symbol for entry in report], list(expected))
+        for entry in report:
+            position, cost, realized = expected[entry.symbol]
+            self.assertEqual(entry.position, position)
+            self.assertAlmostEqual(entry.average_cost, cost, places=6)
+            self.assertAlmostEqual(entry.realized, realized, places=4)
+            self.assertAlmostEqual(entry.unrealized, position * (prices[entry.symbol] - cost), places=4)
+        # Realized plus unrealized is the whole trading profit
+        total = sum(entry.realized + entry.unrealized for entry in report)
+        cash = sum(quantity * price if kind == "SELL" else -quantity * price
+                   for kind, symbol, quantity, price in account.transactions if symbol is not None)
+        value = sum(quantity * prices[symbol] for symbol, quantity in account.get_holdings().items())
+        self.assertAlmostEqual(total, cash + value, places=4)
+    
+    def test_statistics(self):
+        """Test drawdown, returns, volatility, Sharpe ratio and value at risk."""
+        from risk import max_drawdown, rolling_volatility, sharpe_ratio, simple_returns, value_at_risk
+        equity = np.array([100.0, 120.0, 90.0, 95.0, 130.0, 104.0])
+        self.assertAlmostEqual(max_drawdown(equity), 0.25)
+        returns = simple_returns(equity)
+        self.assertAlmostEqual(returns[0], 0.2)
+        volatility = rolling_volatility(returns, 3)
+        self.assertEqual(len(volatility), 3)
+        self.assertAlmostEqual(volatility[0], np.std(returns[:3], ddof=1))
+        self.assertAlmostEqual(sharpe_ratio(returns, periods_per_year=1),
+                               returns.mean() / returns.std(ddof=1))
+        self.assertAlmostEqual(value_at_risk(returns, 0.8), -np.quantile(returns, 0.2))
+        self.assertEqual(sharpe_ratio(np.zeros(5)), 0.0)
+        self.assertEqual(max_drawdown(np.array([1.0, 2.0, 3.0])), 0.0)
+        long_returns = np.random.default_rng(4).normal(0.001, 0.02, size=500)
+        np.testing.assert_allclose(rolling_volatility(long_returns, 20),
+                                   np.lib.stride_tricks.sliding_window_view(long_returns, 20).std(axis=1, ddof=1))
+
+    def test_returns_exclude_deposits_and_withdrawals(self):
+        """Test that cash moved in or out of the account is not counted as a gain or loss."""
+        from accounts import Account, Ledger
+        from risk import PriceHistory, period_flows, risk_report, simple_returns
+        ledger = Ledger()
+        ledger.append("DEPOSIT", None, None, 1000.0, timestamp=0.0)
+        ledger.append("BUY", "AAPL", 5, 100.0, timestamp=1.0)
+        ledger.append("WITHDRAW", None, None, 500.0, timestamp=2.0)
+        ledger.append("DEPOSIT", None, None, 200.0, timestamp=3.0)
+        account = Account.from_ledger("flows", 1000.0, ledger)
+        flat = PriceHistory(np.arange(5.0), ["AAPL"], np.full((5, 1), 100.0))
+        self.assertEqual(period_flows(ledger, flat).tolist(), [0.0, -500.0, 200.0, 0.0])
+        report = risk_report(account, flat, window=2)
+        self.assertEqual(report.equity.tolist(), [1000.0, 1000.0, 500.0, 700.0, 700.0])
+        self.assertEqual(report.returns.tolist(), [0.0, 0.0, 0.0, 0.0])
+        self.assertEqual((report.max_drawdown, report.value_at_risk), (0.0, 0.0))
+
+        # Shares worth half the account rise 10% as cash is withdrawn, then again after a deposit
+        rising = PriceHistory(np.arange(5.0), ["AAPL"], np.array([[100.0], [100.0], [110.0], [110.0], [121.0]]))
+        report = risk_report(account, rising, window=2)
+        self.assertEqual(report.equity.tolist(), [1000.0, 1000.0, 550.0, 750.0, 805.0])
+        np.testing.assert_allclose(report.returns, [0.0, 0.05, 0.0, 55.0 / 750.0])
+        self.assertEqual(report.max_drawdown, 0.0)
+        np.testing.assert_allclose(simple_returns([100.0, 160.0], [50.0]), [0.1])
+    
+    def test_price_history_from_ticks(self):
+        """Test building a forward-filled price history from ticks."""
+        from risk import PriceHistory
+        history = PriceHistory.from_ticks([("TSLA", 800.0, 2.0), ("AAPL", 150.0, 1.0),
+                                           ("AAPL", 151.0, 3.0), ("TSLA", 790.0, 3.0)])
+        self.assertEqual(history.symbols, ["AAPL", "TSLA"])
+        self.assertEqual(history.times.tolist(), [1.0, 2.0, 3.0])
+        self.assertEqual(history.prices.tolist(), [[150.0, 800.0], [150.0, 800.0], [151.0, 790.0]])
+    
+    def test_price_history_from_trades(self):
+        """Test building a price history from the prices an account traded at."""
+        from accounts import Account, Ledger
+        from risk import PriceHistory
+        ledger = Ledger()
+        ledger.append("DEPOSIT", None, None, 10000.0, timestamp=0.0)
+        ledger.append("BUY", "AAPL", 10, 150.0, timestamp=1.0)
+        ledger.append("BUY", "TSLA", 2, 800.0, timestamp=2.0)
+        ledger.append("SELL", "AAPL", 5, 160.0, timestamp=3.0)
+        history = PriceHistory.from_trades(ledger, {"AAPL": 155.0, "TSLA": 810.0})
+        self.assertEqual(history.symbols, ["AAPL", "TSLA"])
+        self.assertEqual(history.times.tolist(), [1.0, 2.0, 3.0, 4.0])
+        self.assertEqual(history.prices.tolist(), [[150.0, 800.0], [150.0, 800.0], [160.0, 800.0], [155.0, 810.0]])
+        with self.assertRaises(ValueError):
+            PriceHistory.from_trades(Account("empty", 100.0).ledger)
+    
+    def test_equity_curve_with_many_symbols(self):
+        """Test the equity curve of an account trading many symbols that tick at different times."""
+        from accounts import Ledger
+        from risk import PriceHistory, equity_curve
+        rng = np.random.default_rng(3)
+        symbols = [f"S{index:03d}" for index in range(300)]
+        ledger = Ledger(checkpoint_interval=64)
+        ledger.append("DEPOSIT", None, None, 1e7, timestamp=0.0)
+        for index in range(1, 2000):
+            symbol = symbols[rng.integers(len(symbols))]
+            ledger.append("BUY", symbol, int(rng.integers(1, 20)), float(rng.uniform(50.0, 150.0)),
+                          timestamp=float(index))
+        ticks = [(symbols[rng.integers(len(symbols))], float(rng.uniform(50.0, 150.0)), float(rng.uniform(0.0, 2500.0)))
+                 for _ in range(5000)]
+        ticks += [(symbol, 100.0, 2500.0) for symbol in symbols]
+        history = PriceHistory.from_ticks(ticks)
+        self.assertEqual(history.symbols, symbols)
+
+        # Reference: every symbol's latest tick at or before each time, or its first tick
+        equity = equity_curve(ledger, history)
+        for row in rng.choice(len(history.times), size=40, replace=False):
+            timestamp = history.times[row]
+            balance, positions = ledger.state_at(ledger.seq_at(timestamp))
+            value = 0.0
+            for symbol, quantity in positions.items():
+                series = sorted((time, order) for order, (name, _, time) in enumerate(ticks) if name == symbol)
+                earlier = [order for time, order in series if time <= timestamp]
+                value += quantity * ticks[earlier[-1] if earlier else series[0][1]][1]
+            self.assertAlmostEqual(equity[row], value + balance, places=4)
+        self.assertEqual(history.latest_prices(), {symbol: 100.0 for symbol in symbols})
+
+    def test_risk_report(self):
+        """Test the combined report for an account."""
+        from risk import PriceHistory, risk_report
+        account = self.random_account(entries=500)
+        times = np.arange(0.0, 600.0, 10.0)
+        rng = np.random.default_rng(2)
+        history = PriceHistory(times, ["AAPL", "GOOGL", "TSLA"],
+                               100.0 * np.cumprod(1 + rng.normal(0, 0.01, size=(len(times), 3)), axis=0))
+        report = risk_report(account, history, window=5)
+        self.assertEqual(report.equity.shape, (len(times),))
+        self.assertEqual(len(report.volatility), len(times) - 1 - 4)
+        self.assertGreaterEqual(report.max_drawdown, 0.0)
+        self.assertEqual(len(report.symbols), 3)
+        with self.assertRaises(ValueError):
+            risk_report(account, PriceHistory(times, ["AAPL"], history.prices[:, :1]))
+
+
+if __name__ == '__main__':
+    unittest.main()
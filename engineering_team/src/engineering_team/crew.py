@@ -1,8 +1,10 @@
 from crewai import Agent, Crew, Process, Task
 from crewai.project import CrewBase, agent, crew, task
+from crew_common.startup import cached_config
 
 
 
+@cached_config
 @CrewBase
 class EngineeringTeam():
     """EngineeringTeam crew"""
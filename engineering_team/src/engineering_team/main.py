@@ -3,7 +3,12 @@ import sys
 import warnings
 import os
 from datetime import datetime
+from functools import partial
 
+from crew_common.batch import batch_main
+from crew_common.llm_cache import install_llm_cache, llm_cache_mode
+from crew_common.startup import profile_startup, startup_profile_requested
+from crew_common.telemetry import install_telemetry
 from engineering_team.crew import EngineeringTeam
 
 warnings.filterwarnings("ignore", category=SyntaxWarning, module="pysbd")
@@ -27,10 +32,27 @@ module_name = "accounts.py"
 class_name = "Account"
 
 
+def setup(llm_cache):
+    """
+    Prepare this process to run the crew: serve LLM calls through the cache and record telemetry.
+    """
+    install_llm_cache(llm_cache)
+    # Timings and tokens per task, agent and tool go to output/telemetry/, with a summary after each kickoff
+    install_telemetry(crew_name="engineering_team")
+
+
 def run():
     """
     Run the research crew.
     """
+    # --startup-profile shows where the time to start the crew goes, without running it
+    if startup_profile_requested():
+        print(profile_startup("engineering_team.main", "engineering_team.main.EngineeringTeam().crew()"))
+        return
+
+    # --llm-cache record|replay|auto reuses completions stored on disk
+    setup(llm_cache_mode())
+
     inputs = {
         'requirements': requirements,
         'module_name': module_name,
@@ -41,5 +63,21 @@ def run():
     result = EngineeringTeam().crew().kickoff(inputs=inputs)
 
 
+def kickoff(inputs):
+    """
+    Run the crew once for one set of inputs.
+    """
+    return EngineeringTeam().crew().kickoff(inputs=inputs)
+
+
+def run_batch():
+    """
+    Run the crew once per line of a JSONL or CSV file of inputs, e.g. one module per line.
+    Give each line its own module_name: the crew writes its files to output/ under that name.
+    """
+    batch_main(kickoff, defaults={'requirements': requirements, 'module_name': module_name, 'class_name': class_name},
+               initializer=partial(setup, llm_cache_mode()))
+
+
 if __name__ == "__main__":
     run()
\ No newline at end of file
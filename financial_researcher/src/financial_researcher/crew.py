@@ -1,10 +1,12 @@
 from crewai import Agent, Crew, Process, Task
 from crewai.project import CrewBase, agent, crew, task
-from crewai_tools import SerperDevTool
 from crewai.agents.agent_builder.base_agent import BaseAgent
 from typing import List
+from crew_common.search_cache import CachedSerperDevTool
+from crew_common.startup import cached_config
 
 
+@cached_config
 @CrewBase
 class FinancialResearcher():
     """FinancialResearcher crew"""
@@ -14,7 +16,7 @@ class FinancialResearcher():
 
     @agent
     def researcher(self) -> Agent:
-        return Agent(config=self.agents_config['researcher'], verbose=True, tools=[SerperDevTool()])
+        return Agent(config=self.agents_config['researcher'], verbose=True, tools=[CachedSerperDevTool()])
 
     @agent
     def analyst(self) -> Agent:
@@ -1,7 +1,13 @@
 #!/usr/bin/env python
 import os
 import warnings
+from functools import partial
 
+from crew_common.batch import batch_main
+from crew_common.llm_cache import install_llm_cache, llm_cache_mode
+from crew_common.search_cache import default_search_cache
+from crew_common.startup import profile_startup, startup_profile_requested
+from crew_common.telemetry import install_telemetry
 from financial_researcher.crew import FinancialResearcher
 
 warnings.filterwarnings("ignore", category=SyntaxWarning, module="pysbd")
@@ -9,10 +15,27 @@ warnings.filterwarnings("ignore", category=SyntaxWarning, module="pysbd")
 
 os.makedirs('output', exist_ok=True)
 
+def setup(llm_cache):
+    """
+    Prepare this process to run the crew: serve LLM calls through the cache and record telemetry.
+    """
+    install_llm_cache(llm_cache)
+    # Timings and tokens per task, agent and tool go to output/telemetry/, with a summary after each kickoff
+    install_telemetry(crew_name="financial_researcher")
+
+
 def run():
     """
     Run the research crew.
     """
+    # --startup-profile shows where the time to start the crew goes, without running it
+    if startup_profile_requested():
+        print(profile_startup("financial_researcher.main", "financial_researcher.main.FinancialResearcher().crew()"))
+        return
+
+    # --llm-cache record|replay|auto reuses completions stored on disk
+    setup(llm_cache_mode())
+
     inputs = {
         'company': 'Apple'
     }
@@ -20,7 +43,24 @@ def run():
     # Create and run the crew
     result = FinancialResearcher().crew().kickoff(inputs=inputs)
     print(result.raw)
-    
-    
+    print(f"\nSearch cache: {default_search_cache().stats()}")
+
+
+def kickoff(inputs):
+    """
+    Run the crew once for one set of inputs.
+    """
+    return FinancialResearcher().crew().kickoff(inputs=inputs)
+
+
+def run_batch():
+    """
+    Run the crew once per line of a JSONL or CSV file of inputs, e.g. one company per line.
+    Threads share the search cache, so repeated searches across companies are made once.
+    """
+    batch_main(kickoff, defaults={'company': 'Apple'}, initializer=partial(setup, llm_cache_mode()))
+    print(f"Search cache: {default_search_cache().stats()}")
+
+
 if __name__ == "__main__":
     run()
@@ -1,12 +1,17 @@
+import asyncio
+import os
 from crewai import Agent, Crew, Process, Task
+from crewai.crews.crew_output import CrewOutput
 from crewai.project import CrewBase, agent, crew, task
-from crewai_tools import SerperDevTool
+from crewai.tasks.task_output import TaskOutput
 from pydantic import BaseModel, Field
-from typing import List
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
 from .tools.push_tool import PushNotificationTool
-from crewai.memory import LongTermMemory, ShortTermMemory, EntityMemory
-from crewai.memory.storage.rag_storage import RAGStorage
-from crewai.memory.storage.ltm_sqlite_storage import LTMSQLiteStorage
+from crew_common.search_cache import CachedSerperDevTool
+from crew_common.startup import cached_config
+
+if TYPE_CHECKING:
+    from .storage.ltm_storage import IndexedLTMStorage
 
 class TrendingCompany(BaseModel):
     """ A company that is in the news and attracting attention """
@@ -30,6 +35,11 @@ class TrendingCompanyResearchList(BaseModel):
     research_list: List[TrendingCompanyResearch] = Field(description="Comprehensive research on all trending companies")
 
 
+# Number of companies researched at the same time by kickoff_fan_out
+RESEARCH_CONCURRENCY = 4
+
+
+@cached_config
 @CrewBase
 class StockPicker():
     """StockPicker crew"""
@@ -37,15 +47,21 @@ class StockPicker():
     agents_config = 'config/agents.yaml'
     tasks_config = 'config/tasks.yaml'
 
+    # Where short-term and entity memory live; main points it at a MemoryShard so runs can go in parallel
+    memory_path = "./memory/"
+
     @agent
     def trending_company_finder(self) -> Agent:
         return Agent(config=self.agents_config['trending_company_finder'],
-                     tools=[SerperDevTool()], memory=True)
+                     tools=[CachedSerperDevTool()], memory=True)
     
     @agent
     def financial_researcher(self) -> Agent:
+        return self._new_financial_researcher()
+
+    def _new_financial_researcher(self) -> Agent:
         return Agent(config=self.agents_config['financial_researcher'], 
-                     tools=[SerperDevTool()])
+                     tools=[CachedSerperDevTool()])
 
     @agent
     def stock_picker(self) -> Agent:
@@ -75,6 +91,50 @@ class StockPicker():
 
 
 
+    def _long_term_storage(self) -> "IndexedLTMStorage":
+        from .storage.ltm_storage import IndexedLTMStorage
+
+        # One storage for every crew of a run, so saves still queued in its batch are seen by later crews
+        if getattr(self, "_ltm_storage", None) is None:
+            self._ltm_storage = IndexedLTMStorage(db_path="./memory/long_term_memory_storage.db")
+        return self._ltm_storage
+
+    def close_memory(self) -> None:
+        """Write the long-term memories still queued, for processes that exit without running atexit"""
+        if getattr(self, "_ltm_storage", None) is not None:
+            self._ltm_storage.close()
+            self._ltm_storage = None
+
+    def _memory(self) -> Dict[str, Any]:
+        """Memory settings shared by every crew that remembers past picks"""
+        # Imported here, so the memory backends load only for the crews that use them
+        from crewai.memory import LongTermMemory, ShortTermMemory, EntityMemory
+        from .storage.embedding_cache import embedder_config
+        from .storage.rag_storage import CompactingRAGStorage
+
+        return dict(
+            memory=True,
+            # Long-term memory for persistent storage across sessions
+            long_term_memory = LongTermMemory(
+                storage=self._long_term_storage()
+            ),
+            # Short-term memory for current context using RAG
+            short_term_memory = ShortTermMemory(
+                storage = CompactingRAGStorage(
+                        embedder_config=embedder_config(),
+                        type="short_term",
+                        path=self.memory_path
+                    )
+                ),            # Entity memory for tracking key information about entities, in its own collection
+            entity_memory = EntityMemory(
+                storage=CompactingRAGStorage(
+                    embedder_config=embedder_config(),
+                    type="entities",
+                    path=self.memory_path
+                )
+            ),
+        )
+
     @crew
     def crew(self) -> Crew:
         """Creates the StockPicker crew"""
@@ -90,36 +150,108 @@ class StockPicker():
             process=Process.hierarchical,
             verbose=True,
             manager_agent=manager,
-            memory=True,
-            # Long-term memory for persistent storage across sessions
-            long_term_memory = LongTermMemory(
-                storage=LTMSQLiteStorage(
-                    db_path="./memory/long_term_memory_storage.db"
-                )
-            ),
-            # Short-term memory for current context using RAG
-            short_term_memory = ShortTermMemory(
-                storage = RAGStorage(
-                        embedder_config={
-                            "provider": "openai",
-                            "config": {
-                                "model": 'text-embedding-3-small'
-                            }
-                        },
-                        type="short_term",
-                        path="./memory/"
-                    )
-                ),            # Entity memory for tracking key information about entities
-            entity_memory = EntityMemory(
-                storage=RAGStorage(
-                    embedder_config={
-                        "provider": "openai",
-                        "config": {
-                            "model": 'text-embedding-3-small'
-                        }
-                    },
-                    type="short_term",
-                    path="./memory/"
-                )
-            ),
-        )
\ No newline at end of file
+            **self._memory(),
+        )
+
+    def research_company_crew(self) -> Crew:
+        """Creates a crew that researches a single company.
+
+        Each call gets its own agent, so several of these crews can run at once.
+        """
+        researcher = self._new_financial_researcher()
+        return Crew(
+            name="company_research",
+            agents=[researcher],
+            tasks=[Task(config=self.tasks_config['research_company'], agent=researcher,
+                        output_pydantic=TrendingCompanyResearch)],
+            process=Process.sequential,
+            verbose=True,
+        )
+
+    async def kickoff_fan_out(self, inputs: Dict[str, Any],
+                              max_concurrency: Optional[int] = None) -> CrewOutput:
+        """Run the crew with one concurrent research task per trending company.
+
+        The trending companies are found first. Each company is then researched
+        by its own crew, with at most max_concurrency running at once. The
+        results are merged into a TrendingCompanyResearchList, which becomes
+        the output of research_trending_companies and so the context of
+        pick_best_company. Companies whose research fails are left out.
+
+        Args:
+            inputs: Inputs for the tasks, as for kickoff()
+            max_concurrency: Companies researched at once, RESEARCH_CONCURRENCY by default
+
+        Returns:
+            Output of pick_best_company
+
+        Raises:
+            ValueError: If the trending companies could not be parsed
+            RuntimeError: If the research on every company failed
+        """
+        finder = Crew(
+            name="trending_company_finder",
+            agents=[self.trending_company_finder()],
+            tasks=[self.find_trending_companies()],
+            process=Process.sequential,
+            verbose=True,
+            **self._memory(),
+        )
+        found = await finder.kickoff_async(inputs=inputs)
+        trending: Optional[TrendingCompanyList] = found.pydantic
+        if trending is None:
+            raise ValueError(f"Could not parse the trending companies from the finder's output: {found.raw!r}")
+
+        limit = asyncio.Semaphore(max_concurrency or RESEARCH_CONCURRENCY)
+
+        async def research(company: TrendingCompany) -> TrendingCompanyResearch:
+            async with limit:
+                result = await self.research_company_crew().kickoff_async(inputs={
+                    **inputs,
+                    'company_name': company.name,
+                    'ticker': company.ticker,
+                    'reason': company.reason,
+                })
+            return result.pydantic
+
+        results = await asyncio.gather(*(research(company) for company in trending.companies),
+                                       return_exceptions=True)
+        # A company whose research failed or could not be parsed is left out rather than failing the pick
+        research: List[TrendingCompanyResearch] = []
+        errors: List[BaseException] = []
+        for company, result in zip(trending.companies, results):
+            if isinstance(result, BaseException):
+                if not isinstance(result, Exception):
+                    raise result
+                print(f"Research on {company.name} failed and is left out: {result!r}")
+                errors.append(result)
+            elif result is None:
+                print(f"Research on {company.name} could not be parsed and is left out")
+            else:
+                research.append(result)
+        if not research and errors:
+            raise RuntimeError("Research failed for every trending company") from errors[0]
+        research_list = TrendingCompanyResearchList(research_list=research)
+
+        research_task = self.research_trending_companies()
+        research_task.output = TaskOutput(
+            description=research_task.description,
+            expected_output=research_task.expected_output,
+            raw=research_list.model_dump_json(),
+            pydantic=research_list,
+            agent=self.financial_researcher().role,
+        )
+        if research_task.output_file:
+            os.makedirs(os.path.dirname(research_task.output_file) or ".", exist_ok=True)
+            with open(research_task.output_file, "w") as f:
+                f.write(research_list.model_dump_json(indent=2))
+
+        picker = Crew(
+            name="stock_picker",
+            agents=[self.stock_picker()],
+            tasks=[self.pick_best_company()],
+            process=Process.sequential,
+            verbose=True,
+            **self._memory(),
+        )
+        return await picker.kickoff_async(inputs=inputs)
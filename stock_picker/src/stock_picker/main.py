@@ -1,29 +1,134 @@
 #!/usr/bin/env python
+import argparse
+import asyncio
 import sys
 import warnings
 import os
 from datetime import datetime
+from functools import partial
 
+from crew_common.batch import batch_main
+from crew_common.llm_cache import install_llm_cache, llm_cache_mode
+from crew_common.search_cache import default_search_cache
+from crew_common.startup import profile_startup, startup_profile_requested
+from crew_common.telemetry import install_telemetry
 from stock_picker.crew import StockPicker
+from stock_picker.tools.push_tool import default_dispatcher
 
 warnings.filterwarnings("ignore", category=SyntaxWarning, module="pysbd")
 
 
+def setup(llm_cache):
+    """
+    Prepare this process to run the crew: serve LLM calls through the cache and record telemetry.
+    """
+    install_llm_cache(llm_cache)
+    # Timings and tokens per task, agent and tool go to output/telemetry/, with a summary after each kickoff
+    install_telemetry(crew_name="stock_picker")
+
+
+def kickoff(inputs):
+    """
+    Run the crew once on its own memory shard, researching the trending companies concurrently.
+    """
+    # The memory storage imports chromadb, so it is imported by the commands that use it rather than up front
+    from stock_picker.storage.shards import MemoryShard
+
+    # Pin CURRENT_DATE to replay a recorded run, since the date is part of every prompt
+    inputs = {"current_date": os.environ.get("CURRENT_DATE") or str(datetime.now()), **inputs}
+    max_concurrency = int(os.environ.get("RESEARCH_CONCURRENCY", "0")) or None
+    with MemoryShard() as shard:
+        picker = StockPicker()
+        picker.memory_path = shard.path
+        try:
+            result = asyncio.run(picker.kickoff_fan_out(inputs, max_concurrency))
+        finally:
+            picker.close_memory()
+    # Notifications are sent in the background; wait for them before returning
+    default_dispatcher().flush(timeout=30)
+    return result
+
+
 def run():
     """
     Run the research crew.
     """
+    # --startup-profile shows where the time to start the crew goes, without running it
+    if startup_profile_requested():
+        print(profile_startup("stock_picker.main", "stock_picker.main.StockPicker().crew()"))
+        return
+
+    from stock_picker.storage.embedding_cache import cached_embedder
+
+    # --llm-cache record|replay|auto reuses completions stored on disk
+    setup(llm_cache_mode())
+
     inputs = {
-        'sector': 'Technology',
-        "current_date": str(datetime.now())
+        # Runs for different sectors can go in parallel, each on its own memory shard
+        'sector': os.environ.get("SECTOR", "Technology"),
     }
-
-    # Create and run the crew
-    result = StockPicker().crew().kickoff(inputs=inputs)
+    result = kickoff(inputs)
 
     # Print the result
     print("\n\n=== FINAL DECISION ===\n\n")
     print(result.raw)
+    print(f"\nSearch cache: {default_search_cache().stats()}")
+    print(f"Embedding cache: {cached_embedder().stats()}")
+    print(f"Push notifications: {default_dispatcher().metrics()}")
+
+
+def run_batch():
+    """
+    Run the crew once per line of a JSONL or CSV file of inputs, e.g. one sector per line.
+    Runs go in worker processes by default, each on its own memory shard.
+    """
+    batch_main(kickoff, defaults={'sector': 'Technology'}, initializer=partial(setup, llm_cache_mode()),
+               processes=True)
+
+
+def vacuum_memory():
+    """
+    Merge shards left by failed runs, compact the short-term and entity memories
+    and reclaim their disk space. Running crews wait while it holds the memory lock.
+    """
+    from stock_picker.storage.embedding_cache import embedder_config
+    from stock_picker.storage.rag_storage import DEFAULT_MAX_AGE, DEFAULT_MAX_ENTRIES, CompactingRAGStorage, vacuum
+    from stock_picker.storage.shards import memory_lock, merge_abandoned_shards
+
+    parser = argparse.ArgumentParser(description=vacuum_memory.__doc__)
+    parser.add_argument("--path", default="./memory/")
+    parser.add_argument("--max-age-days", type=float, default=DEFAULT_MAX_AGE / 86400)
+    parser.add_argument("--max-entries", type=int, default=DEFAULT_MAX_ENTRIES)
+    args = parser.parse_args()
+
+    print(f"Merged abandoned shards: {merge_abandoned_shards(args.path)}")
+    with memory_lock(args.path):
+        for memory_type in ("short_term", "entities"):
+            # Opening the storage compacts it
+            storage = CompactingRAGStorage(embedder_config=embedder_config(), type=memory_type, path=args.path,
+                                           max_age=args.max_age_days * 86400, max_entries=args.max_entries)
+            print(f"{memory_type}: {storage.collection.count()} memories kept")
+        sizes = vacuum(args.path)
+    print(f"chroma.sqlite3: {sizes['before']:,} -> {sizes['after']:,} bytes")
+
+
+def maintain_memory():
+    """
+    Evict, analyze and vacuum the long-term memory, then report its size and load timings.
+    Run it between crew runs, never during one.
+    """
+    from stock_picker.storage.ltm_storage import IndexedLTMStorage
+
+    parser = argparse.ArgumentParser(description=maintain_memory.__doc__)
+    parser.add_argument("--db-path", default="./memory/long_term_memory_storage.db")
+    parser.add_argument("--no-vacuum", action="store_true")
+    args = parser.parse_args()
+
+    storage = IndexedLTMStorage(db_path=args.db_path)
+    report = storage.maintain(vacuum=not args.no_vacuum)
+    storage.close()
+    for name, value in report.items():
+        print(f"{name}: {value}")
 
 
 if __name__ == "__main__":
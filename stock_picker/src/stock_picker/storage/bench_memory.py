@@ -0,0 +1,105 @@
+"""Benchmark parallel stock_picker runs on sharded memory.
+
+Each simulated sector run opens a MemoryShard, saves and searches memories
+the way a crew run does (one document per save, a few searches per task),
+then merges. The same per-run work is timed for 1, 2, 4, ... parallel runs;
+with linear scaling the wall time stays flat and the speedup equals the
+number of runs.
+
+    bench_memory --runs 1 2 4 8 --saves 200 --searches 200
+"""
+import argparse
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+import uuid
+from typing import Dict, List
+
+from .embedding_cache import HashingEmbedder
+from .shards import MemoryShard, memory_lock
+
+
+SECTORS = ["Technology", "Healthcare", "Energy", "Financials", "Industrials", "Utilities",
+           "Materials", "Real Estate", "Consumer Staples", "Communication Services"]
+
+
+def _sector_run(base_path: str, sector: str, saves: int, searches: int) -> Dict[str, float]:
+    import chromadb
+
+    start = time.perf_counter()
+    with MemoryShard(base_path, name=f"{sector}-{os.getpid()}") as shard:
+        client = chromadb.PersistentClient(path=shard.path)
+        embedder = HashingEmbedder()
+        collections = [client.get_or_create_collection(name, embedding_function=embedder)
+                       for name in ("short_term", "entities")]
+        for i in range(saves):
+            collections[i % 2].add(ids=[str(uuid.uuid4())],
+                                   documents=[f"{sector} company {i} reported results and guidance for the quarter"],
+                                   metadatas=[{"saved_at": time.time(), "sector": sector}])
+        for i in range(searches):
+            collections[i % 2].query(query_texts=[f"{sector} company {i % saves} outlook"], n_results=3)
+    return {"total": time.perf_counter() - start,
+            "open": shard.timings.get("open", 0.0), "merge": shard.timings.get("merge", 0.0)}
+
+
+def _run(args) -> Dict[str, float]:
+    return _sector_run(*args)
+
+
+def benchmark(runs: List[int], saves: int, searches: int) -> List[Dict[str, float]]:
+    """Time each number of parallel runs against a fresh memory directory.
+
+    Returns:
+        One row per number of runs with wall time, speedup, efficiency and the
+        slowest run's shard open and merge times
+    """
+    import chromadb
+
+    rows = []
+    context = multiprocessing.get_context("spawn")
+    baseline = None
+    for count in runs:
+        base_path = tempfile.mkdtemp(prefix="memory-bench-")
+        try:
+            # Seed the shared memory so every shard has something to copy
+            _sector_run(base_path, "Seed", saves, 0)
+            jobs = [(base_path, SECTORS[i % len(SECTORS)] + str(i), saves, searches) for i in range(count)]
+            with context.Pool(count) as pool:
+                start = time.perf_counter()
+                results = pool.map(_run, jobs)
+                wall = time.perf_counter() - start
+            with memory_lock(base_path):
+                client = chromadb.PersistentClient(path=base_path)
+                merged = sum(client.get_collection(name, embedding_function=None).count()
+                             for name in ("short_term", "entities"))
+        finally:
+            shutil.rmtree(base_path, ignore_errors=True)
+        baseline = baseline or wall / count
+        rows.append({"runs": count, "wall_s": round(wall, 3),
+                     "speedup": round(count * baseline / wall, 2),
+                     "efficiency": round(baseline / wall, 2),
+                     "max_open_s": round(max(r["open"] for r in results), 3),
+                     "max_merge_s": round(max(r["merge"] for r in results), 3),
+                     "memories": merged})
+    return rows
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark parallel runs on sharded memory")
+    parser.add_argument("--runs", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--saves", type=int, default=200)
+    parser.add_argument("--searches", type=int, default=200)
+    args = parser.parse_args(argv)
+
+    print(f"{os.cpu_count()} CPUs, {args.saves} saves and {args.searches} searches per run")
+    print(f"{'runs':>5} {'wall_s':>8} {'speedup':>8} {'efficiency':>10} {'max_open_s':>11} {'max_merge_s':>12} "
+          f"{'memories':>9}")
+    for row in benchmark(args.runs, args.saves, args.searches):
+        print(f"{row['runs']:>5} {row['wall_s']:>8} {row['speedup']:>8} {row['efficiency']:>10} "
+              f"{row['max_open_s']:>11} {row['max_merge_s']:>12} {row['memories']:>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+from chromadb import Documents, EmbeddingFunction, Embeddings
+
+
+DEFAULT_CACHE_PATH = "./memory/embedding_cache.db"
+
+
+def embedding_key(model: str, text: str) -> str:
+    """Return the cache key of a text embedded by a model"""
+    return hashlib.sha256(f"{model}\0{text}".encode()).hexdigest()
+
+
+class HashingEmbedder(EmbeddingFunction[Documents]):
+    """A local embedder that needs no model download or network access.
+
+    Words and word pairs are hashed into a fixed number of dimensions and the
+    vector is L2-normalized, so texts sharing vocabulary land close together.
+    It is lexical rather than semantic, but deterministic and instant, which
+    suits offline and CI runs.
+    """
+
+    def __init__(self, dimensions: int = 384) -> None:
+        self.dimensions = dimensions
+
+    def __call__(self, input: Documents) -> Embeddings:
+        vectors = []
+        for text in input:
+            vector = np.zeros(self.dimensions, dtype=np.float32)
+            words = re.findall(r"\w+", text.lower())
+            for feature in words + [f"{a} {b}" for a, b in zip(words, words[1:])]:
+                digest = hashlib.blake2b(feature.encode(), digest_size=8).digest()
+                index = int.from_bytes(digest[:4], "little") % self.dimensions
+                vector[index] += 1.0 if digest[4] & 1 else -1.0
+            norm = np.linalg.norm(vector)
+            vectors.append(vector / norm if norm else vector)
+        return vectors
+
+
+class EmbeddingCache:
+    """Embedding vectors in SQLite, keyed by the SHA-256 of model and text"""
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH) -> None:
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL) "
+                           "WITHOUT ROWID")
+        self._lock = threading.Lock()
+
+    def get_many(self, keys: Sequence[str]) -> Dict[str, np.ndarray]:
+        """Return the stored vectors of the keys that are present"""
+        found = {}
+        with self._lock:
+            # Stay well below SQLite's limit on bound parameters
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(chunk))})", chunk)
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float32)
+        return found
+
+    def put_many(self, items: Dict[str, np.ndarray]) -> None:
+        """Store vectors in one transaction"""
+        rows = [(key, np.asarray(vector, dtype=np.float32).tobytes()) for key, vector in items.items()]
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany("INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)", rows)
+                self._conn.execute("COMMIT")
+            except BaseException:
+                # Leave no transaction open to hold the write lock or take in the next caller's writes
+                if self._conn.in_transaction:
+                    self._conn.execute("ROLLBACK")
+                raise
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+
+class CachedEmbeddingFunction(EmbeddingFunction[Documents]):
+    """Embedding function that serves repeated texts from an EmbeddingCache.
+
+    The texts of each call are looked up in one query, and the misses are
+    de-duplicated, sent to the wrapped embedder at most batch_size at a time
+    and stored for every later run. crewAI's memories embed one text per
+    call, so what they save is the texts seen in earlier runs, e.g. the same
+    search queries and memories, rather than requests batched together.
+    """
+
+    def __init__(self, embedder: Callable[[Documents], Embeddings], model: str,
+                 cache: Optional[EmbeddingCache] = None, batch_size: int = 128) -> None:
+        self.embedder = embedder
+        self.model = model
+        self.cache = cache if cache is not None else EmbeddingCache()
+        self.batch_size = batch_size
+        self.hits = 0
+        self.misses = 0
+        self.batches = 0
+
+    def __call__(self, input: Documents) -> Embeddings:
+        texts = list(input)
+        keys = [embedding_key(self.model, text) for text in texts]
+        vectors = self.cache.get_many(list(dict.fromkeys(keys)))
+
+        missing: Dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            if key not in vectors:
+                missing.setdefault(key, text)
+        # A repeat of a missing text within the call is served from the one embedding, so counts as a hit
+        self.hits += len(texts) - len(missing)
+        self.misses += len(missing)
+
+        pending = list(missing.items())
+        for start in range(0, len(pending), self.batch_size):
+            batch = pending[start:start + self.batch_size]
+            embedded = self.embedder([text for _, text in batch])
+            self.batches += 1
+            fresh = {key: np.asarray(vector, dtype=np.float32) for (key, _), vector in zip(batch, embedded)}
+            self.cache.put_many(fresh)
+            vectors.update(fresh)
+        return [vectors[key] for key in keys]
+
+    def stats(self) -> Dict[str, int]:
+        """Return hit, miss and embedding batch counts and the number of cached vectors"""
+        return {"hits": self.hits, "misses": self.misses, "batches": self.batches, "cached": len(self.cache)}
+
+
+def _openai_embedder(model: str) -> EmbeddingFunction:
+    from chromadb.utils.embedding_functions.openai_embedding_function import OpenAIEmbeddingFunction
+    return OpenAIEmbeddingFunction(api_key=os.getenv("OPENAI_API_KEY"), model_name=model)
+
+
+def _onnx_embedder(model: str) -> EmbeddingFunction:
+    # all-MiniLM-L6-v2 run locally; the model is downloaded once, then works offline
+    from chromadb.utils.embedding_functions import DefaultEmbeddingFunction
+    return DefaultEmbeddingFunction()
+
+
+def _hashing_embedder(model: str) -> EmbeddingFunction:
+    return HashingEmbedder()
+
+
+# name -> (factory taking the model name, default model)
+EMBEDDERS = {
+    "openai": (_openai_embedder, "text-embedding-3-small"),
+    "onnx": (_onnx_embedder, "all-MiniLM-L6-v2"),
+    "hashing": (_hashing_embedder, "hashing-384"),
+}
+
+_shared: Dict[tuple, CachedEmbeddingFunction] = {}
+_shared_lock = threading.Lock()
+
+
+def cached_embedder(provider: Optional[str] = None, model: Optional[str] = None,
+                    path: Optional[str] = None) -> CachedEmbeddingFunction:
+    """Return a cached embedding function, shared by every memory that asks for the same one.
+
+    Args:
+        provider: One of EMBEDDERS, MEMORY_EMBEDDER or openai by default
+        model: Model name, the provider's default by default
+        path: Cache database, EMBEDDING_CACHE_PATH or ./memory/embedding_cache.db by default
+
+    Returns:
+        The embedding function
+    """
+    provider = provider or os.getenv("MEMORY_EMBEDDER", "openai")
+    if provider not in EMBEDDERS:
+        raise ValueError(f"Unknown embedder: {provider}, choose one of {', '.join(EMBEDDERS)}")
+    factory, default_model = EMBEDDERS[provider]
+    model = model or default_model
+    path = path or os.getenv("EMBEDDING_CACHE_PATH", DEFAULT_CACHE_PATH)
+    with _shared_lock:
+        key = (provider, model, path)
+        if key not in _shared:
+            # The provider is part of the key, so embedders with the same model name never collide
+            _shared[key] = CachedEmbeddingFunction(factory(model), f"{provider}/{model}", EmbeddingCache(path))
+        return _shared[key]
+
+
+def embedder_config(provider: Optional[str] = None, model: Optional[str] = None) -> dict:
+    """Return a crewAI embedder config that uses cached_embedder().
+
+    Vectors from different embedders are not comparable, so memories saved
+    with one embedder must be reset (or kept at another path) before
+    switching to another.
+    """
+    return {"provider": "custom", "config": {"embedder": cached_embedder(provider, model)}}
@@ -0,0 +1,244 @@
+import atexit
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from crewai.memory.storage.ltm_sqlite_storage import LTMSQLiteStorage
+
+
+# Memories older than this many seconds are evicted
+DEFAULT_MAX_AGE = 90 * 24 * 3600
+
+# Only this many memories are kept per task description; crewAI loads the latest 3
+DEFAULT_MAX_PER_TASK = 20
+
+# At most this many memories are kept in total, evicting the lowest scored first
+DEFAULT_MAX_ROWS = 10000
+
+# Saves are written in one transaction once this many are pending
+DEFAULT_BATCH_SIZE = 16
+
+# Evict after this many saves, as well as when the storage is opened
+DEFAULT_EVICT_EVERY = 200
+
+
+class IndexedLTMStorage(LTMSQLiteStorage):
+    """Long-term memory in SQLite that stays fast as runs accumulate.
+
+    A drop-in for LTMSQLiteStorage using the same table, so an existing
+    database is picked up as is. It keeps one WAL-mode connection, indexes
+    the load query, writes saves in batches and evicts memories by age, by
+    count per task description (keeping the ones load would return) and by
+    total count (dropping the lowest scores first).
+    """
+
+    def __init__(self, db_path: Optional[str] = None, max_age: Optional[float] = DEFAULT_MAX_AGE,
+                 max_per_task: Optional[int] = DEFAULT_MAX_PER_TASK, max_rows: Optional[int] = DEFAULT_MAX_ROWS,
+                 batch_size: int = DEFAULT_BATCH_SIZE, evict_every: int = DEFAULT_EVICT_EVERY) -> None:
+        self.max_age = max_age
+        self.max_per_task = max_per_task
+        self.max_rows = max_rows
+        self.batch_size = batch_size
+        self.evict_every = evict_every
+        self._pending: List[Tuple[str, str, str, float]] = []
+        self._saves = 0
+        self._lock = threading.RLock()
+        self._conn: Optional[sqlite3.Connection] = None
+        super().__init__(db_path=db_path)
+        atexit.register(self.close)
+
+    def _initialize_db(self):
+        """
+        Opens the connection, creates the LTM table and its indexes, then evicts
+        """
+        try:
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None, timeout=30)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS long_term_memories (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    task_description TEXT,
+                    metadata TEXT,
+                    datetime TEXT,
+                    score REAL
+                )
+            """)
+            # Covers load(): equality on the description, then its ORDER BY
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_ltm_task_datetime "
+                               "ON long_term_memories (task_description, datetime DESC, score)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_ltm_datetime ON long_term_memories (datetime)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_ltm_score ON long_term_memories (score, datetime)")
+            self.evict()
+        except sqlite3.Error as e:
+            self._printer.print(
+                content=f"MEMORY ERROR: An error occurred during database initialization: {e}",
+                color="red",
+            )
+
+    def save(self, task_description: str, metadata: Dict[str, Any], datetime: str,
+             score: Union[int, float]) -> None:
+        """Queues a memory, writing the queue once batch_size are pending"""
+        with self._lock:
+            self._pending.append((task_description, json.dumps(metadata), datetime, score))
+            self._saves += 1
+            if len(self._pending) >= self.batch_size:
+                self.flush()
+            if self._saves % self.evict_every == 0:
+                self.evict()
+
+    def flush(self) -> None:
+        """Writes every queued memory in one transaction"""
+        with self._lock:
+            if not self._pending or self._conn is None:
+                return
+            try:
+                self._conn.execute("BEGIN")
+                self._conn.executemany("INSERT INTO long_term_memories (task_description, metadata, datetime, score) "
+                                       "VALUES (?, ?, ?, ?)", self._pending)
+                self._conn.execute("COMMIT")
+                self._pending = []
+            except sqlite3.Error as e:
+                if self._conn.in_transaction:
+                    self._conn.execute("ROLLBACK")
+                self._printer.print(
+                    content=f"MEMORY ERROR: An error occurred while saving to LTM: {e}",
+                    color="red",
+                )
+
+    def load(self, task_description: str, latest_n: int) -> Optional[List[Dict[str, Any]]]:
+        """Queries the LTM table by task description, including queued memories"""
+        with self._lock:
+            self.flush()
+            try:
+                rows = self._conn.execute("""
+                    SELECT metadata, datetime, score
+                    FROM long_term_memories
+                    WHERE task_description = ?
+                    ORDER BY datetime DESC, score ASC
+                    LIMIT ?
+                """, (task_description, int(latest_n))).fetchall()
+            except sqlite3.Error as e:
+                self._printer.print(
+                    content=f"MEMORY ERROR: An error occurred while querying LTM: {e}",
+                    color="red",
+                )
+                return None
+        if rows:
+            return [{"metadata": json.loads(row[0]), "datetime": row[1], "score": row[2]} for row in rows]
+        return None
+
+    def reset(self) -> None:
+        """Resets the LTM table, dropping queued memories too"""
+        with self._lock:
+            self._pending = []
+            try:
+                self._conn.execute("DELETE FROM long_term_memories")
+            except sqlite3.Error as e:
+                self._printer.print(
+                    content=f"MEMORY ERROR: An error occurred while deleting all rows in LTM: {e}",
+                    color="red",
+                )
+
+    def evict(self, now: Optional[float] = None) -> Dict[str, int]:
+        """Deletes memories past the age, per task and total limits.
+
+        Args:
+            now: Current time, time.time() by default
+
+        Returns:
+            Number of memories deleted by each limit
+        """
+        now = time.time() if now is None else now
+        evicted = {"age": 0, "per_task": 0, "total": 0}
+        with self._lock:
+            self.flush()
+            try:
+                self._conn.execute("BEGIN")
+                if self.max_age is not None:
+                    # datetime holds str(time.time()), so compare it as a number
+                    evicted["age"] = self._conn.execute(
+                        "DELETE FROM long_term_memories WHERE CAST(datetime AS REAL) < ?",
+                        (now - self.max_age,)).rowcount
+                if self.max_per_task is not None:
+                    evicted["per_task"] = self._conn.execute("""
+                        DELETE FROM long_term_memories WHERE id IN (
+                            SELECT id FROM (
+                                SELECT id, ROW_NUMBER() OVER (
+                                    PARTITION BY task_description ORDER BY datetime DESC, score ASC) AS rank
+                                FROM long_term_memories)
+                            WHERE rank > ?)
+                    """, (self.max_per_task,)).rowcount
+                if self.max_rows is not None:
+                    evicted["total"] = self._conn.execute("""
+                        DELETE FROM long_term_memories WHERE id IN (
+                            SELECT id FROM long_term_memories ORDER BY score ASC, datetime ASC
+                            LIMIT MAX((SELECT COUNT(*) FROM long_term_memories) - ?, 0))
+                    """, (self.max_rows,)).rowcount
+                self._conn.execute("COMMIT")
+            except sqlite3.Error as e:
+                if self._conn.in_transaction:
+                    self._conn.execute("ROLLBACK")
+                self._printer.print(
+                    content=f"MEMORY ERROR: An error occurred while evicting from LTM: {e}",
+                    color="red",
+                )
+        return evicted
+
+    def maintain(self, vacuum: bool = True, samples: int = 200) -> Dict[str, Any]:
+        """Evicts, refreshes the query planner statistics, optionally vacuums, and reports.
+
+        Args:
+            vacuum: Rewrite the file to return the space of deleted rows
+            samples: Number of load() calls to time
+
+        Returns:
+            Rows, file sizes, eviction counts, the load query plan and load timings in milliseconds
+        """
+        before = self._file_size()
+        evicted = self.evict()
+        with self._lock:
+            self._conn.execute("ANALYZE")
+            if vacuum:
+                self._conn.execute("VACUUM")
+            self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            rows, tasks = self._conn.execute(
+                "SELECT COUNT(*), COUNT(DISTINCT task_description) FROM long_term_memories").fetchone()
+            page_size = self._conn.execute("PRAGMA page_size").fetchone()[0]
+            pages = self._conn.execute("PRAGMA page_count").fetchone()[0]
+            plan = [row[-1] for row in self._conn.execute(
+                "EXPLAIN QUERY PLAN SELECT metadata, datetime, score FROM long_term_memories "
+                "WHERE task_description = ? ORDER BY datetime DESC, score ASC LIMIT 3", ("",))]
+            descriptions = [row[0] for row in self._conn.execute(
+                "SELECT DISTINCT task_description FROM long_term_memories")]
+
+        timings = []
+        for description in random.Random(0).choices(descriptions, k=samples) if descriptions else []:
+            start = time.perf_counter()
+            self.load(description, 3)
+            timings.append((time.perf_counter() - start) * 1000)
+        timings.sort()
+        report = {"rows": rows, "task_descriptions": tasks, "database_bytes": page_size * pages,
+                  "file_bytes_before": before, "file_bytes_after": self._file_size(),
+                  "evicted": evicted, "load_plan": plan, "load_samples": len(timings)}
+        for name, fraction in (("load_p50_ms", 0.5), ("load_p95_ms", 0.95), ("load_max_ms", 1.0)):
+            report[name] = round(timings[min(int(fraction * len(timings)), len(timings) - 1)], 3) \
+                if timings else None
+        return report
+
+    def _file_size(self) -> int:
+        return sum(os.path.getsize(path) for path in (self.db_path, f"{self.db_path}-wal")
+                   if os.path.exists(path))
+
+    def close(self) -> None:
+        """Writes queued memories and closes the connection"""
+        with self._lock:
+            if self._conn is None:
+                return
+            self.flush()
+            self._conn.close()
+            self._conn = None
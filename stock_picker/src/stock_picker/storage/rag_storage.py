@@ -0,0 +1,111 @@
+import logging
+import os
+import sqlite3
+import time
+from typing import Any, Dict, List, Optional
+
+from crewai.memory.storage.rag_storage import RAGStorage
+
+
+# Saved memories older than this many seconds are evicted
+DEFAULT_MAX_AGE = 30 * 24 * 3600
+
+# At most this many memories are kept per collection, the newest ones
+DEFAULT_MAX_ENTRIES = 5000
+
+# Compact after this many saves, as well as when the storage is opened
+DEFAULT_COMPACT_EVERY = 100
+
+
+def compact_collection(collection, max_age: Optional[float] = DEFAULT_MAX_AGE,
+                       max_entries: Optional[int] = DEFAULT_MAX_ENTRIES, now: Optional[float] = None) -> int:
+    """Evict memories older than max_age, then the oldest beyond max_entries.
+
+    Memories saved without a saved_at timestamp count as the oldest.
+
+    Args:
+        collection: Chroma collection
+        max_age: Age limit in seconds, or None for no limit
+        max_entries: Size limit, or None for no limit
+        now: Current time, time.time() by default
+
+    Returns:
+        Number of memories evicted
+    """
+    now = time.time() if now is None else now
+    entries = collection.get(include=["metadatas"])
+    ages = sorted(((metadata or {}).get("saved_at", 0.0), memory_id)
+                  for memory_id, metadata in zip(entries["ids"], entries["metadatas"]))
+
+    evict: List[str] = []
+    if max_age is not None:
+        evict = [memory_id for saved_at, memory_id in ages if saved_at < now - max_age]
+    if max_entries is not None and len(ages) - len(evict) > max_entries:
+        evict = [memory_id for _, memory_id in ages[:len(ages) - max_entries]]
+
+    for start in range(0, len(evict), 500):
+        collection.delete(ids=evict[start:start + 500])
+    return len(evict)
+
+
+class CompactingRAGStorage(RAGStorage):
+    """RAGStorage that keeps its collection bounded in age and size.
+
+    Every saved memory is stamped with saved_at, and the collection is
+    compacted when the storage is opened and every compact_every saves, so
+    searches run against at most max_entries memories however many runs
+    have saved into it. Give each memory type its own type so they do not
+    share a collection.
+    """
+
+    def __init__(self, type, allow_reset=True, embedder_config=None, crew=None, path=None,
+                 max_age: Optional[float] = DEFAULT_MAX_AGE, max_entries: Optional[int] = DEFAULT_MAX_ENTRIES,
+                 compact_every: int = DEFAULT_COMPACT_EVERY):
+        self.max_age = max_age
+        self.max_entries = max_entries
+        self.compact_every = compact_every
+        self._saves = 0
+        super().__init__(type, allow_reset=allow_reset, embedder_config=embedder_config, crew=crew, path=path)
+        self.compact()
+
+    def _generate_embedding(self, text: str, metadata: Dict[str, Any]) -> None:
+        super()._generate_embedding(text, {**(metadata or {}), "saved_at": time.time()})
+        self._saves += 1
+        if self._saves % self.compact_every == 0:
+            self.compact()
+
+    def compact(self) -> int:
+        """Evict expired and excess memories now, returning how many were evicted"""
+        try:
+            evicted = compact_collection(self.collection, self.max_age, self.max_entries)
+        except Exception as e:
+            logging.error(f"Error during {self.type} compaction: {str(e)}")
+            return 0
+        if evicted:
+            logging.info(f"Evicted {evicted} memories from {self.type}")
+        return evicted
+
+
+def vacuum(path: str = "./memory/") -> Dict[str, int]:
+    """Reclaim the disk space left by evicted memories in a Chroma directory.
+
+    Run it while no crew is using the memory.
+
+    Args:
+        path: Directory holding chroma.sqlite3
+
+    Returns:
+        Size of chroma.sqlite3 in bytes before and after
+    """
+    database = os.path.join(path, "chroma.sqlite3")
+    before = os.path.getsize(database)
+    conn = sqlite3.connect(database, isolation_level=None)
+    try:
+        # Chroma keeps a log of every write for replication, which single-node use never reads
+        tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        if "embeddings_queue" in tables and "max_seq_id" in tables:
+            conn.execute("DELETE FROM embeddings_queue WHERE seq_id <= (SELECT COALESCE(MIN(seq_id), 0) FROM max_seq_id)")
+        conn.execute("VACUUM")
+    finally:
+        conn.close()
+    return {"before": before, "after": os.path.getsize(database)}
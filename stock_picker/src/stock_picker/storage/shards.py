@@ -0,0 +1,186 @@
+import logging
+import os
+import re
+import shutil
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+import portalocker
+
+from .rag_storage import compact_collection
+
+
+DEFAULT_MEMORY_PATH = "./memory/"
+
+# Held shared while a run copies the merged memory, and exclusively while a shard is merged into it
+LOCK_FILE = ".memory.lock"
+
+# Held by the run that owns a shard, so abandoned shards can be told apart from live ones
+OWNER_LOCK_FILE = ".owner.lock"
+
+# Chroma keeps its index segments in directories named by UUID next to chroma.sqlite3
+_SEGMENT_DIR = re.compile(r"^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$")
+
+
+@contextmanager
+def memory_lock(path: str, shared: bool = False, blocking: bool = True) -> Iterator[None]:
+    """Lock a memory directory against other processes.
+
+    Args:
+        path: Memory directory
+        shared: Take a shared lock rather than an exclusive one
+        blocking: Wait for the lock, otherwise raise portalocker.LockException at once
+    """
+    os.makedirs(path, exist_ok=True)
+    flags = portalocker.LockFlags.SHARED if shared else portalocker.LockFlags.EXCLUSIVE
+    if not blocking:
+        flags |= portalocker.LockFlags.NON_BLOCKING
+    with open(os.path.join(path, LOCK_FILE), "a") as f:
+        portalocker.lock(f, flags)
+        try:
+            yield
+        finally:
+            portalocker.unlock(f)
+
+
+def _copy_chroma(source: str, destination: str) -> None:
+    os.makedirs(destination, exist_ok=True)
+    if os.path.exists(os.path.join(source, "chroma.sqlite3")):
+        shutil.copy2(os.path.join(source, "chroma.sqlite3"), destination)
+    for name in os.listdir(source):
+        if _SEGMENT_DIR.match(name):
+            shutil.copytree(os.path.join(source, name), os.path.join(destination, name), dirs_exist_ok=True)
+
+
+def merge_into(shard_path: str, base_path: str, since: float = 0.0,
+               max_entries: Optional[int] = None) -> Dict[str, int]:
+    """Copy the memories a shard saved since a time into every matching collection of the base.
+
+    Embeddings are copied as they are, so nothing is embedded again. The
+    caller must hold the base's exclusive lock.
+
+    Args:
+        shard_path: Chroma directory of the shard
+        base_path: Chroma directory merged into
+        since: Only memories with a later saved_at are copied
+        max_entries: Size limit applied to each merged collection, or None
+
+    Returns:
+        Number of memories merged into each collection
+    """
+    import chromadb
+
+    shard = chromadb.PersistentClient(path=shard_path)
+    base = chromadb.PersistentClient(path=base_path)
+    merged = {}
+    for collection in shard.list_collections():
+        name = getattr(collection, "name", collection)
+        # No embedding function: vectors are copied as they are, and none is recorded in the collection
+        entries = shard.get_collection(name, embedding_function=None).get(
+            where={"saved_at": {"$gt": since}}, include=["embeddings", "documents", "metadatas"])
+        merged[name] = len(entries["ids"])
+        if not entries["ids"]:
+            continue
+        target = base.get_or_create_collection(name, embedding_function=None)
+        for start in range(0, len(entries["ids"]), 500):
+            end = start + 500
+            target.upsert(ids=entries["ids"][start:end], embeddings=entries["embeddings"][start:end],
+                          documents=entries["documents"][start:end], metadatas=entries["metadatas"][start:end])
+        compact_collection(target, max_age=None, max_entries=max_entries)
+    return merged
+
+
+class MemoryShard:
+    """A private copy of the short-term and entity memory for one run.
+
+    Chroma cannot be written by two processes at once, so each run works on
+    its own copy under shards/ and merges the memories it saved back into
+    the shared directory when it ends. Runs only contend for the lock while
+    copying and merging. Long-term memory and the embedding cache stay in
+    the shared directory, since SQLite in WAL mode already serializes
+    writers from several processes.
+
+    Use it as a context manager; the shard is merged and removed on exit,
+    even when the run fails.
+    """
+
+    def __init__(self, base_path: str = DEFAULT_MEMORY_PATH, name: Optional[str] = None,
+                 max_entries: Optional[int] = None) -> None:
+        self.base_path = base_path
+        # A random suffix keeps names unique across runs started in the same second,
+        # and across parallel runs sharing one MEMORY_SHARD prefix
+        self.name = name or "-".join([os.getenv("MEMORY_SHARD") or time.strftime('%Y%m%d-%H%M%S'),
+                                      str(os.getpid()), uuid.uuid4().hex])
+        self.path = os.path.join(base_path, "shards", self.name, "")
+        self.max_entries = max_entries
+        self.opened_at: Optional[float] = None
+        self.timings: Dict[str, float] = {}
+        self._owner = None
+
+    def open(self) -> "MemoryShard":
+        """Copy the shared memory into the shard"""
+        os.makedirs(self.path, exist_ok=True)
+        self._owner = open(os.path.join(self.path, OWNER_LOCK_FILE), "a")
+        portalocker.lock(self._owner, portalocker.LockFlags.EXCLUSIVE | portalocker.LockFlags.NON_BLOCKING)
+        start = time.perf_counter()
+        with memory_lock(self.base_path, shared=True):
+            self.opened_at = time.time()
+            _copy_chroma(self.base_path, self.path)
+        self.timings["open"] = time.perf_counter() - start
+        return self
+
+    def merge(self) -> Dict[str, int]:
+        """Merge the memories saved in the shard into the shared memory, then remove the shard"""
+        start = time.perf_counter()
+        with memory_lock(self.base_path):
+            merged = merge_into(self.path, self.base_path, since=self.opened_at or 0.0,
+                                max_entries=self.max_entries)
+        self.timings["merge"] = time.perf_counter() - start
+        self.close()
+        shutil.rmtree(self.path, ignore_errors=True)
+        return merged
+
+    def close(self) -> None:
+        if self._owner is not None:
+            portalocker.unlock(self._owner)
+            self._owner.close()
+            self._owner = None
+
+    def __enter__(self) -> "MemoryShard":
+        return self.open()
+
+    def __exit__(self, *exc_info) -> None:
+        try:
+            merged = self.merge()
+            logging.info(f"Merged memory shard {self.name}: {merged}")
+        except Exception as e:
+            self.close()
+            logging.error(f"Error merging memory shard {self.name}, left at {self.path}: {str(e)}")
+
+
+def merge_abandoned_shards(base_path: str = DEFAULT_MEMORY_PATH) -> List[str]:
+    """Merge and remove the shards of runs that died before merging their own.
+
+    Shards still owned by a live run are left alone.
+
+    Returns:
+        Names of the shards merged
+    """
+    shards_path = os.path.join(base_path, "shards")
+    merged = []
+    for name in sorted(os.listdir(shards_path)) if os.path.isdir(shards_path) else []:
+        shard_path = os.path.join(shards_path, name)
+        try:
+            with open(os.path.join(shard_path, OWNER_LOCK_FILE), "a") as owner:
+                portalocker.lock(owner, portalocker.LockFlags.EXCLUSIVE | portalocker.LockFlags.NON_BLOCKING)
+                with memory_lock(base_path):
+                    # The shard copied the memory at some unknown time, so take everything; upsert de-duplicates
+                    merge_into(shard_path, base_path)
+                portalocker.unlock(owner)
+        except portalocker.LockException:
+            continue
+        shutil.rmtree(shard_path, ignore_errors=True)
+        merged.append(name)
+    return merged
@@ -1,16 +1,260 @@
 from crewai.tools import BaseTool
-from typing import Type
-from pydantic import BaseModel, Field
+from typing import Dict, List, Optional, Type
+from pydantic import BaseModel, Field, PrivateAttr
+import atexit
+import collections
+import itertools
+import json
 import os
+import queue
+import threading
+import time
 import requests
+from requests.adapters import HTTPAdapter
+
+
+PUSHOVER_URL = "https://api.pushover.net/1/messages.json"
+
+# Pushover rejects messages longer than this many characters
+MAX_MESSAGE_LENGTH = 1024
+
+
+def split_message(message: str, limit: int = MAX_MESSAGE_LENGTH) -> List[str]:
+    """Split a message into parts of at most limit characters, at a line break or space where possible"""
+    parts = []
+    while len(message) > limit:
+        cut = max(message.rfind("\n", 0, limit + 1), message.rfind(" ", 0, limit + 1))
+        if cut <= 0:
+            parts.append(message[:limit])
+            message = message[limit:]
+        else:
+            parts.append(message[:cut])
+            message = message[cut + 1:]
+    parts.append(message)
+    return parts
 
 
 class PushNotification(BaseModel):
     """A message to be sent to the user"""
     message: str = Field(..., description="The message to be sent to the user.")
 
+
+class Delivery:
+    """Delivery status of one queued message"""
+
+    def __init__(self, delivery_id: int, message: str) -> None:
+        self.delivery_id = delivery_id
+        self.message = message
+        self.status = "queued"  # then "sent" or "failed"
+        self.attempts = 0
+        self.error: Optional[str] = None
+        self.queued_at = time.monotonic()
+        self.latency: Optional[float] = None  # seconds from queueing to the final outcome
+        self.done = threading.Event()
+
+    def to_dict(self) -> dict:
+        return {"id": self.delivery_id, "status": self.status, "attempts": self.attempts,
+                "latency_ms": None if self.latency is None else round(self.latency * 1000, 1),
+                "error": self.error}
+
+
+class PushDispatcher:
+    """Sends push notifications from a background thread over a pooled session.
+
+    Messages queued within batch_window seconds of each other are sent as one
+    notification, up to Pushover's length limit; a longer message is split
+    across several. Any 2xx response counts as delivered. Failed requests
+    (connection errors, timeouts, 429 and 5xx responses) are retried with
+    exponential backoff; other rejections fail at once. The status of the latest
+    max_deliveries messages is kept, along with every one still pending.
+    """
+
+    def __init__(self, url: Optional[str] = None, user: Optional[str] = None, token: Optional[str] = None,
+                 timeout: float = 10.0, max_retries: int = 4, backoff: float = 0.5,
+                 batch_window: float = 0.2, max_batch: int = 10, max_deliveries: int = 1000) -> None:
+        self.url = url or os.getenv("PUSHOVER_URL", PUSHOVER_URL)
+        self.user = user if user is not None else os.getenv("PUSHOVER_USER")
+        self.token = token if token is not None else os.getenv("PUSHOVER_TOKEN")
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+        self.max_deliveries = max_deliveries
+
+        self.session = requests.Session()
+        self.session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=4))
+        self.session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=4))
+
+        self.deliveries: Dict[int, Delivery] = {}
+        self.queued = 0
+        self.sent = 0
+        self.failed = 0
+        self.retries = 0
+        self.batches = 0
+        self._latencies: "collections.deque[float]" = collections.deque(maxlen=max_deliveries)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._queue: "queue.Queue[Optional[Delivery]]" = queue.Queue()
+        self._worker = threading.Thread(target=self._work, name="push-dispatcher", daemon=True)
+        self._worker.start()
+
+    def send(self, message: str) -> Delivery:
+        """Queue a message and return its delivery record without waiting"""
+        delivery = Delivery(next(self._ids), message)
+        with self._lock:
+            self.deliveries[delivery.delivery_id] = delivery
+            self.queued += 1
+            self._evict()
+        self._queue.put(delivery)
+        return delivery
+
+    def _evict(self) -> None:
+        # Forget the oldest finished deliveries beyond max_deliveries; they come first in the dict
+        excess = len(self.deliveries) - self.max_deliveries
+        if excess <= 0:
+            return
+        finished = []
+        for delivery_id, delivery in self.deliveries.items():
+            if delivery.done.is_set():
+                finished.append(delivery_id)
+                if len(finished) == excess:
+                    break
+        for delivery_id in finished:
+            del self.deliveries[delivery_id]
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every queued message is sent or has failed.
+
+        Returns:
+            True if nothing is still pending
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._lock:
+            pending = [delivery for delivery in self.deliveries.values() if not delivery.done.is_set()]
+        for delivery in pending:
+            remaining = None if deadline is None else max(deadline - time.monotonic(), 0)
+            if not delivery.done.wait(remaining):
+                return False
+        return True
+
+    def close(self, timeout: Optional[float] = 30.0) -> None:
+        """Deliver what is queued, then stop the background thread"""
+        self.flush(timeout)
+        self._queue.put(None)
+        self._worker.join(timeout)
+        self.session.close()
+
+    def _work(self) -> None:
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch = [first]
+            length = len(first.message)
+            deadline = time.monotonic() + self.batch_window
+            while len(batch) < self.max_batch:
+                try:
+                    delivery = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+                except queue.Empty:
+                    break
+                if delivery is None:
+                    self._deliver(batch)
+                    return
+                if length + 1 + len(delivery.message) > MAX_MESSAGE_LENGTH:
+                    self._deliver(batch)
+                    batch, length = [], -1
+                batch.append(delivery)
+                length += 1 + len(delivery.message)
+            self._deliver(batch)
+
+    def _deliver(self, batch: List[Delivery]) -> None:
+        error = None
+        # Parts already accepted are not sent again when a later one fails
+        for part in split_message("\n".join(delivery.message for delivery in batch)):
+            error = self._post(batch, part)
+            if error:
+                break
+
+        now = time.monotonic()
+        with self._lock:
+            self.batches += 1
+            for delivery in batch:
+                delivery.status = "failed" if error else "sent"
+                delivery.error = error
+                delivery.latency = now - delivery.queued_at
+                self._latencies.append(delivery.latency)
+                if error:
+                    self.failed += 1
+                else:
+                    self.sent += 1
+        for delivery in batch:
+            delivery.done.set()
+
+    def _post(self, batch: List[Delivery], message: str) -> Optional[str]:
+        # Send one notification, retrying transient failures; returns the error if it was not delivered
+        payload = {"user": self.user, "token": self.token, "message": message}
+        error = None
+        for attempt in range(self.max_retries + 1):
+            for delivery in batch:
+                delivery.attempts += 1
+            retry = False
+            try:
+                response = self.session.post(self.url, data=payload, timeout=self.timeout)
+                if 200 <= response.status_code < 300:
+                    return None
+                if response.status_code == 429 or response.status_code >= 500:
+                    error, retry = f"HTTP {response.status_code}", True
+                else:
+                    error = f"HTTP {response.status_code}: {response.text[:200]}"
+            except requests.RequestException as e:
+                error, retry = f"{type(e).__name__}: {e}", True
+            if not retry or attempt == self.max_retries:
+                break
+            with self._lock:
+                self.retries += 1
+            time.sleep(self.backoff * 2 ** attempt)
+        return error
+
+    def recent(self, limit: int = 5, exclude: Optional[int] = None) -> List[dict]:
+        """Return the status of the latest deliveries, oldest first"""
+        with self._lock:
+            deliveries = [delivery.to_dict() for delivery in self.deliveries.values()
+                          if delivery.delivery_id != exclude]
+        return deliveries[-limit:]
+
+    def metrics(self) -> dict:
+        """Return delivery counts, and latency percentiles in milliseconds over the latest max_deliveries messages"""
+        with self._lock:
+            latencies = sorted(self._latencies)
+            pending = sum(1 for delivery in self.deliveries.values() if not delivery.done.is_set())
+            metrics = {"queued": self.queued, "pending": pending, "sent": self.sent,
+                       "failed": self.failed, "retries": self.retries, "batches": self.batches}
+        for name, fraction in (("p50_ms", 0.5), ("p95_ms", 0.95), ("max_ms", 1.0)):
+            metrics[name] = round(latencies[min(int(fraction * len(latencies)), len(latencies) - 1)] * 1000, 1) \
+                if latencies else None
+        return metrics
+
+
+_default_dispatcher: Optional[PushDispatcher] = None
+_default_dispatcher_lock = threading.Lock()
+
+
+def default_dispatcher() -> PushDispatcher:
+    """Return the dispatcher shared by every PushNotificationTool in this process.
+
+    Messages still queued when the process exits are delivered first.
+    """
+    global _default_dispatcher
+    with _default_dispatcher_lock:
+        if _default_dispatcher is None:
+            _default_dispatcher = PushDispatcher()
+            atexit.register(_default_dispatcher.close)
+        return _default_dispatcher
+
+
 class PushNotificationTool(BaseTool):
-    
+
 
     name: str = "Send a Push Notification"
     description: str = (
@@ -18,12 +262,25 @@ class PushNotificationTool(BaseTool):
     )
     args_schema: Type[BaseModel] = PushNotification
 
-    def _run(self, message: str) -> str:
-        pushover_user = os.getenv("PUSHOVER_USER")
-        pushover_token = os.getenv("PUSHOVER_TOKEN")
-        pushover_url = "https://api.pushover.net/1/messages.json"
+    _dispatcher: Optional[PushDispatcher] = PrivateAttr(default=None)
+
+    def __init__(self, dispatcher: Optional[PushDispatcher] = None, **kwargs) -> None:
+        super().__init__(**kwargs)
+        self._dispatcher = dispatcher
 
+    @property
+    def dispatcher(self) -> PushDispatcher:
+        return self._dispatcher if self._dispatcher is not None else default_dispatcher()
+
+    def _run(self, message: str) -> str:
         print(f"Push: {message}")
-        payload = {"user": pushover_user, "token": pushover_token, "message": message}
-        requests.post(pushover_url, data=payload)
-        return '{"notification": "ok"}'
\ No newline at end of file
+        dispatcher = self.dispatcher
+        delivery = dispatcher.send(message)
+        # Report what is known so far without waiting on the network
+        result = {"notification": "queued", "id": delivery.delivery_id,
+                  "earlier": dispatcher.recent(exclude=delivery.delivery_id)}
+        parts = len(split_message(message))
+        if parts > 1:
+            result["parts"] = parts
+            result["note"] = f"Longer than {MAX_MESSAGE_LENGTH} characters, so sent as {parts} notifications"
+        return json.dumps(result)
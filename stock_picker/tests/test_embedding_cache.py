@@ -0,0 +1,96 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+
+class CountingEmbedder:
+    """Wraps HashingEmbedder and records the texts it is asked to embed."""
+
+    def __init__(self):
+        from stock_picker.storage.embedding_cache import HashingEmbedder
+        self.embedder = HashingEmbedder()
+        self.calls = []
+
+    def __call__(self, input):
+        self.calls.append(list(input))
+        return self.embedder(input)
+
+
+class TestEmbeddingCache(unittest.TestCase):
+    """Tests for the content-addressed embedding cache."""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "embedding_cache.db")
+        # crewAI's RAGStorage leaves a chromadb-<hash>.lock file in the working directory
+        self.cwd = os.getcwd()
+        os.chdir(self.directory.name)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.directory.cleanup()
+
+    def embedding_function(self, model="hashing/hashing-384", batch_size=128):
+        """A fresh embedding function over the cache file, as a new run would open it."""
+        from stock_picker.storage.embedding_cache import CachedEmbeddingFunction, EmbeddingCache
+        cache = EmbeddingCache(self.path)
+        self.addCleanup(cache._conn.close)
+        return CachedEmbeddingFunction(CountingEmbedder(), model, cache, batch_size=batch_size)
+
+    def test_texts_are_embedded_once_across_runs(self):
+        """Test that a later run is served from the cache and gets the same vectors."""
+        texts = ["NVIDIA leads AI chips", "AMD gains share", "NVIDIA leads AI chips"]
+        first = self.embedding_function(batch_size=1)
+        vectors = first(texts)
+        self.assertEqual(first.embedder.calls, [["NVIDIA leads AI chips"], ["AMD gains share"]])
+        self.assertEqual(first.stats(), {"hits": 1, "misses": 2, "batches": 2, "cached": 2})
+
+        second = self.embedding_function()
+        for text, vector in zip(texts, vectors):
+            np.testing.assert_array_equal(second([text])[0], vector)
+        self.assertEqual(second.embedder.calls, [])
+        self.assertEqual(second.stats(), {"hits": 3, "misses": 0, "batches": 0, "cached": 2})
+
+        other_model = self.embedding_function(model="hashing/other")
+        other_model(["AMD gains share"])
+        self.assertEqual(other_model.embedder.calls, [["AMD gains share"]])
+
+    def test_failed_put_many_stores_nothing(self):
+        """Test that a failed batch is rolled back and the cache stays usable."""
+        import sqlite3
+        from stock_picker.storage.embedding_cache import EmbeddingCache
+        cache = EmbeddingCache(self.path)
+        self.addCleanup(cache._conn.close)
+        vector = np.ones(4, dtype=np.float32)
+        with self.assertRaises(sqlite3.IntegrityError):
+            cache.put_many({"first": vector, None: vector})
+        self.assertFalse(cache._conn.in_transaction)
+        self.assertEqual(len(cache), 0)
+        cache.put_many({"first": vector})
+        self.assertEqual(list(cache.get_many(["first"])), ["first"])
+
+    def test_memory_saves_and_searches_hit_across_runs(self):
+        """Test that a memory saved in one run and searched in the next is embedded only once."""
+        from stock_picker.storage.rag_storage import CompactingRAGStorage
+        memory = os.path.join(self.directory.name, "memory")
+        runs = []
+        for _ in range(2):
+            embedding_function = self.embedding_function()
+            storage = CompactingRAGStorage(type="short_term", path=memory, embedder_config={
+                "provider": "custom", "config": {"embedder": embedding_function}})
+            storage.save("Chose NVIDIA for its data center growth", {"agent": "picker"})
+            results = storage.search("Chose NVIDIA for its data center growth", score_threshold=0.0)
+            runs.append((embedding_function, results))
+
+        first, second = runs[0][0], runs[1][0]
+        self.assertEqual(first.embedder.calls, [["Chose NVIDIA for its data center growth"]])
+        self.assertEqual(second.embedder.calls, [])
+        self.assertEqual(second.stats()["misses"], 0)
+        self.assertGreaterEqual(second.stats()["hits"], 2)
+        self.assertEqual(runs[1][1][0]["context"], "Chose NVIDIA for its data center growth")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+import asyncio
+import os
+import tempfile
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+
+class TestFanOut(unittest.TestCase):
+    """Tests for researching the trending companies concurrently and merging the results."""
+
+    def setUp(self):
+        # research_trending_companies writes its merged output under the working directory
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.addCleanup(os.chdir, os.getcwd())
+        os.chdir(self.directory.name)
+        environment = mock.patch.dict(os.environ, {"OPENAI_API_KEY": "test"})
+        environment.start()
+        self.addCleanup(environment.stop)
+
+    def run_fan_out(self, companies, research):
+        """Run kickoff_fan_out with every crew's kickoff_async stubbed.
+
+        companies is the finder's parsed output and research maps a company
+        name to its research, or to an exception its research raises.
+        """
+        from crewai import Crew
+        from stock_picker.crew import StockPicker
+        picked = []
+
+        async def kickoff_async(crew, inputs=None):
+            if crew.name == "trending_company_finder":
+                return SimpleNamespace(pydantic=companies, raw="not json")
+            if crew.name == "company_research":
+                result = research[inputs["company_name"]]
+                if isinstance(result, Exception):
+                    raise result
+                return SimpleNamespace(pydantic=result, raw="")
+            picked.append(crew.tasks[0].context[0].output.pydantic)
+            return SimpleNamespace(pydantic=None, raw="picked")
+
+        picker = StockPicker()
+        with mock.patch.object(StockPicker, "_memory", return_value={}), \
+                mock.patch.object(Crew, "kickoff_async", kickoff_async):
+            result = asyncio.run(picker.kickoff_fan_out({"sector": "Technology"}, max_concurrency=2))
+        return result, picked
+
+    def companies(self, *names):
+        from stock_picker.crew import TrendingCompany, TrendingCompanyList
+        return TrendingCompanyList(companies=[TrendingCompany(name=name, ticker=name.upper(), reason="news")
+                                             for name in names])
+
+    def research(self, name):
+        from stock_picker.crew import TrendingCompanyResearch
+        return TrendingCompanyResearch(name=name, market_position="strong", future_outlook="good",
+                                       investment_potential="high")
+
+    def test_failed_research_is_left_out(self):
+        """Test that the pick runs on the companies whose research succeeded."""
+        research = {"a": self.research("a"), "b": RuntimeError("search failed"), "c": None, "d": self.research("d")}
+        result, picked = self.run_fan_out(self.companies("a", "b", "c", "d"), research)
+        self.assertEqual(result.raw, "picked")
+        self.assertEqual([company.name for company in picked[0].research_list], ["a", "d"])
+        with open(os.path.join("output", "research_report.json")) as f:
+            self.assertIn('"name": "d"', f.read())
+
+    def test_every_research_failed(self):
+        """Test that the run fails when no company could be researched."""
+        with self.assertRaises(RuntimeError):
+            self.run_fan_out(self.companies("a"), {"a": RuntimeError("search failed")})
+
+    def test_unparsed_trending_companies(self):
+        """Test that a finder output that could not be parsed raises a clear error."""
+        with self.assertRaisesRegex(ValueError, "trending companies"):
+            self.run_fan_out(None, {})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+import os
+import sqlite3
+import tempfile
+import time
+import unittest
+
+
+class TestIndexedLTMStorage(unittest.TestCase):
+    """Tests for the indexed, batched and pruned long-term memory store."""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "long_term_memory_storage.db")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def storage(self, **kwargs):
+        from stock_picker.storage.ltm_storage import IndexedLTMStorage
+        storage = IndexedLTMStorage(db_path=self.path, **kwargs)
+        self.addCleanup(storage.close)
+        return storage
+
+    def rows(self):
+        """Count the rows written, through a connection of its own."""
+        conn = sqlite3.connect(self.path)
+        try:
+            return conn.execute("SELECT COUNT(*) FROM long_term_memories").fetchone()[0]
+        finally:
+            conn.close()
+
+    def test_loads_what_ltm_sqlite_storage_saved(self):
+        """Test that an existing crewAI database is read as is, with load's order and limit."""
+        from crewai.memory.storage.ltm_sqlite_storage import LTMSQLiteStorage
+        original = LTMSQLiteStorage(db_path=self.path)
+        now = time.time()
+        for offset, score in [(1, 0.9), (3, 0.5), (2, 0.7), (3, 0.2)]:
+            original.save("pick a stock", {"suggestions": [str(offset)]}, str(now + offset), score)
+        original.save("other task", {"suggestions": []}, str(now), 1.0)
+
+        storage = self.storage()
+        expected = original.load("pick a stock", 3)
+        self.assertEqual(storage.load("pick a stock", 3), expected)
+        self.assertEqual([entry["score"] for entry in expected], [0.2, 0.5, 0.7])
+        self.assertIsNone(storage.load("unknown task", 3))
+
+    def test_saves_are_written_in_batches(self):
+        """Test that saves wait for a full batch, but load and close see queued ones."""
+        storage = self.storage(batch_size=3)
+        now = time.time()
+        storage.save("task", {"n": 1}, str(now), 0.5)
+        storage.save("task", {"n": 2}, str(now + 1), 0.5)
+        self.assertEqual(self.rows(), 0)
+        storage.save("task", {"n": 3}, str(now + 2), 0.5)
+        self.assertEqual(self.rows(), 3)
+
+        storage.save("task", {"n": 4}, str(now + 3), 0.5)
+        self.assertEqual([entry["metadata"]["n"] for entry in storage.load("task", 2)], [4, 3])
+        storage.save("task", {"n": 5}, str(now + 4), 0.5)
+        storage.close()
+        self.assertEqual(self.rows(), 5)
+
+        storage = self.storage(batch_size=3)
+        storage.save("task", {"n": 6}, str(now + 5), 0.5)
+        storage.reset()
+        storage.close()
+        self.assertEqual(self.rows(), 0)
+
+    def test_eviction(self):
+        """Test eviction by age, by count per task keeping what load returns, and by total count."""
+        storage = self.storage(max_age=100.0, max_per_task=2, max_rows=None, batch_size=1)
+        now = time.time()
+        storage.save("stale", {}, str(now - 500), 1.0)
+        for offset, score in [(0, 0.1), (1, 0.2), (2, 0.3), (3, 0.4)]:
+            storage.save("task", {"offset": offset}, str(now - offset), score)
+        kept = storage.load("task", 2)
+        self.assertEqual(storage.evict(now), {"age": 1, "per_task": 2, "total": 0})
+        self.assertEqual(storage.load("task", 10), kept)
+        self.assertIsNone(storage.load("stale", 1))
+
+        storage.max_rows = 2
+        for score in (0.05, 0.9):
+            storage.save(f"task {score}", {}, str(now), score)
+        self.assertEqual(storage.evict(now)["total"], 2)
+        self.assertEqual(sorted(entry["score"] for task in ("task", "task 0.9")
+                                for entry in storage.load(task, 10) or []), [0.2, 0.9])
+
+        storage.close()
+        reopened = self.storage(max_per_task=None, max_rows=1)
+        self.assertEqual(self.rows(), 1)
+        self.assertEqual(reopened.load("task 0.9", 1)[0]["score"], 0.9)
+
+    def test_maintain_report(self):
+        """Test that maintenance reports the rows kept and that load uses the index."""
+        storage = self.storage(max_per_task=3)
+        now = time.time()
+        for index in range(40):
+            storage.save(f"task {index % 4}", {"index": index}, str(now + index), 0.5)
+        report = storage.maintain(samples=20)
+        self.assertEqual((report["rows"], report["task_descriptions"]), (12, 4))
+        self.assertEqual(report["evicted"], {"age": 0, "per_task": 28, "total": 0})
+        self.assertTrue(any("idx_ltm_task_datetime" in step for step in report["load_plan"]), report["load_plan"])
+        self.assertFalse(any("TEMP B-TREE" in step for step in report["load_plan"]), report["load_plan"])
+        self.assertEqual(report["load_samples"], 20)
+        self.assertLessEqual(report["load_p50_ms"], report["load_max_ms"])
+
+
+if __name__ == '__main__':
+    unittest.main()
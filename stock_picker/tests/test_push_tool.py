@@ -0,0 +1,153 @@
+import json
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+
+class PushoverStub(ThreadingHTTPServer):
+    """A local stand-in for the Pushover API that answers with scripted status codes."""
+
+    def __init__(self, statuses=()):
+        super().__init__(("127.0.0.1", 0), PushoverHandler)
+        self.statuses = list(statuses)
+        self.messages = []
+        self.lock = threading.Lock()
+        self.thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self.thread.start()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/1/messages.json"
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+class PushoverHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        form = parse_qs(self.rfile.read(int(self.headers["Content-Length"])).decode())
+        with self.server.lock:
+            self.server.messages.append(form["message"][0])
+            status = self.server.statuses.pop(0) if self.server.statuses else 200
+        if status == 200:
+            body = json.dumps({"status": 1}).encode()
+        elif status < 300:
+            body = b"accepted"
+        else:
+            body = json.dumps({"status": 0, "errors": ["stub"]}).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestPushDispatcher(unittest.TestCase):
+    """Tests for the batching, retrying push notification dispatcher."""
+
+    def dispatcher(self, statuses=(), **kwargs):
+        from stock_picker.tools.push_tool import PushDispatcher
+        server = PushoverStub(statuses)
+        self.addCleanup(server.stop)
+        options = {"user": "user", "token": "token", "backoff": 0.01, "batch_window": 0.01, **kwargs}
+        dispatcher = PushDispatcher(server.url, **options)
+        self.addCleanup(dispatcher.close, 5)
+        return dispatcher, server
+
+    def test_retries_rate_limits_and_server_errors(self):
+        """Test that 429 and 5xx responses are retried until the message is accepted."""
+        dispatcher, server = self.dispatcher([429, 503, 500])
+        delivery = dispatcher.send("AAPL picked")
+        self.assertTrue(dispatcher.flush(10))
+        self.assertEqual((delivery.status, delivery.attempts, delivery.error), ("sent", 4, None))
+        self.assertEqual(server.messages, ["AAPL picked"] * 4)
+        self.assertEqual(dispatcher.metrics()["retries"], 3)
+
+    def test_any_success_status_is_delivered(self):
+        """Test that a 2xx response is not retried, even when its body is not JSON."""
+        dispatcher, server = self.dispatcher([202])
+        delivery = dispatcher.send("AAPL picked")
+        self.assertTrue(dispatcher.flush(10))
+        self.assertEqual((delivery.status, delivery.attempts), ("sent", 1))
+        self.assertEqual(server.messages, ["AAPL picked"])
+
+    def test_long_messages_are_split(self):
+        """Test that a message over the length limit is sent in parts, resending only a failed part."""
+        from stock_picker.tools.push_tool import MAX_MESSAGE_LENGTH
+        dispatcher, server = self.dispatcher([200, 503])
+        words = " ".join(["word"] * MAX_MESSAGE_LENGTH)
+        delivery = dispatcher.send(words)
+        self.assertTrue(dispatcher.flush(10))
+        self.assertEqual(delivery.status, "sent")
+        self.assertTrue(all(len(message) <= MAX_MESSAGE_LENGTH for message in server.messages))
+        # Five parts of 205 words, the second sent twice
+        self.assertEqual(len(server.messages), 6)
+        self.assertEqual(server.messages[1], server.messages[2])
+        self.assertEqual(" ".join(server.messages[:1] + server.messages[2:]), words)
+
+    def test_failures(self):
+        """Test that other rejections fail at once and retries stop after max_retries."""
+        dispatcher, server = self.dispatcher([400], max_retries=2)
+        rejected = dispatcher.send("rejected")
+        dispatcher.flush(10)
+        self.assertEqual((rejected.status, rejected.attempts), ("failed", 1))
+        self.assertTrue(rejected.error.startswith("HTTP 400"))
+
+        server.statuses = [502] * 3
+        exhausted = dispatcher.send("exhausted")
+        dispatcher.flush(10)
+        self.assertEqual((exhausted.status, exhausted.attempts, exhausted.error), ("failed", 3, "HTTP 502"))
+        self.assertEqual(len(server.messages), 4)
+        self.assertEqual(dispatcher.metrics()["failed"], 2)
+
+    def test_batches_messages_within_the_window(self):
+        """Test that messages queued together go out as one notification, split at the length limit."""
+        from stock_picker.tools.push_tool import MAX_MESSAGE_LENGTH
+        dispatcher, server = self.dispatcher(batch_window=1.0)
+        for message in ["one", "two", "three"]:
+            dispatcher.send(message)
+        dispatcher.flush(10)
+        self.assertEqual(server.messages, ["one\ntwo\nthree"])
+
+        long = "x" * (MAX_MESSAGE_LENGTH // 2 + 1)
+        dispatcher.send(long)
+        dispatcher.send(long)
+        dispatcher.flush(10)
+        self.assertEqual(server.messages[1:], [long, long])
+        self.assertEqual(dispatcher.metrics()["batches"], 3)
+        self.assertEqual(dispatcher.metrics()["sent"], 5)
+
+    def test_tool_reports_split_messages(self):
+        """Test that the tool result says when a message went out as several notifications."""
+        from stock_picker.tools.push_tool import MAX_MESSAGE_LENGTH, PushNotificationTool
+        dispatcher, server = self.dispatcher()
+        tool = PushNotificationTool(dispatcher=dispatcher)
+        self.assertNotIn("parts", json.loads(tool._run("short")))
+        self.assertEqual(json.loads(tool._run("x" * (MAX_MESSAGE_LENGTH + 1)))["parts"], 2)
+
+    def test_delivery_status(self):
+        """Test the status reported for recent deliveries, and that finished ones are evicted."""
+        dispatcher, server = self.dispatcher([400], max_deliveries=3)
+        first = dispatcher.send("first")
+        dispatcher.flush(10)
+        ids = [first.delivery_id]
+        for index in range(4):
+            ids.append(dispatcher.send(f"message {index}").delivery_id)
+            dispatcher.flush(10)
+
+        recent = dispatcher.recent(limit=5, exclude=ids[-1])
+        self.assertEqual([entry["id"] for entry in recent], ids[2:4])
+        self.assertEqual({entry["status"] for entry in recent}, {"sent"})
+        self.assertEqual(list(dispatcher.deliveries), ids[2:])
+        self.assertEqual(dispatcher.deliveries[ids[-1]].to_dict()["attempts"], 1)
+        metrics = dispatcher.metrics()
+        self.assertEqual((metrics["queued"], metrics["pending"], metrics["sent"], metrics["failed"]), (5, 0, 4, 1))
+
+
+if __name__ == '__main__':
+    unittest.main()
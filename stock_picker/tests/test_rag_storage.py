@@ -0,0 +1,77 @@
+import os
+import tempfile
+import unittest
+
+
+class TestCompactingRAGStorage(unittest.TestCase):
+    """Tests for age and size bounded memory collections."""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "memory")
+        # crewAI's RAGStorage leaves a chromadb-<hash>.lock file in the working directory
+        self.cwd = os.getcwd()
+        os.chdir(self.directory.name)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.directory.cleanup()
+
+    def storage(self, **kwargs):
+        from stock_picker.storage.embedding_cache import HashingEmbedder
+        from stock_picker.storage.rag_storage import CompactingRAGStorage
+        return CompactingRAGStorage(type="short_term", path=self.path, **kwargs, embedder_config={
+            "provider": "custom", "config": {"embedder": HashingEmbedder()}})
+
+    def documents(self, storage):
+        return sorted(storage.collection.get()["documents"])
+
+    def test_compact_collection(self):
+        """Test eviction by age, then of the oldest beyond the size limit, with unstamped memories oldest."""
+        import chromadb
+        from stock_picker.storage.rag_storage import compact_collection
+        client = chromadb.EphemeralClient()
+        collection = client.create_collection("compact_collection", embedding_function=None)
+        collection.add(ids=["none", "old", "a", "b", "c"], embeddings=[[float(index), 1.0] for index in range(5)],
+                       metadatas=[{"agent": "x"}, {"saved_at": 10.0}, {"saved_at": 100.0},
+                                  {"saved_at": 200.0}, {"saved_at": 300.0}])
+
+        self.assertEqual(compact_collection(collection, max_age=250.0, max_entries=None, now=320.0), 2)
+        self.assertEqual(sorted(collection.get()["ids"]), ["a", "b", "c"])
+        self.assertEqual(compact_collection(collection, max_age=None, max_entries=2, now=320.0), 1)
+        self.assertEqual(sorted(collection.get()["ids"]), ["b", "c"])
+        self.assertEqual(compact_collection(collection, max_age=None, max_entries=None), 0)
+        self.assertEqual(compact_collection(collection, max_age=1.0, max_entries=5, now=320.0), 2)
+        self.assertEqual(collection.count(), 0)
+
+    def test_compacts_every_few_saves_and_on_open(self):
+        """Test that saves are stamped and the collection is cut back to the newest max_entries."""
+        storage = self.storage(max_entries=2, compact_every=3)
+        for index in range(5):
+            storage.save(f"memory {index}", {"agent": "picker"})
+        metadatas = storage.collection.get()["metadatas"]
+        self.assertTrue(all("saved_at" in metadata for metadata in metadatas))
+        # Compacted to two after the third save, then two more were saved
+        self.assertEqual(self.documents(storage), ["memory 1", "memory 2", "memory 3", "memory 4"])
+
+        reopened = self.storage(max_entries=2)
+        self.assertEqual(self.documents(reopened), ["memory 3", "memory 4"])
+        self.assertEqual(reopened.compact(), 0)
+        self.assertEqual(self.storage(max_age=0.0).collection.count(), 0)
+
+    def test_vacuum_reclaims_evicted_space(self):
+        """Test that vacuum shrinks chroma.sqlite3 once memories are evicted."""
+        from stock_picker.storage.rag_storage import vacuum
+        storage = self.storage(max_entries=None, compact_every=1000)
+        for index in range(200):
+            storage.save(f"memory {index} " + "filler text " * 50, {"agent": "picker"})
+        self.storage(max_entries=5)
+
+        sizes = vacuum(self.path)
+        self.assertLess(sizes["after"], sizes["before"])
+        self.assertEqual(sizes["after"], os.path.getsize(os.path.join(self.path, "chroma.sqlite3")))
+        self.assertEqual(self.storage().collection.count(), 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+import os
+import tempfile
+import time
+import unittest
+
+
+class TestMemoryShard(unittest.TestCase):
+    """Tests for per-run memory shards and merging them back."""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.base = os.path.join(self.directory.name, "memory", "")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def save(self, path, memories, collection="short_term"):
+        """Store (id, saved_at) memories with made-up embeddings, as a run's storage would."""
+        import chromadb
+        client = chromadb.PersistentClient(path=path)
+        target = client.get_or_create_collection(collection, embedding_function=None)
+        target.upsert(ids=[memory_id for memory_id, _ in memories],
+                      embeddings=[[float(index), 1.0] for index in range(len(memories))],
+                      documents=[f"memory {memory_id}" for memory_id, _ in memories],
+                      metadatas=[{"saved_at": saved_at} for _, saved_at in memories])
+
+    def ids(self, path, collection="short_term"):
+        import chromadb
+        return sorted(chromadb.PersistentClient(path=path).get_collection(collection).get()["ids"])
+
+    def test_merges_only_what_the_run_saved(self):
+        """Test that a shard starts from the shared memory and merges back only memories saved after it opened."""
+        from stock_picker.storage.shards import MemoryShard
+        self.save(self.base, [("shared", time.time() - 60)])
+        with MemoryShard(self.base, name="run-1") as shard:
+            self.assertEqual(self.ids(shard.path), ["shared"])
+            self.save(shard.path, [("new", time.time() + 1), ("stale", shard.opened_at - 10)])
+            self.save(shard.path, [("entity", time.time() + 1)], collection="entities")
+        self.assertEqual(self.ids(self.base), ["new", "shared"])
+        self.assertEqual(self.ids(self.base, "entities"), ["entity"])
+        self.assertFalse(os.path.exists(shard.path))
+        self.assertEqual(set(shard.timings), {"open", "merge"})
+
+    def test_default_names_are_unique(self):
+        """Test that runs started together get distinct shards, also under a shared MEMORY_SHARD prefix."""
+        from unittest import mock
+        from stock_picker.storage.shards import MemoryShard
+        self.assertNotEqual(MemoryShard(self.base).name, MemoryShard(self.base).name)
+        with mock.patch.dict(os.environ, {"MEMORY_SHARD": "batch-7"}):
+            first, second = MemoryShard(self.base), MemoryShard(self.base)
+            self.assertTrue(first.name.startswith("batch-7-"))
+            with first, second:
+                self.assertNotEqual(first.path, second.path)
+
+    def test_merge_respects_max_entries(self):
+        """Test that a merged collection is cut back to its newest max_entries."""
+        from stock_picker.storage.shards import MemoryShard
+        self.save(self.base, [("a", time.time() - 60), ("b", time.time() - 30)])
+        shard = MemoryShard(self.base, name="run-2", max_entries=2).open()
+        self.save(shard.path, [("c", time.time() + 1)])
+        self.assertEqual(shard.merge(), {"short_term": 1})
+        self.assertEqual(self.ids(self.base), ["b", "c"])
+
+    def test_failed_run_still_merges(self):
+        """Test that leaving the context on an error merges the shard anyway."""
+        from stock_picker.storage.shards import MemoryShard
+        with self.assertRaises(RuntimeError):
+            with MemoryShard(self.base, name="run-3") as shard:
+                self.save(shard.path, [("partial", time.time() + 1)])
+                raise RuntimeError("crew failed")
+        self.assertEqual(self.ids(self.base), ["partial"])
+
+    def test_abandoned_shards_are_recovered(self):
+        """Test that shards of runs that died are merged in full, and live ones are left alone."""
+        from stock_picker.storage.shards import MemoryShard, merge_abandoned_shards
+        self.save(self.base, [("shared", time.time() - 60)])
+        abandoned = MemoryShard(self.base, name="dead-run").open()
+        # Saved before opened_at, which only a merge of the whole shard picks up
+        self.save(abandoned.path, [("early", abandoned.opened_at - 5), ("late", time.time() + 1)])
+        abandoned.close()
+        live = MemoryShard(self.base, name="live-run").open()
+        self.addCleanup(live.close)
+        self.save(live.path, [("in-progress", time.time() + 1)])
+
+        self.assertEqual(merge_abandoned_shards(self.base), ["dead-run"])
+        self.assertEqual(self.ids(self.base), ["early", "late", "shared"])
+        self.assertFalse(os.path.exists(abandoned.path))
+        self.assertTrue(os.path.exists(live.path))
+        self.assertEqual(merge_abandoned_shards(self.base), [])
+
+    def test_memory_lock(self):
+        """Test that an exclusive lock excludes shared ones and shared locks coexist."""
+        import portalocker
+        from stock_picker.storage.shards import memory_lock
+        with memory_lock(self.base, shared=True):
+            with memory_lock(self.base, shared=True, blocking=False):
+                pass
+            with self.assertRaises(portalocker.LockException):
+                with memory_lock(self.base, blocking=False):
+                    pass
+        with memory_lock(self.base, blocking=False):
+            pass
+
+
+if __name__ == '__main__':
+    unittest.main()